@@ -0,0 +1,96 @@
+"""추론 이벤트 디코딩 마이크로 벤치마크
+
+기존 경로(stdlib json + 매 메시지 np.array(target))와
+v1 바이너리 포맷(레코드 재사용, 타깃은 변경/주기적 재전송 시에만)을 비교한다.
+
+    python -m bench.event_decode --count 200000
+"""
+
+import argparse, json, time
+import numpy as np
+
+from services.events import EventEncoder, InferenceEvent, decode_event
+
+TARGET = [[812, 204], [1105, 210], [1112, 640], [805, 633]]
+
+
+def make_json_messages(count):
+    messages = []
+    for i in range(count):
+        event = {
+            "type": "arrow",
+            "timestamp": 1_700_000_000.0 + i / 30,
+            "tip": [950.5 + i % 7, 300.25 + i % 11],
+            "bbox": [940, 290, 980, 330],
+            "conf": 0.91,
+            "frame_size": [1920, 1080],
+            "target": TARGET,
+        }
+        messages.append(json.dumps(event).encode())
+    return messages
+
+
+def make_binary_messages(count):
+    encoder = EventEncoder()
+    encoder.set_target(TARGET)
+    messages = []
+    for i in range(count):
+        messages.append(
+            encoder.encode(
+                "arrow",
+                1_700_000_000.0 + i / 30,
+                tip=(950.5 + i % 7, 300.25 + i % 11),
+                bbox=(940, 290, 980, 330),
+                conf=0.91,
+                frame_size=(1920, 1080),
+            )
+        )
+    return messages
+
+
+def run_json(messages):
+    start = time.perf_counter()
+    for data in messages:
+        event = json.loads(data)
+        if event.get("target") is not None:
+            np.array(event["target"], dtype=np.int32)
+        event["tip"], event["bbox"], event["timestamp"], event["conf"]
+    return time.perf_counter() - start
+
+
+def run_binary(messages):
+    record = InferenceEvent()
+    start = time.perf_counter()
+    for data in messages:
+        event = decode_event(data, record)
+        event.tip, event.bbox, event.timestamp, event.conf
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    json_messages = make_json_messages(args.count)
+    binary_messages = make_binary_messages(args.count)
+
+    json_sec = run_json(json_messages)
+    binary_sec = run_binary(binary_messages)
+
+    json_size = sum(map(len, json_messages)) / args.count
+    binary_size = sum(map(len, binary_messages)) / args.count
+
+    print(f"{'format':>8} {'us/event':>9} {'events/s':>11} {'bytes':>7}")
+    for name, sec, size in (
+        ("json", json_sec, json_size),
+        ("binary", binary_sec, binary_size),
+    ):
+        print(
+            f"{name:>8} {sec / args.count * 1e6:>9.2f} "
+            f"{args.count / sec:>11.0f} {size:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""적중 판정 파이프라인 녹화/리플레이 벤치마크
+
+라이브 ZMQ 스트림을 녹화해 두고, 같은 입력으로 add_event와 idle/적중 판정을
+가상 시계 위에서 다시 돌린다. 성능 리포트와 골든 파일 회귀 비교를 지원한다.
+
+    # 추론 이벤트(+선택적으로 프레임) 녹화
+    python -m bench.replay record -o range.sbrc --event cam1=5601 --frame cam1=5701
+
+    # 최대 속도 리플레이 (--speed 1 이면 녹화 속도 그대로)
+    python -m bench.replay run range.sbrc
+
+    # 골든 파일 생성 / 회귀 비교
+    python -m bench.replay run range.sbrc --write-golden range.golden.json
+    python -m bench.replay run range.sbrc --golden range.golden.json
+"""
+
+import argparse, json, sys, time
+import cv2, msgpack, numpy as np, zmq
+
+from services.arrow.clock import NS
+from services.arrow.estimators import ESTIMATORS, HIT_ESTIMATOR, make_estimator
+from services.arrow.service import ArrowService, HIT_PROVISIONAL
+from services.events import InferenceEvent, decode_event
+from services.recording import RecordWriter, read_records, KIND_EVENT, KIND_FRAME
+from services.webrtc.frame_history import FrameHistory
+from services.webrtc.shm_ring import ShmFrameRing
+
+GOLDEN_VERSION = 1
+
+
+class VirtualClock:
+    """monotonic_ns 대신 주입하는 가상 시계 (녹화 수신 시각 기준 ns)"""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class ReplayScheduler:
+    """HitScheduler 대신 카메라별 최신 데드라인(ns)만 기록"""
+
+    def __init__(self):
+        self.deadlines = {}
+
+    def on_transition(self, service, old, new):
+        if service.deadline_ns is None:
+            self.deadlines.pop(service.cam_id, None)
+        else:
+            self.deadlines[service.cam_id] = service.deadline_ns
+
+    def pop_due(self, until):
+        due = min(
+            ((d, cam_id) for cam_id, d in self.deadlines.items() if d <= until),
+            default=None,
+        )
+        if due is not None:
+            del self.deadlines[due[1]]
+        return due
+
+
+class Replayer:
+    def __init__(
+        self, buffer_size=10, speed=0.0, frames=False, estimator=None, streaming=False
+    ):
+        self.buffer_size = buffer_size
+        self.estimator = estimator
+        self.streaming = streaming
+        self.speed = speed
+        self.frames = frames
+
+        self.clock = VirtualClock()
+        self.scheduler = ReplayScheduler()
+        self.services = {}
+        self.records = {}
+
+        self.events = 0
+        self.decode_errors = 0
+        self.hits = []
+        self.provisional = 0
+        self.retracted = 0
+        self.event_sec = []
+        self.hit_latency = []  # 마지막 수용 이벤트 → 적중 발행 (가상 시각 + 판정 시간)
+        self.provisional_latency = []
+        self.span_sec = 0.0
+        self.wall_sec = 0.0
+
+        self._t0 = None
+        self._wall0 = None
+
+    def service(self, cam_id):
+        service = self.services.get(cam_id)
+        if service is None:
+            service = ArrowService(
+                buffer_size=self.buffer_size,
+                cam_id=cam_id,
+                clock=self.clock,
+                estimator=make_estimator(self.estimator),
+                streaming=self.streaming,
+            )
+            service.listeners.append(self.scheduler.on_transition)
+            if self.frames:
+                service.frame_history = FrameHistory()
+            self.services[cam_id] = service
+        return service
+
+    def run(self, records):
+        last = None
+        for kind, recv_time, cam_id, payload in records:
+            if self._t0 is None:
+                self._t0 = recv_time
+                self._wall0 = time.perf_counter()
+
+            self._fire(int(recv_time * NS))
+            self._wait(recv_time)
+            self.clock.now = int(recv_time * NS)
+            last = recv_time
+
+            if kind == KIND_EVENT:
+                self._event(cam_id, payload)
+            elif kind == KIND_FRAME and self.frames:
+                self._frame(cam_id, payload, recv_time)
+
+        if self._t0 is None:
+            return
+        self._fire(float("inf"))
+        self.span_sec = last - self._t0
+        self.wall_sec = time.perf_counter() - self._wall0
+
+    def _wait(self, t):
+        if self.speed <= 0:
+            return
+        delay = self._wall0 + (t - self._t0) / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _fire(self, until):
+        while True:
+            due = self.scheduler.pop_due(until)
+            if due is None:
+                return
+            deadline, cam_id = due
+            at = deadline / NS
+
+            self._wait(at)
+            self.clock.now = deadline
+
+            service = self.services[cam_id]
+            started = time.perf_counter()
+            result = service.advance(deadline, visualize=False)
+            if result is None:
+                continue
+            # 리플레이 sleep 오차는 빼고, 그 샷의 마지막 수용 이벤트부터 잰다
+            latency = (
+                (deadline - service.last_event_ns) / NS
+                + time.perf_counter()
+                - started
+            )
+            hit_type, hit = result
+            if hit_type == HIT_PROVISIONAL:
+                self.provisional += 1
+                self.provisional_latency.append(latency)
+                continue
+            if hit is None:
+                self.retracted += 1
+                continue
+
+            self.hit_latency.append(latency)
+            self.hits.append(
+                {
+                    "cam_id": cam_id,
+                    "time": round(at - self._t0, 3),
+                    "tip": [round(hit[0], 2), round(hit[1], 2)],
+                    "confidence": round(service.last_estimate.confidence, 3),
+                }
+            )
+
+    def _event(self, cam_id, payload):
+        record = self.records.setdefault(cam_id, InferenceEvent())
+        service = self.service(cam_id)
+
+        start = time.perf_counter()
+        try:
+            event = decode_event(payload, record)
+        except Exception:
+            self.decode_errors += 1
+            return
+        service.add_event(event)
+        self.event_sec.append(time.perf_counter() - start)
+        self.events += 1
+
+    def _frame(self, cam_id, payload, recv_time):
+        msg = msgpack.unpackb(payload, raw=False)
+        image = cv2.imdecode(np.frombuffer(msg["jpeg"], np.uint8), cv2.IMREAD_COLOR)
+        if image is not None:
+            self.service(cam_id).frame_history.push(
+                msg.get("timestamp") or recv_time, image
+            )
+
+
+def _parse_ports(values):
+    pairs = []
+    for value in values or ():
+        cam_id, _, port = value.partition("=")
+        if not port:
+            raise SystemExit(f"cam_id=port 형식이어야 함: {value}")
+        pairs.append((cam_id, int(port)))
+    return pairs
+
+
+def _inline_frame(payload, rings):
+    """공유 메모리 링 알림은 녹화 파일에 남도록 JPEG 메시지로 바꾼다"""
+    msg = msgpack.unpackb(payload, raw=False)
+    if "shm" not in msg:
+        return payload
+    ring = rings.get(msg["shm"])
+    if ring is None or ring.epoch != msg.get("epoch"):
+        ring = rings[msg["shm"]] = ShmFrameRing.attach(msg["shm"])
+    frame = ring.view(msg["slot"], msg["seq"])
+    if frame is None:
+        return None  # 읽기 전에 덮어써짐
+    ok, jpeg = cv2.imencode(".jpg", frame)
+    if not ok:
+        return None
+    return msgpack.packb(
+        {"cam_id": msg["cam_id"], "timestamp": msg["timestamp"], "jpeg": jpeg.tobytes()}
+    )
+
+
+def record(args):
+    ctx = zmq.Context.instance()
+    rings = {}
+    poller = zmq.Poller()
+    sockets = {}
+
+    for kind, values in ((KIND_EVENT, args.event), (KIND_FRAME, args.frame)):
+        for cam_id, port in _parse_ports(values):
+            socket = ctx.socket(zmq.SUB)
+            socket.setsockopt(zmq.LINGER, 0)
+            socket.setsockopt(zmq.RCVHWM, 10000)
+            socket.connect(f"tcp://{args.host}:{port}")
+            socket.setsockopt_string(zmq.SUBSCRIBE, "")
+            poller.register(socket, zmq.POLLIN)
+            sockets[socket] = (kind, cam_id)
+
+    if not sockets:
+        raise SystemExit("--event 또는 --frame 이 필요함")
+
+    end = time.time() + args.duration if args.duration else None
+    with RecordWriter(args.output) as writer:
+        try:
+            while end is None or time.time() < end:
+                for socket, _ in poller.poll(200):
+                    kind, cam_id = sockets[socket]
+                    while True:
+                        try:
+                            frames = socket.recv_multipart(zmq.NOBLOCK)
+                        except zmq.Again:
+                            break
+                        payload = frames[-1]
+                        if kind == KIND_FRAME:
+                            payload = _inline_frame(payload, rings)
+                            if payload is None:
+                                continue
+                        writer.write(kind, cam_id, payload)
+                writer.flush()
+        except KeyboardInterrupt:
+            pass
+        print(f"{writer.count} records -> {args.output}")
+
+    for socket in sockets:
+        socket.close()
+    for ring in rings.values():
+        ring.close()
+
+
+def _percentiles(values, scale):
+    if not values:
+        return "-"
+    p50, p99 = np.percentile(values, [50, 99]) * scale
+    return f"p50 {p50:9.1f}  p99 {p99:9.1f}"
+
+
+def compare_golden(hits, golden, tolerance, time_tolerance=0.05):
+    """카메라별로 판정 시각이 같은 적중끼리 짝지어 좌표 차이 목록 반환
+
+    리플레이 시각은 가상 시계 기준이라 결정적이므로, 시각으로 맞추면
+    적중 하나가 빠지거나 늘어도 뒤쪽 비교가 밀리지 않는다.
+    """
+    diffs = []
+    cams = sorted({h["cam_id"] for h in hits} | {h["cam_id"] for h in golden})
+    for cam_id in cams:
+        got = [h for h in hits if h["cam_id"] == cam_id]
+        want = [h for h in golden if h["cam_id"] == cam_id]
+        i = j = 0
+        while i < len(got) or j < len(want):
+            if j >= len(want) or (
+                i < len(got) and got[i]["time"] < want[j]["time"] - time_tolerance
+            ):
+                diffs.append(f"{cam_id} @{got[i]['time']}s extra: {got[i]['tip']}")
+                i += 1
+            elif i >= len(got) or got[i]["time"] > want[j]["time"] + time_tolerance:
+                diffs.append(
+                    f"{cam_id} @{want[j]['time']}s missing: expected {want[j]['tip']}"
+                )
+                j += 1
+            else:
+                (gx, gy), (wx, wy) = got[i]["tip"], want[j]["tip"]
+                if abs(gx - wx) > tolerance or abs(gy - wy) > tolerance:
+                    diffs.append(
+                        f"{cam_id} @{want[j]['time']}s moved: "
+                        f"{want[j]['tip']} -> {got[i]['tip']}"
+                    )
+                i += 1
+                j += 1
+    return diffs
+
+
+def run(args):
+    replayer = Replayer(
+        buffer_size=args.buffer_size,
+        speed=args.speed,
+        frames=args.frames,
+        estimator=args.estimator,
+        streaming=args.streaming,
+    )
+    replayer.run(read_records(args.input))
+
+    wall = replayer.wall_sec or 1e-9
+    print(f"{'recorded span':>14} {replayer.span_sec:10.2f} s")
+    print(f"{'wall time':>14} {replayer.wall_sec:10.2f} s")
+    print(f"{'events':>14} {replayer.events:10d}  {replayer.events / wall:12.0f} /s")
+    hits = len(replayer.hits)
+    print(f"{'hits':>14} {hits:10d}  {hits / wall:12.2f} /s")
+    if args.streaming:
+        print(f"{'provisional':>14} {replayer.provisional:10d}")
+        print(f"{'retracted':>14} {replayer.retracted:10d}")
+        latency = _percentiles(replayer.provisional_latency, 1e3)
+        print(f"{'prov. lat. ms':>14} {latency}")
+    if replayer.decode_errors:
+        print(f"{'decode errors':>14} {replayer.decode_errors:10d}")
+    print(f"{'add_event us':>14} {_percentiles(replayer.event_sec, 1e6)}")
+    print(f"{'hit lat. ms':>14} {_percentiles(replayer.hit_latency, 1e3)}")
+
+    if args.write_golden:
+        with open(args.write_golden, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": GOLDEN_VERSION, "hits": replayer.hits}, f, indent=2
+            )
+        print(f"golden -> {args.write_golden}")
+
+    if args.golden:
+        with open(args.golden, encoding="utf-8") as f:
+            golden = json.load(f)["hits"]
+        diffs = compare_golden(replayer.hits, golden, args.tolerance)
+        for diff in diffs:
+            print(diff)
+        print(f"golden: {len(diffs)} difference(s)")
+        if diffs:
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="라이브 ZMQ 스트림 녹화")
+    rec.add_argument("-o", "--output", required=True)
+    rec.add_argument("--event", action="append", help="cam_id=추론 포트")
+    rec.add_argument("--frame", action="append", help="cam_id=프레임 포트")
+    rec.add_argument("--host", default="127.0.0.1")
+    rec.add_argument("--duration", type=float, default=0, help="초 (0이면 Ctrl-C까지)")
+    rec.set_defaults(func=record)
+
+    rep = commands.add_parser("run", help="녹화 파일 리플레이")
+    rep.add_argument("input")
+    rep.add_argument("--speed", type=float, default=0, help="재생 배속 (0이면 최대)")
+    rep.add_argument("--buffer-size", type=int, default=10)
+    rep.add_argument("--frames", action="store_true", help="녹화된 프레임도 디코딩")
+    rep.add_argument("--estimator", choices=sorted(ESTIMATORS), default=HIT_ESTIMATOR)
+    rep.add_argument("--streaming", action="store_true", help="잠정/확정 적중 모드")
+    rep.add_argument("--golden", help="비교할 골든 파일")
+    rep.add_argument("--write-golden", help="결과를 골든 파일로 저장")
+    rep.add_argument("--tolerance", type=float, default=1.0, help="좌표 허용 오차(px)")
+    rep.set_defaults(func=run)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""공유 인코더 벤치마크
+
+뷰어 수를 늘려가며 피어별 인코딩(기본 모드)과 공유 인코딩(SMARTBOW_SHARED_ENCODER)
+의 프레임당 CPU 시간을 비교한다.
+
+    python -m bench.shared_encoder --width 1280 --height 720 --frames 60
+"""
+
+import argparse, time
+import numpy as np
+from av import VideoFrame
+from aiortc.codecs.h264 import H264Encoder
+
+from services.webrtc.frame_hub import VIDEO_CLOCK_RATE, VIDEO_TIME_BASE
+from services.webrtc.shared_encoder import SharedEncoder
+
+
+class _Hub:
+    cam_id = "bench"
+    fps_limit = 20
+
+
+def make_frames(width, height, count):
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        image = np.roll(base, i * 4, axis=1)
+        frame = VideoFrame.from_ndarray(image, format="bgr24").reformat(
+            format="yuv420p"
+        )
+        frame.pts = i * VIDEO_CLOCK_RATE // _Hub.fps_limit
+        frame.time_base = VIDEO_TIME_BASE
+        frames.append(frame)
+    return frames
+
+
+def run_per_peer(frames, viewers):
+    encoders = [H264Encoder() for _ in range(viewers)]
+    start = time.process_time()
+    for frame in frames:
+        for encoder in encoders:
+            encoder.encode(frame)
+    return (time.process_time() - start) / len(frames)
+
+
+def run_shared(frames, viewers):
+    shared = SharedEncoder(_Hub())
+    packers = [H264Encoder() for _ in range(viewers)]
+    start = time.process_time()
+    for frame in frames:
+        for packet in shared.encode(frame):
+            for packer in packers:
+                packer.pack(packet)
+    return (time.process_time() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    frames = make_frames(args.width, args.height, args.frames)
+
+    print(f"{'viewers':>8} {'per-peer ms':>12} {'shared ms':>10}")
+    results = []
+    for viewers in args.viewers:
+        per_peer = run_per_peer(frames, viewers) * 1000
+        shared = run_shared(frames, viewers) * 1000
+        results.append((viewers, per_peer, shared))
+        print(f"{viewers:>8} {per_peer:>12.2f} {shared:>10.2f}")
+
+    if len(results) > 1:
+        (v0, p0, s0), (v1, p1, s1) = results[0], results[-1]
+        print(
+            f"추가 뷰어당 CPU: per-peer {(p1 - p0) / (v1 - v0):.2f} ms, "
+            f"shared {(s1 - s0) / (v1 - v0):.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
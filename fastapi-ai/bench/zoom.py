@@ -0,0 +1,48 @@
+"""사람 줌 파이프라인 벤치마크
+
+모드/보간법별 코어당 처리 가능한 프레임 수(frames/s)를 측정한다.
+full/lanczos 행이 기존 방식(원본 해상도 LANCZOS4 업스케일)이다.
+
+    python -m bench.zoom --width 1920 --height 1080 --seconds 2
+"""
+
+import argparse, time
+import cv2, numpy as np
+
+from services.webrtc.zoom import INTERPOLATIONS, ZoomPipeline
+
+
+def measure(pipeline, image, bbox, seconds):
+    frames = 0
+    start = time.process_time()
+    while time.process_time() - start < seconds:
+        pipeline.apply(image, bbox)
+        frames += 1
+    return frames / (time.process_time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)  # 코어당 처리량 측정
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    bbox = (args.width // 3, args.height // 3, args.width // 2, args.height // 2)
+
+    print(f"{'mode':>8} {'interpolation':>14} {'frames/s/core':>14}")
+    for mode in ("full", "reduced", "native"):
+        for name in INTERPOLATIONS if mode != "native" else ["-"]:
+            pipeline = ZoomPipeline(
+                mode=mode, interpolation=name if name != "-" else "linear"
+            )
+            fps = measure(pipeline, image, bbox, args.seconds)
+            print(f"{mode:>8} {name:>14} {fps:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,27 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from subscriber import start_subscriber_thread
-from config import ARROW_INFER_CONFIG, PERSON_INFER_CONFIG, ALLOW_ORIGINS, LOG_DIR
-from services.arrow.registry import arrow_registry
-from services.person.registry import person_registry
-from routers import webrtc, ws
+from subscriber import InferenceSubscriber
+from config import (
+    ARROW_INFER_CONFIG,
+    PERSON_INFER_CONFIG,
+    CAMERA_PORTS,
+    ALLOW_ORIGINS,
+    LOG_DIR,
+)
+from services.arrow.scheduler import hit_scheduler
+from services.arrow.debug_writer import debug_writer
+from services.arrow.service import HIT_PROVISIONAL
+from services.bus import worker_bus
+from services.cameras import camera_registry
+from services.hit_store import hit_store, hit_row
+from services.metrics import metrics, HIT_FIND, HIT_DELAY, HITS, EVENT_LAG
+from routers import webrtc, ws, hits, metrics as metrics_router
 from datetime import datetime
 
 
-import time, threading, asyncio
+import time, asyncio
+import numpy as np
 import logging.config, yaml
 import os
 
@@ -33,64 +45,157 @@ except Exception as e:
 
 logger = logging.getLogger("smartbow")
 
+inference_subscriber = InferenceSubscriber()
+
+metrics.collect(
+    "smartbow_subscriber_events_total",
+    "Inference events received per port",
+    lambda: [
+        ((str(port), result), getattr(s, field))
+        for port, s in inference_subscriber.stats.items()
+        for result, field in (
+            ("received", "received"),
+            ("decode_error", "decode_errors"),
+            ("callback_error", "callback_errors"),
+        )
+    ],
+    ("port", "result"),
+    kind="counter",
+)
+metrics.collect(
+    "smartbow_subscriber_batches_total",
+    "Socket drain batches per port (backlogged: batch limit reached)",
+    lambda: [
+        ((str(port), kind), getattr(s, field))
+        for port, s in inference_subscriber.stats.items()
+        for kind, field in (("all", "batches"), ("backlogged", "backlogged"))
+    ],
+    ("port", "kind"),
+    kind="counter",
+)
+metrics.collect(
+    "smartbow_subscriber_max_batch",
+    "Largest drain batch seen per port",
+    lambda: [
+        ((str(port),), s.max_batch) for port, s in inference_subscriber.stats.items()
+    ],
+    ("port",),
+)
+
+
+# 판정되지 않고 남은 궤적 정리 주기/기준
+SWEEP_INTERVAL_SEC = 10.0
+STALE_TRAJECTORY_SEC = 30.0
+
 
 def on_arrow_event(cam_id, event):
-    arrow_service = arrow_registry.get(cam_id)
+    arrow_service = camera_registry.arrow(cam_id)
     if arrow_service is None:
         logger.warning(f"화살 서비스를 찾을 수 없음 - 카메라 ID: {cam_id}")
         return
 
-    arrow_service.add_event(event)
+    target, frame_size = arrow_service.target, arrow_service.frame_size
+    if arrow_service.add_event(event):
+        # 중복 제거된 검출은 skew 관측이 없어 lag_ns가 갱신되지 않는다
+        EVENT_LAG.labels(cam_id).observe(arrow_service.skew.lag_ns / 1e9)
+    if arrow_service.target is not target or arrow_service.frame_size != frame_size:
+        share_target(cam_id, arrow_service)
+
+
+def share_target(cam_id, arrow_service):
+    """담당 워커의 타깃/프레임 크기를 다른 워커에 전달
+
+    다른 워커는 추론 포트를 구독하지 않으므로 WebSocket 폴리곤/좌표 변환에
+    필요한 값만 버스로 받는다. PUB/SUB 유실에 대비해 정리 주기마다 다시 보낸다.
+    """
+    if worker_bus.workers == 1 or arrow_service.frame_size is None:
+        return
+    target = arrow_service.target
+    worker_bus.send(
+        "target",
+        cam_id,
+        {
+            "target": target.tolist() if target is not None else None,
+            "target_version": arrow_service.target_version,
+            "frame_size": list(arrow_service.frame_size),
+        },
+    )
+
+
+async def on_remote_target(cam_id, payload):
+    camera = camera_registry.get(cam_id)
+    if camera is None or camera.owned:
+        return
+    arrow_service = camera.arrow
+    target = payload["target"]
+    if (
+        target is not None
+        and arrow_service.target is not None
+        and arrow_service.target_version == payload["target_version"]
+        and np.array_equal(arrow_service.target, target)
+    ):
+        target = None  # 주기적 재전송 - 바뀐 것 없음
+    arrow_service.set_target(
+        target, payload["target_version"], tuple(payload["frame_size"])
+    )
 
 
 def on_person_event(cam_id, event):
-    person_service = person_registry.get(cam_id)
+    person_service = camera_registry.person(cam_id)
     if person_service is None:
         logger.warning(f"사람 감지 서비스를 찾을 수 없음 - 카메라 ID: {cam_id}")
         return
 
-    person_service.set_zoom_area(event["bbox"])
+    person_service.set_zoom_area(event.bbox)
 
 
-def idle_watcher():
-    """화살 적중 감지 백그라운드 워커"""
-    logger.info("화살 적중 감지 스레드 시작")
+async def finalize_hit(cam_id):
+    """상태 전이 데드라인 도달 시 호출 (메인 루프)"""
+    arrow_service = camera_registry.arrow(cam_id)
+    if arrow_service is None:
+        return
+
+    now = time.monotonic_ns()
+    deadline = arrow_service.deadline_ns
+    result = arrow_service.advance(now)
+    if arrow_service.find_sec is not None:
+        HIT_FIND.labels(cam_id).observe(arrow_service.find_sec)
+    if result is None:
+        return
+    hit_type, hit = result
+
+    message = {"type": hit_type, "tip": hit}
+    if hit is not None:
+        message["confidence"] = round(arrow_service.last_estimate.confidence, 3)
+    # 모든 워커의 WebSocket 클라이언트에 전달
+    await worker_bus.publish("hit", cam_id, message)
+    HIT_DELAY.labels(cam_id).observe((time.monotonic_ns() - deadline) / 1e9)
+
+    if hit is None or hit_type == HIT_PROVISIONAL:
+        return  # 잠정 적중/철회는 기록하지 않는다
+    HITS.labels(cam_id).inc()
+    hit_store.submit(
+        hit_row(
+            cam_id,
+            hit,
+            arrow_service.last_trajectory,
+            arrow_service.frame_size,
+            arrow_service.target_version,
+            message["confidence"],
+        )
+    )
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
 
+async def sweep_cameras():
     while True:
+        await asyncio.sleep(SWEEP_INTERVAL_SEC)
         try:
-            for cam_id, arrow_service in list(arrow_registry.items()):
-                try:
-                    if arrow_service.is_idle():
-                        hit = arrow_service.find_hit_point()
-                        if hit is not None:
-
-                            arrow_service.last_hit_time = time.time()
-
-                            try:
-                                arrow_service.visualize_buffer(hit)
-                            except Exception as e:
-                                logger.error(
-                                    f"버퍼 시각화 실패 - 카메라: {cam_id}, 오류: {e}"
-                                )
-
-                            loop.run_until_complete(
-                                ws.broadcast(cam_id, {"type": "hit", "tip": hit})
-                            )
-
-                        arrow_service.clear_buffer()
-                except Exception as e:
-                    logger.error(
-                        f"화살 적중 처리 중 오류 발생 - 카메라: {cam_id}, 오류: {e}",
-                        exc_info=True,
-                    )
-
-            time.sleep(0.1)
+            camera_registry.sweep(STALE_TRAJECTORY_SEC)
+            for cam_id, camera in camera_registry.items():
+                if camera.owned:
+                    share_target(cam_id, camera.arrow)
         except Exception as e:
-            logger.critical(f"화살 감지 워커 오류: {e}", exc_info=True)
-            time.sleep(1)
+            logger.error(f"카메라 정리 실패: {e}", exc_info=True)
 
 
 @asynccontextmanager
@@ -99,6 +204,17 @@ async def lifespan(app: FastAPI):
     logger.info("SmartBow 서버 시작 중...")
     logger.info("=" * 60)
 
+    worker_bus.on("hit", ws.broadcast)
+    worker_bus.on("target", on_remote_target)
+    worker_bus.start()
+    logger.info(f"워커 {worker_bus.index + 1}/{worker_bus.workers} 시작")
+
+    hit_store.start()
+    logger.info(f"적중 기록 저장소: {hit_store.path}")
+
+    hit_scheduler.start(finalize_hit)
+    logger.info("적중 판정 스케줄러 시작 완료")
+
     logger.info(f"화살 추론 서비스 초기화 시작 (총 {len(ARROW_INFER_CONFIG)} 개)")
     for cam_key, config in ARROW_INFER_CONFIG.items():
         cam_id = config["id"]
@@ -106,7 +222,15 @@ async def lifespan(app: FastAPI):
 
         try:
             logger.info(f"  → 카메라 연결 시도: {cam_id} (포트: {port})")
-            start_subscriber_thread(port, cam_id, on_arrow_event)
+            # 고fps 카메라는 설정의 buffer_size로 궤적 버퍼를 늘릴 수 있다
+            camera = camera_registry.register(
+                cam_id, buffer_size=config.get("buffer_size", 10)
+            )
+            if not camera.owned:
+                # 다른 워커 담당 - 타깃/프레임 크기는 워커 버스로 받는다
+                logger.info(f"  - 다른 워커 담당 카메라: {cam_id}")
+                continue
+            inference_subscriber.add(port, cam_id, on_arrow_event)
             logger.info(f"  ✓ 카메라 연결 성공: {cam_id}")
         except Exception as e:
             logger.error(f"  ✗ 카메라 연결 실패: {cam_id} - {e}")
@@ -117,14 +241,25 @@ async def lifespan(app: FastAPI):
     #     port = config["infer_port"]
     #     try:
     #         logger.info(f"  → 카메라 연결 시도: {cam_id} (포트: {port})")
-    #         start_subscriber_thread(port, cam_id, on_person_event)
+    #         camera_registry.register(cam_id)
+    #         inference_subscriber.add(port, cam_id, on_person_event)
     #         logger.info(f"  ✓ 카메라 연결 성공: {cam_id}")
     #     except Exception as e:
     #         logger.error(f"  ✗ 카메라 연결 실패: {cam_id} - {e}")
 
-    t = threading.Thread(target=idle_watcher, daemon=True)
-    t.start()
-    logger.info("백그라운드 워커 시작 완료")
+    # 영상만 있는 카메라도 등록 (설정에 없는 cam_id는 어디서도 생성하지 않는다)
+    for cam_id in CAMERA_PORTS:
+        camera_registry.register(cam_id)
+    cam_ids = ", ".join(cam_id for cam_id, _ in camera_registry.items())
+    logger.info(f"카메라 등록 완료: {cam_ids}")
+
+    inference_subscriber.start()
+    logger.info("추론 이벤트 수신 시작 완료")
+
+    sweep_task = asyncio.create_task(sweep_cameras())
+
+    await webrtc.on_startup()
+    logger.info("프레임 구독 시작 완료")
 
     logger.info("=" * 60)
     logger.info("SmartBow 서버 시작 완료!")
@@ -132,6 +267,14 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    sweep_task.cancel()
+    await webrtc.on_shutdown()
+    await inference_subscriber.stop()
+    await hit_scheduler.stop()
+    debug_writer.stop()
+    hit_store.stop()
+    await worker_bus.stop()
+
     logger.info("=" * 60)
     logger.info("SmartBow 서버 종료 중...")
     logger.info("=" * 60)
@@ -152,6 +295,8 @@ app.add_middleware(
 )
 app.include_router(webrtc.router, prefix="/webrtc", tags=["webrtc"])
 app.include_router(ws.router, prefix="/ws", tags=["ws"])
+app.include_router(hits.router, tags=["hits"])
+app.include_router(metrics_router.router, tags=["metrics"])
 
 
 @app.get("/")
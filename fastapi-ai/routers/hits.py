@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Body, Query
+from fastapi.responses import JSONResponse
+
+from services.cameras import camera_registry
+from services.hit_store import hit_store
+
+import logging
+
+logger = logging.getLogger("smartbow.hits")
+
+router = APIRouter()
+
+MAX_PAGE = 500
+
+# SQLite 조회는 블로킹이므로 모두 동기 함수로 두어 스레드풀에서 실행한다
+
+
+@router.get("/hits/{cam_id}")
+def get_hits(
+    cam_id: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE),
+    cursor: str = None,
+    since: float = None,
+    until: float = None,
+):
+    """카메라 적중 기록 (최신순, cursor 페이지네이션)"""
+    try:
+        hits, next_cursor = hit_store.hits(cam_id, limit, cursor, since, until)
+    except ValueError as e:
+        return JSONResponse({"detail": str(e)}, status_code=400)
+    return {"cam_id": cam_id, "hits": hits, "next_cursor": next_cursor}
+
+
+@router.get("/sessions")
+def get_sessions(cam_id: str, limit: int = Query(50, ge=1, le=MAX_PAGE)):
+    return {"cam_id": cam_id, "sessions": hit_store.sessions(cam_id, limit)}
+
+
+@router.post("/sessions/{cam_id}")
+def start_session(cam_id: str, name: str = Body(None, embed=True)):
+    """카메라의 새 세션 시작 (열린 세션은 닫힌다), body: {"name": ...} 선택"""
+    if cam_id not in camera_registry:
+        return JSONResponse(
+            {"detail": f"Unknown camera id: {cam_id}"}, status_code=404
+        )
+
+    session = hit_store.start_session(cam_id, name)
+    logger.info(f"세션 시작 - 카메라: {cam_id}, 세션: {session['id']}")
+    return session
+
+
+@router.post("/sessions/{session_id}/end")
+def end_session(session_id: str):
+    session = hit_store.end_session(session_id)
+    if session is None:
+        return JSONResponse(
+            {"detail": f"Unknown session id: {session_id}"}, status_code=404
+        )
+    return session
+
+
+@router.get("/sessions/{session_id}/hits")
+def get_session_hits(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE),
+    cursor: str = None,
+):
+    """세션 구간의 적중 기록 - 세션은 (cam_id, 시작~종료 시각) 구간이다"""
+    session = hit_store.session(session_id)
+    if session is None:
+        return JSONResponse(
+            {"detail": f"Unknown session id: {session_id}"}, status_code=404
+        )
+
+    try:
+        hits, next_cursor = hit_store.hits(
+            session["cam_id"],
+            limit,
+            cursor,
+            since=session["started_at"],
+            until=session["ended_at"],
+        )
+    except ValueError as e:
+        return JSONResponse({"detail": str(e)}, status_code=400)
+    return {"session": session, "hits": hits, "next_cursor": next_cursor}
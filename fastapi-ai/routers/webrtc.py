@@ -1,26 +1,151 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
-from aiortc import RTCPeerConnection, RTCSessionDescription
+from aiortc import RTCPeerConnection, RTCRtpSender, RTCSessionDescription
+from aiortc.rtp import (
+    RTCP_PSFB_APP,
+    RTCP_PSFB_FIR,
+    RTCP_PSFB_PLI,
+    RtcpPsfbPacket,
+    unpack_remb_fci,
+)
 
-from services.webrtc.frame_subscriber import camera_frame_sub
+from services.webrtc.registry import frame_hub_registry
 from services.webrtc.video_track import CameraVideoTrack
-from services.arrow.registry import arrow_registry
-from services.person.registry import person_registry
+from services.webrtc.shared_encoder import EncodedVideoTrack
+from services.webrtc.tiers import TierSelector
+from services.metrics import metrics
 
 from config import CAMERA_PORTS
-import asyncio, logging
+import aiortc, asyncio, inspect, logging, os, time
 
 logger = logging.getLogger("smartbow.webrtc")
 
+# 카메라당 인코더 하나를 모든 피어가 공유 (H.264 고정)
+SHARED_ENCODER = os.getenv("SMARTBOW_SHARED_ENCODER", "0") == "1"
+
 router = APIRouter()
 pcs = set()
-subscribers = {}
+
+metrics.collect(
+    "smartbow_peer_connections", "Active WebRTC peers", lambda: [((), len(pcs))]
+)
+metrics.collect(
+    "smartbow_video_tracks",
+    "Video tracks attached per camera",
+    lambda: [
+        ((cam_id,), len(hub.tracks)) for cam_id, hub in frame_hub_registry.items()
+    ],
+    ("cam_id",),
+)
+metrics.collect(
+    "smartbow_camera_fps",
+    "Decoded frames per second per camera",
+    lambda: [
+        ((cam_id,), round(hub.fps, 2)) for cam_id, hub in frame_hub_registry.items()
+    ],
+    ("cam_id",),
+)
+
+
+def _prefer_h264(pc):
+    codecs = [
+        c
+        for c in RTCRtpSender.getCapabilities("video").codecs
+        if c.mimeType == "video/H264"
+    ]
+    for transceiver in pc.getTransceivers():
+        if transceiver.kind == "video":
+            transceiver.setCodecPreferences(codecs)
+
+
+def _rtcp_hook_supported():
+    # RTCRtpSender._handle_rtcp_packet은 aiortc 내부 메서드 - 검증한 1.x에서만 감싼다
+    major = int(aiortc.__version__.split(".")[0])
+    handler = getattr(RTCRtpSender, "_handle_rtcp_packet", None)
+    return major == 1 and inspect.iscoroutinefunction(handler)
+
+
+RTCP_HOOK = _rtcp_hook_supported()
+if not RTCP_HOOK:
+    logger.warning(
+        f"aiortc {aiortc.__version__}: RTCP 훅 미지원 - "
+        "REMB 티어 조정과 공유 인코더 키프레임 요청 전달이 꺼집니다"
+    )
+
+
+def _watch_rtcp(sender, selector, track=None):
+    """송신자의 RTCP 처리에 끼어드는 유일한 훅
+
+    원래 처리(NACK 재전송, RTT 등)를 먼저 한 뒤
+    - REMB: 추정치와 그 사이 실제 송신률을 티어 선택기에 전달 (별도 태스크)
+    - PLI/FIR: track이 있으면(공유 인코더 - 송신자가 사전 인코딩 패킷이라
+      무시한다) 키프레임 요청을 전달
+    """
+    if not RTCP_HOOK:
+        return
+    handle_rtcp = sender._handle_rtcp_packet
+    last_time, last_sent = None, 0
+    report_task = None
+
+    async def _handle_rtcp_packet(packet):
+        await handle_rtcp(packet)
+        if not isinstance(packet, RtcpPsfbPacket):
+            return
+        if packet.fmt == RTCP_PSFB_APP:
+            _on_remb(packet)
+        elif track is not None and packet.fmt in (RTCP_PSFB_FIR, RTCP_PSFB_PLI):
+            track.request_keyframe()
+
+    def _on_remb(packet):
+        nonlocal report_task
+        try:
+            bitrate, ssrcs = unpack_remb_fci(packet.fci)
+        except ValueError:
+            return
+        # getStats 대기나 예외가 RTCP 처리/전송 계층에 번지지 않도록 별도 태스크로,
+        # 이전 보고가 아직 getStats를 기다리는 중이면 이번 추정치는 건너뛴다
+        if sender._ssrc in ssrcs and (report_task is None or report_task.done()):
+            report_task = asyncio.create_task(_report(bitrate))
+
+    async def _report(bitrate):
+        nonlocal last_time, last_sent
+        try:
+            stats = await sender.getStats()
+            sent = sum(
+                s.bytesSent for s in stats.values() if s.type == "outbound-rtp"
+            )
+            now = time.monotonic()
+
+            send_rate = None
+            if last_time is not None and now > last_time:
+                send_rate = (sent - last_sent) * 8 / (now - last_time)
+            last_time, last_sent = now, sent
+            selector.update_bitrate(bitrate, send_rate)
+        except Exception as e:
+            logger.warning(f"REMB 처리 실패: {e}")
+
+    sender._handle_rtcp_packet = _handle_rtcp_packet
+
+
+def _parse_video_size(params):
+    # 선택 필드: 클라이언트 <video> 렌더 크기 (device pixel 기준)
+    video_size = params.get("video_size")
+    if not video_size:
+        return None
+    try:
+        width, height = int(video_size["width"]), int(video_size["height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    return (width, height)
 
 
 @router.post("/offer/{cam_id}")
 async def offer(cam_id: str, request: Request):
     try:
-        if cam_id not in CAMERA_PORTS:
+        hub = frame_hub_registry.get(cam_id)
+        if cam_id not in CAMERA_PORTS or hub is None:
             logger.warning(f"알 수 없는 카메라 ID 요청: {cam_id}")
             return JSONResponse(
                 {"detail": f"Unknown camera id: {cam_id}"}, status_code=404
@@ -29,6 +154,7 @@ async def offer(cam_id: str, request: Request):
         try:
             params = await request.json()
             offer = RTCSessionDescription(sdp=params["sdp"], type=params["type"])
+            video_size = _parse_video_size(params)
         except KeyError as e:
             logger.error(f"잘못된 요청 형식 - 카메라: {cam_id}, 누락된 필드: {e}")
             return JSONResponse(
@@ -41,9 +167,11 @@ async def offer(cam_id: str, request: Request):
         pc = RTCPeerConnection()
         pcs.add(pc)
 
-        arrow_service = arrow_registry.get(cam_id)
-        person_service = person_registry.get(cam_id)
-        video_track = CameraVideoTrack(arrow_service, person_service)
+        selector = TierSelector(render_size=video_size)
+        if SHARED_ENCODER:
+            video_track = EncodedVideoTrack(hub, selector)
+        else:
+            video_track = CameraVideoTrack(hub, selector)
 
         @pc.on("connectionstatechange")
         async def on_connectionstatechange():
@@ -52,28 +180,20 @@ async def offer(cam_id: str, request: Request):
 
             if state in ["failed", "closed"]:
                 pcs.discard(pc)
+                video_track.stop()
                 logger.info(
                     f"PeerConnection 제거 - 카메라: {cam_id} (남은 연결: {len(pcs)}개)"
                 )
 
-                if (
-                    cam_id in subscribers
-                    and video_track in subscribers[cam_id]["tracks"]
-                ):
-                    subscribers[cam_id]["tracks"].discard(video_track)
-                    logger.info(
-                        f"[{cam_id}] 트랙 제거, 남은 트랙: {len(subscribers[cam_id]['tracks'])}"
-                    )
-
-                    if not subscribers[cam_id]["tracks"]:
-                        try:
-                            subscribers[cam_id]["task"].cancel()
-                            del subscribers[cam_id]
-                            logger.info(f"구독자 작업 취소 완료 - 카메라: {cam_id}")
-                        except Exception as e:
-                            logger.error(
-                                f"구독자 정리 실패 - 카메라: {cam_id}, 오류: {e}"
-                            )
+                if video_track in hub.tracks:
+                    hub.tracks.discard(video_track)
+                    logger.info(f"[{cam_id}] 트랙 제거, 남은 트랙: {len(hub.tracks)}")
+
+                    if not hub.tracks:
+                        # 프레임 수신/히스토리는 유지하고 렌더링/인코딩만 멈춘다
+                        hub.close()
+                        frame_hub_registry.release(cam_id)
+                        logger.info(f"프레임 발행 중지 - 카메라: {cam_id}")
 
         @pc.on("iceconnectionstatechange")
         async def on_iceconnectionstatechange():
@@ -82,29 +202,18 @@ async def offer(cam_id: str, request: Request):
             )
 
         try:
-            pc.addTrack(video_track)
+            sender = pc.addTrack(video_track)
+            _watch_rtcp(sender, selector, video_track if SHARED_ENCODER else None)
+            if SHARED_ENCODER:
+                _prefer_h264(pc)
             logger.debug(f"비디오 트랙 추가 완료 - 카메라: {cam_id}")
         except Exception as e:
             logger.error(f"트랙 추가 실패 - 카메라: {cam_id}, 오류: {e}")
             raise
 
-        port = CAMERA_PORTS[cam_id]
-
-        if cam_id not in subscribers:
-            tracks = {video_track}
-            try:
-                task = asyncio.create_task(camera_frame_sub(tracks, [port]))
-                subscribers[cam_id] = {"task": task, "tracks": tracks}
-                logger.info(f"새 구독자 생성 - 카메라: {cam_id}, 포트: {port}")
-            except Exception as e:
-                logger.error(f"구독자 생성 실패 - 카메라: {cam_id}, 오류: {e}")
-                pcs.discard(pc)
-                raise
-        else:
-            subscribers[cam_id]["tracks"].add(video_track)
-            logger.info(
-                f"구독자에 트랙 추가 완료 - 카메라: {cam_id}, 총 트랙: {len(subscribers[cam_id]['tracks'])}"
-            )
+        hub.tracks.add(video_track)
+        frame_hub_registry.acquire(cam_id)
+        logger.info(f"트랙 추가 완료 - 카메라: {cam_id}, 총 트랙: {len(hub.tracks)}")
 
         try:
             await pc.setRemoteDescription(offer)
@@ -116,8 +225,8 @@ async def offer(cam_id: str, request: Request):
                 f"WebRTC 협상 실패 - 카메라: {cam_id}, 오류: {e}", exc_info=True
             )
             pcs.discard(pc)
-            if cam_id in subscribers and video_track in subscribers[cam_id]["tracks"]:
-                subscribers[cam_id]["tracks"].discard(video_track)
+            hub.tracks.discard(video_track)
+            video_track.stop()
             raise
         return {
             "sdp": pc.localDescription.sdp,
@@ -130,24 +239,23 @@ async def offer(cam_id: str, request: Request):
         return JSONResponse({"detail": "Internal server error"}, status_code=500)
 
 
-@router.on_event("shutdown")
+async def on_startup():
+    """앱 시작 시 카메라별 상시 프레임 구독 시작 (main.lifespan에서 호출)"""
+    frame_hub_registry.start(CAMERA_PORTS)
+
+
 async def on_shutdown():
-    """앱 종료 시 정리"""
+    """앱 종료 시 정리 (main.lifespan에서 호출)"""
     logger.info("=" * 60)
     logger.info("WebRTC 서비스 종료 시작")
     logger.info("=" * 60)
 
-    if subscribers:
-        logger.info(f"구독자 정리 중... (총 {len(subscribers)}개)")
-        for cam_id, sub_info in list(subscribers.items()):
-            try:
-                sub_info["task"].cancel()
-                logger.info(f"  ✓ 구독자 취소 완료 - 카메라: {cam_id}")
-            except Exception as e:
-                logger.error(f"  ✗ 구독자 취소 실패 - 카메라: {cam_id}, 오류: {e}")
-        subscribers.clear()
-    else:
-        logger.info("정리할 구독자 없음")
+    logger.info("프레임 구독 정리 중...")
+    try:
+        await frame_hub_registry.stop()
+        logger.info("  ✓ 프레임 구독 정리 완료")
+    except Exception as e:
+        logger.error(f"  ✗ 프레임 구독 정리 실패: {e}")
 
     if pcs:
         logger.info(f"PeerConnection 종료 중... (총 {len(pcs)}개)")
@@ -1,63 +1,149 @@
 from fastapi import APIRouter, WebSocket
 from starlette.websockets import WebSocketDisconnect
-from services.arrow.registry import arrow_registry
+from services.cameras import camera_registry
+from services.arrow.service import HIT, HIT_PROVISIONAL, HIT_FINAL
+from services.metrics import metrics, BROADCAST, WS_EVICTIONS
 
-import logging
+import asyncio, logging, time, orjson
 
 logger = logging.getLogger("smartbow.ws")
 
 router = APIRouter()
 
-connected_clients: dict[str, dict[WebSocket, dict]] = {}
+# 느린 클라이언트 퇴출 기준
+MAX_PENDING = 16
+MAX_SEND_SEC = 5.0
+
+
+class ClientConnection:
+    """WebSocket 클라이언트별 송신 큐와 전용 writer 작업"""
+
+    def __init__(self, ws: WebSocket, cam_id: str, max_pending=MAX_PENDING):
+        self.ws = ws
+        self.cam_id = cam_id
+        self.video_size = None
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.send_started = None  # 현재 전송이 시작된 시각 (monotonic)
+        self.task = asyncio.create_task(self._writer())
+
+    def offer(self, text: str) -> bool:
+        """전송 큐에 추가, 큐가 꽉 찼거나 전송이 멈춘 클라이언트면 False"""
+        if self.send_started is not None:
+            if time.monotonic() - self.send_started > MAX_SEND_SEC:
+                return False
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _writer(self):
+        while True:
+            text = await self.queue.get()
+            self.send_started = time.monotonic()
+            try:
+                await self.ws.send_text(text)
+            except Exception as e:
+                logger.error(f"클라이언트 전송 실패 - 카메라: {self.cam_id}, 오류: {e}")
+                evict(self.cam_id, self.ws)
+                return
+            finally:
+                self.send_started = None
 
+    def close(self):
+        self.task.cancel()
 
-async def broadcast(cam_id: str, event: dict):
+
+connected_clients: dict[str, dict[WebSocket, ClientConnection]] = {}
+
+metrics.collect(
+    "smartbow_websockets",
+    "Connected hit WebSocket clients",
+    lambda: [
+        ((cam_id,), len(clients)) for cam_id, clients in connected_clients.items()
+    ],
+    ("cam_id",),
+)
+
+
+def evict(cam_id: str, ws: WebSocket, reason: str = None):
+    clients = connected_clients.get(cam_id)
+    if not clients or ws not in clients:
+        return
+
+    conn = clients.pop(ws)
+    if reason:
+        WS_EVICTIONS.labels(cam_id).inc()
+        logger.warning(f"느린 클라이언트 퇴출 - 카메라: {cam_id}, 사유: {reason}")
+        asyncio.create_task(_close_quietly(ws))
+    conn.close()
+
+
+async def _close_quietly(ws: WebSocket):
     try:
+        await ws.close(code=1013)
+    except Exception:
+        pass
 
-        clients = connected_clients.get(cam_id, {})
-        if not clients:
-            return
 
-        if event.get("type") != "hit":
+async def broadcast(cam_id: str, event: dict):
+    try:
+
+        hit_type = event.get("type")
+        if hit_type not in (HIT, HIT_PROVISIONAL, HIT_FINAL):
             return
 
-        arrow_service = arrow_registry.get(cam_id)
+        arrow_service = camera_registry.arrow(cam_id)
 
         if not arrow_service:
             logger.warning(f"브로드캐스트 실패: ArrowService 없음 - 카메라: {cam_id}")
             return
-        raw_x, raw_y = event["tip"]
 
-        disconnected = []
+        tip = event["tip"]
+        if tip is not None and hit_type != HIT_PROVISIONAL:
+            # 접속 중인 클라이언트가 없어도 늦게 들어올 클라이언트를 위해 기록
+            arrow_service.snapshot.add_hit(tip, event.get("confidence"))
 
-        for ws, info in list(clients.items()):
-            video_size = info.get("video_size")
-
-            if video_size is None:
-                continue
-
-            render_tip = arrow_service.to_render_coords(raw_x, raw_y, video_size)
-
-            payload = {"type": "hit", "tip": render_tip}
+        clients = connected_clients.get(cam_id, {})
+        if not clients:
+            return
 
-            try:
-                await ws.send_json(payload)
-            except Exception:
-                logger.error(f"클라이언트 전송 실패 - 카메라: {cam_id}, 오류: {e}")
-                disconnected.append(ws)
+        started = time.perf_counter()
 
-        for ws in disconnected:
-            if ws in clients:
-                del clients[ws]
+        # 같은 video_size 클라이언트끼리 묶어 좌표 변환/직렬화를 한 번만 수행
+        groups: dict[tuple, list[ClientConnection]] = {}
+        for conn in clients.values():
+            if conn.video_size is None:
+                continue
+            groups.setdefault(conn.video_size, []).append(conn)
+
+        for video_size, conns in groups.items():
+            render_tip = None
+            if tip is not None:
+                # hit_final의 tip이 None이면 잠정 적중 철회
+                render_tip = arrow_service.to_render_coords(tip[0], tip[1], video_size)
+            payload = orjson.dumps(
+                {
+                    "type": hit_type,
+                    "tip": render_tip,
+                    "confidence": event.get("confidence"),
+                }
+            ).decode()
+
+            for conn in conns:
+                if not conn.offer(payload):
+                    evict(cam_id, conn.ws, reason="송신 큐 포화/전송 지연")
+
+        BROADCAST.labels(cam_id).observe(time.perf_counter() - started)
 
     except Exception as e:
         logger.error(f"브로드캐스트 오류 - 카메라: {cam_id}, 오류: {e}", exc_info=True)
 
 
-async def send_polygon(ws: WebSocket, cam_id: str, video_size=None):
+async def send_polygon(conn: ClientConnection, cam_id: str, video_size=None):
     try:
 
-        arrow_service = arrow_registry.get(cam_id)
+        arrow_service = camera_registry.arrow(cam_id)
         if arrow_service is None:
             logger.warning(f"폴리곤 전송 실패: ArrowService 없음 - 카메라: {cam_id}")
             return
@@ -68,23 +154,32 @@ async def send_polygon(ws: WebSocket, cam_id: str, video_size=None):
             logger.debug(f"폴리곤 없음 - 카메라: {cam_id}")
             return
 
-        await ws.send_json(
-            {
-                "type": "polygon",
-                "points": render_polygon,
-            }
-        )
+        payload = orjson.dumps({"type": "polygon", "points": render_polygon}).decode()
+        if not conn.offer(payload):
+            evict(cam_id, conn.ws, reason="송신 큐 포화/전송 지연")
     except Exception as e:
         logger.error(f"폴리곤 전송 실패 - 카메라: {cam_id}, 오류: {e}", exc_info=True)
 
 
 @router.websocket("/hit/{cam_id}")
 async def hit_ws(ws: WebSocket, cam_id: str):
+    if cam_id not in camera_registry:
+        # 등록되지 않은 카메라는 서비스를 만들지 않고 핸드셰이크를 거절한다
+        logger.warning(f"알 수 없는 카메라 WebSocket 요청: {cam_id}")
+        await ws.close(code=1008)
+        return
+
     await ws.accept()
 
+    conn = ClientConnection(ws, cam_id)
     if cam_id not in connected_clients:
         connected_clients[cam_id] = {}
-    connected_clients[cam_id][ws] = {"video_size": None}
+    connected_clients[cam_id][ws] = conn
+
+    # 캐시된 상태 스냅샷(정규화 폴리곤, 최근 적중, 판정 상태)을 한 번에 전송
+    arrow_service = camera_registry.arrow(cam_id)
+    if arrow_service is not None:
+        conn.offer(arrow_service.snapshot.payload())
 
     logger.info(
         f"WebSocket 연결 - 카메라: {cam_id} (총 {len(connected_clients[cam_id])}개)"
@@ -98,17 +193,16 @@ async def hit_ws(ws: WebSocket, cam_id: str):
                 width = msg["width"]
                 height = msg["height"]
 
-                if ws in connected_clients[cam_id]:
-                    connected_clients[cam_id][ws]["video_size"] = (width, height)
+                conn.video_size = (width, height)
 
-                await send_polygon(ws, cam_id, (width, height))
+                await send_polygon(conn, cam_id, (width, height))
                 continue
 
     except WebSocketDisconnect:
-        if cam_id in connected_clients and ws in connected_clients[cam_id]:
-            del connected_clients[cam_id][ws]
+        pass
 
     except Exception as e:
         logger.error(f"WebSocket 오류 - 카메라: {cam_id}, 오류: {e}", exc_info=True)
-        if cam_id in connected_clients and ws in connected_clients[cam_id]:
-            del connected_clients[cam_id][ws]
+
+    finally:
+        evict(cam_id, ws)
@@ -0,0 +1,84 @@
+import numpy as np
+
+TRACK_DTYPE = np.dtype(
+    [
+        ("x", "f8"),
+        ("y", "f8"),
+        ("t", "f8"),
+        ("x1", "i4"),
+        ("y1", "i4"),
+        ("x2", "i4"),
+        ("y2", "i4"),
+        ("conf", "f4"),
+    ]
+)
+
+
+class TrackingBuffer:
+    """화살 궤적 링 버퍼
+
+    NumPy 구조화 배열 + head/len 인덱스로 이벤트를 보관하고,
+    디버그용 화살 crop은 별도 슬롯 풀에 둔다.
+    """
+
+    def __init__(self, capacity=10):
+        if capacity < 2:
+            raise ValueError("capacity must be >= 2")
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=TRACK_DTYPE)
+        self._crops = [None] * capacity
+        self._head = 0  # 가장 오래된 항목 위치
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def append(self, x, y, t, x1, y1, x2, y2, conf, crop=None):
+        idx = self._head + self._len
+        if idx >= self.capacity:
+            idx -= self.capacity
+
+        if self._len == self.capacity:
+            # 가득 찬 경우 가장 오래된 항목을 덮어쓴다
+            self._head = (self._head + 1) % self.capacity
+        else:
+            self._len += 1
+
+        self._data[idx] = (x, y, t, x1, y1, x2, y2, conf)
+        self._crops[idx] = crop
+
+    def last(self):
+        """가장 최근 항목 (구조화 배열 레코드), 비어 있으면 None"""
+        if not self._len:
+            return None
+        return self._data[(self._head + self._len - 1) % self.capacity]
+
+    def view(self):
+        """시간순 구조화 배열 - 랩어라운드가 없으면 복사 없는 뷰"""
+        end = self._head + self._len
+        if end <= self.capacity:
+            return self._data[self._head : end]
+        return np.concatenate(
+            (self._data[self._head :], self._data[: end - self.capacity])
+        )
+
+    def crops(self):
+        """시간순 crop 리스트 (없는 항목은 None)"""
+        end = self._head + self._len
+        if end <= self.capacity:
+            return self._crops[self._head : end]
+        return self._crops[self._head :] + self._crops[: end - self.capacity]
+
+    def tips(self):
+        """시간순 (N, 2) 팁 좌표 배열"""
+        data = self.view()
+        return np.column_stack((data["x"], data["y"]))
+
+    def clear(self):
+        self._head = 0
+        self._len = 0
+        for i in range(self.capacity):
+            self._crops[i] = None
@@ -0,0 +1,53 @@
+NS = 1_000_000_000
+
+
+class SkewEstimator:
+    """생산자 타임스탬프(벽시계 초) ↔ 로컬 monotonic_ns 오프셋 추정
+
+    표본 (수신 monotonic - 생산자 시각) 중 최솟값을 전송 지연이 가장 작은
+    기준으로 삼고, 현재 표본이 그보다 큰 만큼을 큐잉 지연(lag)으로 본다.
+    최솟값은 두 개의 window로 교대로 유지해 클럭 드리프트/NTP 보정을
+    window 두 개 안에 따라간다. 관측당 O(1), 할당 없음.
+    """
+
+    def __init__(self, window_sec=10.0, max_lag_sec=0.5):
+        self.window_ns = int(window_sec * NS)
+        self.max_lag_ns = int(max_lag_sec * NS)
+        self.offset_ns = None
+        self.lag_ns = 0
+        self._current_min = None
+        self._previous_min = None
+        self._window_start = None
+
+    def observe(self, producer_ts, local_ns):
+        """표본을 반영하고 생산자 시각에 해당하는 로컬 시각(ns)을 반환
+
+        lag는 max_lag로 제한한다 - 생산자 시계가 뒤로 밀려도 판정 시각이
+        과거로 크게 당겨지지 않도록.
+        """
+        if not producer_ts:
+            self.lag_ns = 0
+            return local_ns
+
+        sample = local_ns - int(producer_ts * NS)
+
+        start = self._window_start
+        if start is None or local_ns - start >= self.window_ns:
+            self._previous_min = self._current_min
+            self._current_min = sample
+            self._window_start = local_ns
+        elif sample < self._current_min:
+            self._current_min = sample
+
+        offset = self._current_min
+        if self._previous_min is not None and self._previous_min < offset:
+            offset = self._previous_min
+        self.offset_ns = offset
+
+        self.lag_ns = min(sample - offset, self.max_lag_ns)
+        return local_ns - self.lag_ns
+
+    def to_local(self, producer_ts):
+        if self.offset_ns is None:
+            return None
+        return int(producer_ts * NS) + self.offset_ns
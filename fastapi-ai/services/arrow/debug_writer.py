@@ -0,0 +1,215 @@
+import cv2, datetime, os, threading, logging
+from collections import deque
+from config import BASE_DIR
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DebugJob:
+    __slots__ = (
+        "cam_id",
+        "frame",
+        "rows",
+        "crops",
+        "hit_point",
+        "scale",
+        "created_at",
+    )
+
+    def __init__(self, cam_id, frame, rows, crops, hit_point, scale=1.0):
+        self.cam_id = cam_id
+        self.frame = frame  # 발행된 프레임은 수정되지 않으므로 참조만 보관
+        self.rows = rows
+        self.crops = crops
+        self.hit_point = hit_point
+        self.scale = scale  # 축소 디코딩 배율
+        self.created_at = datetime.datetime.now()
+
+
+def render_debug_frame(frame, rows, crops, hit_point, scale=1.0):
+    if scale == 1.0:
+        vis_frame = frame.copy()
+    else:
+        # 축소 디코딩된 프레임은 원본 크기로 키워 원본 좌표 그대로 그린다
+        h, w = frame.shape[:2]
+        size = (round(w / scale), round(h / scale))
+        vis_frame = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+
+    for i, (row, arrow_crop) in enumerate(zip(rows, crops)):
+        x, y, t, x1, y1, x2, y2, confidence = row
+
+        if arrow_crop is not None:
+            if scale != 1.0 and x2 > x1 and y2 > y1 and arrow_crop.size:
+                arrow_crop = cv2.resize(arrow_crop, (x2 - x1, y2 - y1))
+            h, w = arrow_crop.shape[:2]
+            try:
+                vis_frame[y1 : y1 + h, x1 : x1 + w] = arrow_crop
+            except:
+                pass
+
+        # bbox 색상
+        alpha = (i + 1) / len(rows)
+        color = (0, int(255 * alpha), int(255 * (1 - alpha)))
+
+        # bbox 테두리
+        cv2.rectangle(vis_frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(
+            vis_frame,
+            str(i),
+            (x1, y1 - 5),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            color,
+            2,
+        )
+
+        cv2.putText(
+            vis_frame,
+            f"{confidence:.2f}",
+            (x1, y2 + 15),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (255, 255, 0),
+            2,
+        )
+        cv2.circle(vis_frame, (int(x), int(y)), 4, color, -1)
+
+    if hit_point is not None:
+        hit_x, hit_y = int(hit_point[0]), int(hit_point[1])
+        cv2.circle(vis_frame, (hit_x, hit_y), 15, (0, 0, 255), 3)
+        cv2.circle(vis_frame, (hit_x, hit_y), 5, (0, 0, 255), -1)
+        cv2.putText(
+            vis_frame,
+            "HIT",
+            (hit_x + 20, hit_y),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1.0,
+            (0, 0, 255),
+            3,
+        )
+        cv2.putText(
+            vis_frame,
+            f"({hit_x}, {hit_y})",
+            (hit_x + 20, hit_y + 25),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (0, 0, 255),
+            2,
+        )
+
+    return vis_frame
+
+
+class DebugWriter:
+    """적중 디버그 이미지 백그라운드 저장기
+
+    제한된 큐(가득 차면 가장 오래된 작업 폐기)를 워커 스레드가 비우며
+    렌더링/JPEG 인코딩/디스크 쓰기를 수행한다. 적중 브로드캐스트는 기다리지 않는다.
+    """
+
+    def __init__(self, base_dir, max_pending=8, workers=1, jpeg_quality=95):
+        self.base_dir = base_dir
+        self.max_pending = max_pending
+        self.workers = workers
+        self.jpeg_quality = jpeg_quality
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = False
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self.workers):
+            t = threading.Thread(
+                target=self._worker, name=f"debug-writer-{i}", daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._threads.clear()
+
+    def submit(self, job):
+        if not self._running:
+            self.start()
+
+        with self._cond:
+            if len(self._queue) >= self.max_pending:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(job)
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                job = self._queue.popleft()
+
+            try:
+                self._write(job)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"디버그 이미지 저장 실패 - 카메라: {job.cam_id}, 오류: {e}")
+
+    def _write(self, job):
+        vis_frame = render_debug_frame(
+            job.frame, job.rows, job.crops, job.hit_point, job.scale
+        )
+
+        ok, encoded = cv2.imencode(
+            ".jpg", vis_frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        )
+        if not ok:
+            raise RuntimeError("JPEG 인코딩 실패")
+
+        save_dir = os.path.join(self.base_dir, job.created_at.strftime("%Y-%m-%d"))
+        os.makedirs(save_dir, exist_ok=True)
+
+        # 같은 초에 여러 적중이 나와도 덮어쓰지 않도록 접미사를 붙인다
+        stem = f"{job.created_at.strftime('%H-%M-%S')}_{job.cam_id}"
+        suffix = 0
+        while True:
+            name = f"{stem}.jpg" if suffix == 0 else f"{stem}_{suffix}.jpg"
+            try:
+                with open(os.path.join(save_dir, name), "xb") as f:
+                    f.write(encoded.tobytes())
+                return
+            except FileExistsError:
+                suffix += 1
+
+
+debug_writer = DebugWriter(
+    BASE_DIR,
+    max_pending=int(os.getenv("SMARTBOW_DEBUG_MAX_PENDING", "8")),
+    workers=int(os.getenv("SMARTBOW_DEBUG_WORKERS", "1")),
+    jpeg_quality=int(os.getenv("SMARTBOW_DEBUG_JPEG_QUALITY", "95")),
+)
+
+metrics.collect(
+    "smartbow_debug_images_total",
+    "Hit debug images by result",
+    lambda: [
+        (("written",), debug_writer.written),
+        (("dropped",), debug_writer.dropped),
+        (("failed",), debug_writer.failed),
+    ],
+    ("result",),
+    kind="counter",
+)
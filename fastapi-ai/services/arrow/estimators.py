@@ -0,0 +1,307 @@
+import itertools, os, numpy as np
+
+# 오탐 정지 물체 필터링 기준 (궤적 세로 이동 px)
+MIN_TRAVEL_PX = 25
+# 경계 밖 적중점을 무게중심 쪽으로 당기는 거리 (px)
+PULL_PX = 35
+
+
+class HitEstimate:
+    __slots__ = ("tip", "confidence", "impact_index")
+
+    def __init__(self, tip, confidence, impact_index):
+        self.tip = tip  # [x, y] 원본 프레임 좌표
+        self.confidence = confidence  # 0~1
+        self.impact_index = impact_index  # 궤적에서 충돌로 본 샘플 위치
+
+    def __repr__(self):
+        return f"HitEstimate({self.tip}, conf={self.confidence:.2f})"
+
+
+class HitEstimator:
+    """적중점 추정기 인터페이스
+
+    estimate(rows, geometry, stationary): TrackingBuffer.view() (시간순 구조화
+    배열)와 TargetGeometry(없으면 None)를 받아 HitEstimate 또는 None을 반환한다.
+    settle_sec가 있으면 stopped(rows, stationary)가 True일 때 idle_sec 대신
+    이 시간만 기다렸다가 판정한다 (화살이 멈춘 뒤 바로 확정). stationary는
+    마지막 샘플 이후 제자리(5px 안)라 버퍼에 들어가지 않은 검출 수다.
+    """
+
+    name = None
+    settle_sec = None
+
+    def estimate(self, rows, geometry, stationary=0):
+        raise NotImplementedError
+
+    def stopped(self, rows, stationary=0):
+        return False
+
+
+def _tips(rows):
+    return np.column_stack((rows["x"], rows["y"]))
+
+
+def _snap_to_target(geometry, point):
+    """경계 밖 점은 최근접 경계점에서 무게중심 쪽으로 PULL_PX 당긴다"""
+    closest, _ = geometry.closest_points(point)
+    x, y = geometry.pull_toward_centroid(closest[0], PULL_PX)
+    return [float(x), float(y)]
+
+
+class InflectionEstimator(HitEstimator):
+    """기존 방식: y가 처음 줄어드는 지점(변곡점)을 적중으로 본다"""
+
+    name = "inflection"
+
+    def estimate(self, rows, geometry, stationary=0):
+        if len(rows) < 2:
+            return None
+
+        tips = _tips(rows)
+        y_coords = tips[:, 1]
+
+        if y_coords.max() - y_coords.min() < MIN_TRAVEL_PX:
+            return None
+
+        # 적중하면 변곡점이 나온다.
+        drops = np.flatnonzero(y_coords[1:] < y_coords[:-1])
+
+        if geometry is None:
+            i = int(drops[0]) if drops.size else len(tips) - 1
+            return HitEstimate(_point(tips[i]), 0.5, i)
+
+        inside = geometry.contains(tips)
+
+        if drops.size:
+            i = int(drops[0])
+            if inside[i]:
+                return HitEstimate(_point(tips[i]), 0.6, i)
+
+            if inside[0]:
+                return HitEstimate(_point(tips[0]), 0.4, 0)
+
+            return HitEstimate(_snap_to_target(geometry, tips[i]), 0.3, i)
+
+        # 변곡점 없는 경우 적중 X or 적중했지만 변곡점 감지 안되는 경우가 있다
+        last = len(tips) - 1
+        if inside[-1]:
+            return HitEstimate(_point(tips[-1]), 0.4, last)
+
+        inside_idx = np.flatnonzero(inside)
+        if inside_idx.size:
+            i = int(inside_idx[0])
+            return HitEstimate(_point(tips[i]), 0.3, i)
+        return HitEstimate(_point(tips[-1]), 0.2, last)
+
+
+class TrajectoryFitEstimator(HitEstimator):
+    """궤적 피팅 추정기
+
+    팁 좌표를 시간의 함수 x(t), y(t)로 보고 RANSAC으로 2차(점이 적으면 1차)
+    다항식을 맞춘다. 후보 모델은 표본 조합 전체를 한 번에 풀어(배치
+    Vandermonde) 인라이어 수로 고르고, 인라이어만으로 최소제곱 재피팅한다.
+    충돌 시점은 이후 min_stuck개 이상의 샘플이 stuck_px 안에 머물고 속도가
+    비행 최고 속도의 collapse_ratio 아래로 떨어진 첫 샘플로 잡고, 적중점은
+    충돌 전 비행 구간 피팅을 그 시각에서 평가한 위치다.
+    """
+
+    name = "fit"
+    settle_sec = 0.3
+
+    def __init__(
+        self,
+        inlier_px=6.0,
+        stuck_px=20.0,
+        min_points=4,
+        max_models=256,
+        settle_sec=0.3,
+        min_stationary=2,
+        min_stuck=3,
+        collapse_ratio=0.3,
+    ):
+        self.inlier_px = inlier_px
+        self.stuck_px = stuck_px
+        self.min_stuck = min_stuck  # 충돌 뒤 머물러야 하는 샘플 수
+        self.collapse_ratio = collapse_ratio
+        self.min_points = min_points
+        self.max_models = max_models
+        self.settle_sec = settle_sec
+        self.min_stationary = min_stationary  # 정지로 볼 제자리 검출 수
+        self._combos = {}  # (n, k) -> 표본 조합 인덱스 (M, k)
+
+    def stopped(self, rows, stationary=0):
+        """충돌(이동량 붕괴)이 이미 관측됐는지
+
+        버퍼 안에서 이동량이 붕괴했거나, 충분히 날아온 뒤 마지막 샘플
+        자리에서 제자리 검출이 min_stationary번 이어진 경우.
+        """
+        if len(rows) < 2:
+            return False
+        t, tips = _timeline(rows)
+        if np.ptp(tips[:, 1]) < MIN_TRAVEL_PX:
+            return False
+        if stationary >= self.min_stationary:
+            return True
+        if len(rows) < self.min_points:
+            return False
+        return self._impact(t, tips)[1]
+
+    def estimate(self, rows, geometry, stationary=0):
+        if len(rows) < 2:
+            return None
+
+        t, tips = _timeline(rows)
+        if np.ptp(tips[:, 1]) < MIN_TRAVEL_PX:
+            return None
+
+        # 마지막 샘플 자리에 제자리 검출이 이어졌으면 그 자리가 정지 위치다
+        rested = stationary >= self.min_stationary
+        if rested:
+            impact, collapsed = len(tips) - 1, True
+        else:
+            impact, collapsed = self._impact(t, tips)
+        # 충돌 이후 샘플(튕김/흔들림)은 비행 궤적 피팅에서 뺀다
+        flight = slice(0, impact + 1)
+        coeffs, inliers = (None, None) if rested else self._fit(t[flight], tips[flight])
+
+        if rested:
+            # 여러 번 확인된 정지 위치는 (감속 구간이라) 피팅보다 관측값이 정확하다
+            tip = tips[impact]
+            fit_quality = 0.8
+        elif coeffs is None:
+            tip = tips[impact]
+            fit_quality = 0.5
+        else:
+            tip = np.array(
+                [np.polyval(coeffs[0], t[impact]), np.polyval(coeffs[1], t[impact])]
+            )
+            n = impact + 1
+            support = min(1.0, inliers.sum() / self.min_points)
+            fit_quality = inliers.sum() / n * support
+
+        confidence = fit_quality * (1.0 if collapsed else 0.6)
+
+        if geometry is not None and not geometry.contains(tip)[0]:
+            inside = geometry.contains(tips[flight])
+            if inside.any():
+                # 피팅점이 경계 밖으로 밀려난 경우 실제 관측된 마지막 내부 점
+                tip = tips[int(np.flatnonzero(inside)[-1])]
+                confidence *= 0.7
+            else:
+                return HitEstimate(
+                    _snap_to_target(geometry, tip), confidence * 0.5, impact
+                )
+
+        return HitEstimate(_point(tip), float(confidence), impact)
+
+    def _impact(self, t, tips):
+        """(충돌 샘플 인덱스, 충돌이 관측됐는지)
+
+        이후 샘플이 min_stuck개 이상이고 모두 stuck_px 안에 머물며, 그 구간
+        최고 속도가 그 전 비행 최고 속도의 collapse_ratio 아래인 첫 샘플을
+        충돌로 본다. 느린 검출 두어 개로는 충돌이 되지 않는다. 튀는 검출
+        하나로 판정이 흔들리지 않도록 뒤 샘플이 셋 이상이면 하나는 벗어나도
+        허용한다.
+        """
+        n = len(tips)
+        if n < self.min_stuck + 2:
+            return n - 1, False
+
+        dist = np.hypot(*(tips[:, None, :] - tips[None, :, :]).transpose(2, 0, 1))
+        # 샘플별로 이후 샘플 중 stuck_px 밖으로 벗어난 수
+        far = np.triu(dist > self.stuck_px, 1).sum(axis=1)
+        later = np.arange(n - 1, -1, -1)
+        allowed = (later >= 3).astype(int)
+
+        # speed[i]: 샘플 i → i+1 구간 속도 (px/s)
+        step = np.hypot(*np.diff(tips, axis=0).T)
+        speed = step / np.maximum(np.diff(t), 1e-6)
+        peak_before = np.maximum.accumulate(speed)  # [i]: 구간 0..i 최고
+        peak_after = np.maximum.accumulate(speed[::-1])[::-1]  # [i]: 구간 i.. 최고
+        collapsed = np.zeros(n, bool)
+        # 충돌 샘플 i: 그 전 구간(..i-1) 최고 대비 그 뒤 구간(i..) 최고
+        collapsed[1:-1] = peak_after[1:] <= self.collapse_ratio * peak_before[:-1]
+
+        stuck = np.flatnonzero((far <= allowed) & (later >= self.min_stuck) & collapsed)
+        if not stuck.size:
+            return n - 1, False
+        return int(stuck[0]), True
+
+    def _fit(self, t, tips):
+        """RANSAC으로 x(t), y(t) 다항식 계수 ((deg+1,), (deg+1,))와 인라이어 마스크"""
+        n = len(t)
+        if n < 2:
+            return None, None
+        deg = 2 if n >= self.min_points else 1
+        k = deg + 1
+
+        combos = self._sample_sets(n, k)
+        T = t[combos]  # (M, k)
+        V = T[..., None] ** np.arange(deg, -1, -1)  # (M, k, k) Vandermonde
+        # 시각이 겹치는 표본 조합은 풀 수 없으므로 제외
+        usable = np.abs(np.linalg.det(V)) > 1e-12
+        if not usable.any():
+            return None, None
+        V, combos = V[usable], combos[usable]
+
+        targets = np.stack((tips[combos, 0], tips[combos, 1]), axis=-1)  # (M, k, 2)
+        coeffs = np.linalg.solve(V, targets)  # (M, k, 2)
+
+        A = t[:, None] ** np.arange(deg, -1, -1)  # (n, k)
+        pred = np.einsum("nk,mkd->mnd", A, coeffs)  # (M, n, 2)
+        resid = np.hypot(*(pred - tips[None]).transpose(2, 0, 1))  # (M, n)
+        inlier_sets = resid < self.inlier_px
+
+        # 인라이어가 가장 많은 모델, 같으면 잔차 합이 작은 모델
+        score = inlier_sets.sum(axis=1) - np.minimum(resid, self.inlier_px).sum(
+            axis=1
+        ) / (self.inlier_px * n)
+        inliers = inlier_sets[int(score.argmax())]
+
+        if inliers.sum() <= deg:
+            return None, None
+        fit_deg = min(deg, int(inliers.sum()) - 1)
+        coeff_x = np.polyfit(t[inliers], tips[inliers, 0], fit_deg)
+        coeff_y = np.polyfit(t[inliers], tips[inliers, 1], fit_deg)
+        return (coeff_x, coeff_y), inliers
+
+    def _sample_sets(self, n, k):
+        combos = self._combos.get((n, k))
+        if combos is None:
+            combos = np.array(list(itertools.combinations(range(n), k)))
+            if len(combos) > self.max_models:
+                # 결정적 결과를 위해 고정 시드로 일부만 사용
+                rng = np.random.default_rng(0)
+                combos = combos[rng.choice(len(combos), self.max_models, False)]
+            self._combos[(n, k)] = combos
+        return combos
+
+
+def _timeline(rows):
+    """피팅용 (상대 시각 초, 팁 좌표) - 타임스탬프가 없거나 역행하면 30fps 가정"""
+    t = rows["t"] - rows["t"][0]
+    if len(t) > 1 and not (np.diff(t) > 0).all():
+        t = np.arange(len(rows)) / 30.0
+    return t, _tips(rows)
+
+
+def _point(tip):
+    return [round(float(tip[0]), 2), round(float(tip[1]), 2)]
+
+
+ESTIMATORS = {
+    InflectionEstimator.name: InflectionEstimator,
+    TrajectoryFitEstimator.name: TrajectoryFitEstimator,
+}
+
+# 피팅 추정기는 녹화 샷으로 검증될 때까지 opt-in (기본은 기존 변곡점 방식)
+HIT_ESTIMATOR = os.getenv("SMARTBOW_HIT_ESTIMATOR", InflectionEstimator.name)
+
+
+def make_estimator(name=None):
+    name = name or HIT_ESTIMATOR
+    try:
+        return ESTIMATORS[name]()
+    except KeyError:
+        raise ValueError(f"알 수 없는 적중 추정기: {name}") from None
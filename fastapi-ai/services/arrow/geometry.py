@@ -0,0 +1,90 @@
+import cv2, numpy as np
+
+
+class TargetGeometry:
+    """타깃 폴리곤 기하 정보
+
+    add_event가 새 타깃을 받을 때 한 번만 만들어 두고,
+    궤적 전체에 대한 포함/최근접점 계산을 NumPy 한 번의 호출로 처리한다.
+    """
+
+    def __init__(self, polygon):
+        self.polygon = np.asarray(polygon, dtype=np.int32).reshape(-1, 2)
+
+        vertices = self.polygon.astype(np.float64)
+        self.starts = vertices
+        self.ends = np.roll(vertices, -1, axis=0)
+        self.edges = self.ends - self.starts
+        self.edge_sq = (self.edges**2).sum(axis=1)
+
+        self.bbox_min = vertices.min(axis=0)
+        self.bbox_max = vertices.max(axis=0)
+
+        M = cv2.moments(self.polygon)
+        if M["m00"] != 0:
+            self.centroid = np.array([M["m10"] / M["m00"], M["m01"] / M["m00"]])
+        else:
+            self.centroid = None
+
+    def contains(self, points):
+        """(N, 2) 점들의 폴리곤 내부 여부 (경계 포함) - (N,) bool"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        result = np.zeros(len(points), dtype=bool)
+
+        in_bbox = np.all((points >= self.bbox_min) & (points <= self.bbox_max), axis=1)
+        if not in_bbox.any():
+            return result
+
+        candidates = points[in_bbox]
+        px = candidates[:, 0:1]
+        py = candidates[:, 1:2]
+
+        # 수평 반직선 교차 횟수 (crossing number)
+        y1, y2 = self.starts[:, 1], self.ends[:, 1]
+        x1, x2 = self.starts[:, 0], self.ends[:, 0]
+        straddles = (y1 > py) != (y2 > py)
+        dy = np.where(y2 != y1, y2 - y1, 1.0)
+        x_cross = x1 + (py - y1) * (x2 - x1) / dy
+        crossings = np.count_nonzero(straddles & (px < x_cross), axis=1)
+        inside = (crossings % 2) == 1
+
+        # pointPolygonTest(>= 0)와 동일하게 경계 위의 점도 내부로 본다
+        if not inside.all():
+            _, dist = self.closest_points(candidates)
+            inside |= dist <= 1e-6
+
+        result[in_bbox] = inside
+        return result
+
+    def closest_points(self, points):
+        """(N, 2) 점들에 대한 폴리곤 경계 최근접점 (N, 2)와 거리 (N,)"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+        diff = points[:, None, :] - self.starts[None, :, :]
+        dot = (diff * self.edges[None, :, :]).sum(axis=2)
+        t = np.divide(
+            dot,
+            self.edge_sq,
+            out=np.zeros_like(dot),
+            where=self.edge_sq > 0,
+        )
+        np.clip(t, 0.0, 1.0, out=t)
+
+        proj = self.starts[None, :, :] + t[:, :, None] * self.edges[None, :, :]
+        dist_sq = ((points[:, None, :] - proj) ** 2).sum(axis=2)
+
+        nearest = dist_sq.argmin(axis=1)
+        rows = np.arange(len(points))
+        return proj[rows, nearest], np.sqrt(dist_sq[rows, nearest])
+
+    def pull_toward_centroid(self, point, distance):
+        """경계점을 무게중심 방향으로 distance만큼 안쪽으로 이동"""
+        point = np.asarray(point, dtype=np.float64)
+        if self.centroid is None:
+            return point
+
+        direction = self.centroid - point
+        length = np.hypot(direction[0], direction[1])
+        if length == 0:
+            return point
+        return point + direction / length * distance
@@ -0,0 +1,95 @@
+import asyncio, heapq, threading, time, logging
+
+logger = logging.getLogger(__name__)
+
+
+class HitScheduler:
+    """카메라별 적중 판정 데드라인 스케줄러
+
+    (deadline_ns, cam_id) 힙을 메인 asyncio 루프에서 관리한다 (monotonic_ns 기준).
+    ArrowService 상태 전이로 데드라인이 다시 등록되면 이전 항목은
+    무효 처리(lazy delete)된다.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}  # cam_id -> 현재 유효한 데드라인
+        self._loop = None
+        self._thread_id = None
+        self._wakeup = None
+        self._task = None
+        self._handler = None
+
+    def start(self, handler):
+        """handler: async (cam_id) -> None, 데드라인 도달 시 호출"""
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._wakeup = asyncio.Event()
+        self._handler = handler
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._heap.clear()
+        self._deadlines.clear()
+
+    def on_transition(self, service, old, new):
+        """ArrowService 리스너 - 상태/데드라인 변경 시 재등록"""
+        self.arm(service.cam_id, service.deadline_ns)
+
+    def arm(self, cam_id, deadline):
+        """데드라인(monotonic_ns) 등록/갱신, None이면 취소 - 어느 스레드에서든 호출 가능"""
+        if self._loop is None:
+            return
+        if threading.get_ident() == self._thread_id:
+            self._arm(cam_id, deadline)
+        else:
+            self._loop.call_soon_threadsafe(self._arm, cam_id, deadline)
+
+    def _arm(self, cam_id, deadline):
+        if self._deadlines.get(cam_id) == deadline:
+            return
+        if deadline is None:
+            # 힙에 남은 항목은 꺼낼 때 무효로 걸러진다
+            self._deadlines.pop(cam_id, None)
+            return
+        self._deadlines[cam_id] = deadline
+        heapq.heappush(self._heap, (deadline, cam_id))
+        if self._heap[0][1] == cam_id and self._heap[0][0] == deadline:
+            self._wakeup.set()
+
+    async def _run(self):
+        logger.info("적중 판정 스케줄러 시작")
+        while True:
+            now = time.monotonic_ns()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, cam_id = heapq.heappop(self._heap)
+                if self._deadlines.get(cam_id) != deadline:
+                    continue  # 재등록으로 무효화된 항목
+                del self._deadlines[cam_id]
+
+                try:
+                    await self._handler(cam_id)
+                except Exception as e:
+                    logger.error(
+                        f"화살 적중 처리 중 오류 발생 - 카메라: {cam_id}, 오류: {e}",
+                        exc_info=True,
+                    )
+
+            timeout = None
+            if self._heap:
+                timeout = (self._heap[0][0] - time.monotonic_ns()) / 1e9
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+hit_scheduler = HitScheduler()
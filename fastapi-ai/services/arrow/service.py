@@ -1,22 +1,90 @@
-import time, cv2, numpy as np, os, datetime, logging
-from collections import deque
-from config import BASE_DIR
+import os, time, numpy as np, logging
+from .buffer import TrackingBuffer
+from .geometry import TargetGeometry
+from .clock import NS, SkewEstimator
+from .snapshot import StateSnapshot
+from .estimators import make_estimator
+from .trajectory import TrajectoryState
+from .debug_writer import DebugJob, debug_writer
+from services.events import JSON_TARGET_VERSION
 
 logger = logging.getLogger(__name__)
 
+# 적중 판정 상태
+READY = "ready"  # 궤적 없음
+TRACKING = "tracking"  # 궤적 수집 중, deadline에 판정
+IMPACT = "impact"  # 스트리밍 모드: 충돌 감지, 즉시 잠정 적중 판정
+IDLE_PENDING = "idle_pending"  # 이벤트가 끊겨 판정 중
+COOLDOWN = "cooldown"  # 적중 직후, deadline까지 판정 보류
+ACTIVE = (TRACKING, IMPACT)  # 궤적이 쌓여 있는 상태
+
+# advance가 돌려주는 적중 종류 (WebSocket 메시지 type)
+HIT = "hit"
+HIT_PROVISIONAL = "hit_provisional"
+HIT_FINAL = "hit_final"
+
+# 충돌이 보이면 잠정 적중을 먼저 보내고 idle 후 확정하는 스트리밍 모드
+STREAMING_HITS = os.getenv("SMARTBOW_STREAMING_HITS", "0") == "1"
+
 
 class ArrowService:
-    def __init__(self, buffer_size=10, idle_sec=2.0, cooldown_sec=8.0):
-        self.tracking_buffer = deque(maxlen=buffer_size)
-        self.idle_sec = idle_sec
-        self.cooldown_sec = cooldown_sec
-        self.last_event_time = None
-        self.last_hit_time = 0.0
+    """카메라별 화살 궤적 수집과 적중 판정 상태 머신
+
+    READY → TRACKING (이벤트) → IDLE_PENDING (deadline 도달) → COOLDOWN (적중) / READY
+    COOLDOWN 중에 들어온 이벤트는 TRACKING으로 모으되 쿨다운이 끝날 때까지 판정을 미룬다.
+    스트리밍 모드에서는 증분 궤적 상태가 충돌을 감지하면 TRACKING → IMPACT
+    (즉시) → TRACKING으로 잠정 적중(hit_provisional)을 내고, idle 판정은
+    확정/수정 적중(hit_final)이 된다.
+    모든 시각은 monotonic_ns 기준이며, 상태/데드라인이 바뀔 때마다
+    listeners에 (service, 이전 상태, 새 상태)를 알린다 (스케줄러, 레지스트리, 지표).
+    """
+
+    def __init__(
+        self,
+        buffer_size=10,
+        idle_sec=2.0,
+        cooldown_sec=8.0,
+        cam_id=None,
+        clock=time.monotonic_ns,
+        estimator=None,
+        streaming=None,
+    ):
+        self.cam_id = cam_id
+        self.clock = clock  # 리플레이에서는 가상 시계를 주입한다
+        self.listeners = []
+        self.tracking_buffer = TrackingBuffer(buffer_size)
+        self.idle_ns = int(idle_sec * NS)
+        self.cooldown_ns = int(cooldown_sec * NS)
+        self.skew = SkewEstimator()
+        self.estimator = estimator or make_estimator()
+        self.last_estimate = None
+        self.find_sec = None  # 마지막 advance에서 추정기 실행 시간 (실행 안 했으면 None)
+        # 화살이 멈춘 것으로 보이면 idle_sec 대신 이 시간만 기다린다
+        settle_sec = self.estimator.settle_sec
+        self.settle_ns = int(settle_sec * NS) if settle_sec else None
+
+        self.streaming = STREAMING_HITS if streaming is None else streaming
+        self.trajectory = TrajectoryState()
+        self.provisional = None  # 보낸 잠정 적중 좌표
+        self._provisional_done = False
+        self._idle_deadline_ns = None
+        self.stationary = 0  # 마지막 샘플 이후 5px 안에 머문 (중복 제거된) 검출 수
+
+        self.state = READY
+        self.snapshot = StateSnapshot()
+        self.snapshot.set_state(READY)
+        self.deadline_ns = None  # 다음 상태 전이 시각
+        self.last_event_ns = None
+        self.cooldown_until_ns = 0
         self.target = None
+        self.target_version = None
+        self._missing_target_version = None  # 좌표를 아직 못 받은 새 버전
+        self.geometry = None
         self.last_bbox = None
+        self.last_trajectory = None  # 마지막 적중의 궤적 스냅샷 (적중 기록용)
 
         self.frame_size = None
-        self.last_frame = None  # 화살 위치 디버그용 추후 서비스 안정화되면 제거
+        self.frame_history = None  # 화살 위치 디버그용 추후 서비스 안정화되면 제거
 
     def to_render_coords(self, x, y, video_size):
         if video_size is None or self.frame_size is None:
@@ -50,250 +118,265 @@ class ArrowService:
         return render_poly
 
     def add_event(self, event):
+        """event: services.events.InferenceEvent (소켓별로 재사용되므로 참조 보관 금지)
 
-        if event.get("target") is not None:
-            self.target = np.array(event["target"], dtype=np.int32)
+        궤적 버퍼에 샘플이 들어갔으면 True (skew.lag_ns도 이때만 갱신된다).
+        """
 
-        if event.get("frame_size") is not None:
-            self.frame_size = tuple(event["frame_size"])
+        target = None
+        if event.target is None:
+            self._check_target_version(event)
+        elif self._is_new_target(event):
+            target = event.target
+        self.set_target(target, event.target_version, event.frame_size)
 
-        if event["type"] == "arrow" and event["tip"] is not None:
-            tip = event["tip"]
+        if event.type == "arrow" and event.tip is not None:
+            tip = event.tip
 
-            if self.tracking_buffer:
-                last = self.tracking_buffer[-1]
-                last_x, last_y = last[0], last[1]
+            last = self.tracking_buffer.last()
+            if last is not None:
+                last_x, last_y = last["x"], last["y"]
                 if (abs(last_x - tip[0]) < 5) and (abs(last_y - tip[1]) < 5):
-                    return
+                    self._on_stationary(tip, event.timestamp)
+                    return False
 
-            x1, y1, x2, y2 = event["bbox"]
+            x1, y1, x2, y2 = event.bbox
             self.last_bbox = (x1, y1, x2, y2)
 
             # 화살 위치 디버그용 추후 서비스 안정화되면 제거
             arrow_crop = None
-            if self.last_frame is not None:
+            frame, scale = (
+                self.frame_history.at(event.timestamp)
+                if self.frame_history is not None
+                else (None, 1.0)
+            )
+            if frame is not None:
                 try:
-                    arrow_crop = self.last_frame[y1:y2, x1:x2].copy()
+                    # 축소 디코딩된 프레임이면 bbox도 같은 배율로
+                    arrow_crop = frame[
+                        int(y1 * scale) : int(y2 * scale),
+                        int(x1 * scale) : int(x2 * scale),
+                    ].copy()
                 except Exception as e:
                     logger.debug(f"화살 crop 실패: {e}")
 
             self.tracking_buffer.append(
-                (
-                    tip[0],
-                    tip[1],
-                    event["timestamp"],
-                    x1,
-                    y1,
-                    x2,
-                    y2,
-                    arrow_crop,
-                    event["conf"],
-                )
+                tip[0], tip[1], event.timestamp, x1, y1, x2, y2, event.conf, arrow_crop
             )
-            self.last_event_time = time.time()
-        else:
-            self.last_bbox = None
-
-    def visualize_buffer(self, hit_point):
-        if not self.tracking_buffer or self.last_frame is None:
-            return
+            self.stationary = 0
 
-        vis_frame = self.last_frame.copy()
-
-        for i, data in enumerate(self.tracking_buffer):
-            if len(data) == 9:  # crop 포함된 버전
-                x, y, t, x1, y1, x2, y2, arrow_crop, confidence = data
-                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-
-                if arrow_crop is not None:
-                    h, w = arrow_crop.shape[:2]
-                    try:
-                        vis_frame[y1 : y1 + h, x1 : x1 + w] = arrow_crop
-                    except:
-                        pass
-
-                # bbox 색상
-                alpha = (i + 1) / len(self.tracking_buffer)
-                color = (0, int(255 * alpha), int(255 * (1 - alpha)))
-
-                # bbox 테두리
-                cv2.rectangle(vis_frame, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(
-                    vis_frame,
-                    str(i),
-                    (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    color,
-                    2,
-                )
-
-                cv2.putText(
-                    vis_frame,
-                    f"{confidence:.2f}",
-                    (x1, y2 + 15),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (255, 255, 0),
-                    2,
-                )
-                cv2.circle(vis_frame, (int(x), int(y)), 4, color, -1)
-
-        if hit_point is not None:
-            hit_x, hit_y = int(hit_point[0]), int(hit_point[1])
-            cv2.circle(vis_frame, (hit_x, hit_y), 15, (0, 0, 255), 3)
-            cv2.circle(vis_frame, (hit_x, hit_y), 5, (0, 0, 255), -1)
-            cv2.putText(
-                vis_frame,
-                "HIT",
-                (hit_x + 20, hit_y),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1.0,
-                (0, 0, 255),
-                3,
-            )
-            cv2.putText(
-                vis_frame,
-                f"({hit_x}, {hit_y})",
-                (hit_x + 20, hit_y + 25),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                (0, 0, 255),
-                2,
+            # 큐잉 지연만큼 당긴 관측 시각부터 idle을 잰다 (백로그가 한꺼번에 와도 정확)
+            self.last_event_ns = self.skew.observe(event.timestamp, self.clock())
+            idle_ns = self.settle_ns if self._stopped() else self.idle_ns
+            self._idle_deadline_ns = max(
+                self.last_event_ns + idle_ns, self.cooldown_until_ns
             )
 
-        now = datetime.datetime.now()
-        date_str = now.strftime("%Y-%m-%d")
-        time_str = now.strftime("%H-%M-%S")
-        save_dir = os.path.join(BASE_DIR, date_str)
-        os.makedirs(save_dir, exist_ok=True)
-
-        save_path = os.path.join(save_dir, f"{time_str}.jpg")
-        cv2.imwrite(save_path, vis_frame)
-
-    def is_idle(self):
-        if not self.tracking_buffer or self.last_event_time is None:
-            return False
-        now = time.time()
-        if now - self.last_hit_time < self.cooldown_sec:
-            return False
-
-        return time.time() - self.last_event_time > self.idle_sec
+            self._advance_tracking(tip, event.timestamp)
+            return True
 
-    def clear_buffer(self):
-        self.tracking_buffer.clear()
-
-    def _closest_point_on_polygon(self, point, polygon):
-
-        px, py = point
-        min_dist = float("inf")
-        closest_point = None
-
-        for i in range(len(polygon)):
-            p1 = polygon[i]
-            p2 = polygon[(i + 1) % len(polygon)]  # 다음 꼭짓점 (마지막은 첫번째로)
-
-            # 선분 p1-p2에서 point까지 가장 가까운 점 찾기
-            x1, y1 = float(p1[0]), float(p1[1])
-            x2, y2 = float(p2[0]), float(p2[1])
-
-            # 선분의 방향 벡터
-            dx = x2 - x1
-            dy = y2 - y1
-
-            if dx == 0 and dy == 0:  # 같은 점이면 스킵
-                continue
+        self.last_bbox = None
+        return False
 
-            # t = 선분 위의 위치 (0~1 사이)
-            t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)))
+    def _on_stationary(self, tip, timestamp):
+        """직전 샘플에서 5px 안에 머문 검출 - 버퍼에는 넣지 않고 정지 신호로 쓴다
 
-            # 선분 위의 가장 가까운 점
-            closest_x = x1 + t * dx
-            closest_y = y1 + t * dy
+        꽂힌 화살은 계속 검출되므로 idle 데드라인은 늘리지 않고, 멈춘 것으로
+        보이면 마지막 샘플 기준 settle 데드라인으로 앞당기기만 한다.
+        스트리밍 모드에서는 증분 궤적에도 넣어 속도 붕괴로 충돌을 잡는다.
+        """
+        if self.state != TRACKING:
+            return
+        self.stationary += 1
+        if self._stopped():
+            self._idle_deadline_ns = min(
+                self._idle_deadline_ns,
+                max(self.last_event_ns + self.settle_ns, self.cooldown_until_ns),
+            )
+        self._advance_tracking(tip, timestamp)
+
+    def _advance_tracking(self, tip, timestamp):
+        if (
+            self.streaming
+            and self.trajectory.update(tip[0], tip[1], timestamp)
+            and not self._provisional_done
+            and self.cooldown_until_ns <= self.last_event_ns
+        ):
+            # 충돌 감지 - 스케줄러가 바로 잠정 적중을 판정하도록
+            self._set_state(IMPACT, self.last_event_ns)
+        else:
+            self._set_state(TRACKING, self._idle_deadline_ns)
+
+    def set_target(self, target, target_version, frame_size):
+        """타깃 폴리곤/프레임 크기 갱신 (None이면 기존 값 유지), 바뀌었으면 True
+
+        담당 워커가 아닌 곳에서는 워커 버스로 받은 값으로 직접 호출한다.
+        """
+        changed = False
+        if target is not None:
+            self.target = np.array(target, dtype=np.int32)
+            self.target_version = target_version
+            self._missing_target_version = None
+            self.geometry = TargetGeometry(self.target)
+            changed = True
+
+        if frame_size is not None and frame_size != self.frame_size:
+            self.frame_size = frame_size
+            changed = True
+
+        if changed:
+            self.snapshot.set_target(self.target, self.target_version, self.frame_size)
+        return changed
+
+    def _stopped(self):
+        return self.settle_ns is not None and self.estimator.stopped(
+            self.tracking_buffer.view(), self.stationary
+        )
+
+    def _is_new_target(self, event):
+        if event.target_version != JSON_TARGET_VERSION:
+            return event.target_version != self.target_version
+        # 버전 없는 JSON 이벤트는 내용 비교
+        return self.target is None or not np.array_equal(self.target, event.target)
+
+    def _check_target_version(self, event):
+        """좌표 없는 메시지 - 아는 버전이면 그대로, 모르는 버전이면 재전송 대기
+
+        변경 메시지를 놓쳤거나 늦게 구독한 경우로, 생산자가 주기적으로 좌표를
+        다시 보내므로 그때까지 기존 타깃을 유지하고 버전당 한 번만 경고한다.
+        """
+        version = event.target_version
+        if version in (0, JSON_TARGET_VERSION, self.target_version):
+            return
+        if version != self._missing_target_version:
+            self._missing_target_version = version
+            logger.warning(
+                f"타깃 폴리곤 누락 - 카메라: {self.cam_id}, 버전: {version} "
+                f"(보유: {self.target_version}), 재전송 대기"
+            )
 
-            # 거리 계산
-            dist = np.sqrt((px - closest_x) ** 2 + (py - closest_y) ** 2)
+    def visualize_buffer(self, hit_point):
+        """디버그 이미지 작업을 백그라운드 저장기에 넘기고 즉시 반환"""
+        frame, scale = (
+            self.frame_history.latest()
+            if self.frame_history is not None
+            else (None, 1.0)
+        )
+        if not self.tracking_buffer or frame is None:
+            return
+        if not frame.flags.owndata:
+            # 공유 메모리 링 뷰는 저장기가 그리기 전에 생산자가 덮어쓸 수 있다
+            frame = frame.copy()
+
+        debug_writer.submit(
+            DebugJob(
+                self.cam_id,
+                frame,
+                self.tracking_buffer.view().tolist(),
+                list(self.tracking_buffer.crops()),
+                hit_point,
+                scale,
+            )
+        )
 
-            if dist < min_dist:
-                min_dist = dist
-                closest_point = (closest_x, closest_y)
+    def is_due(self, now=None):
+        """다음 상태 전이 시각이 지났는지"""
+        if self.deadline_ns is None:
+            return False
+        return (self.clock() if now is None else now) >= self.deadline_ns
 
-        return closest_point
+    def advance(self, now=None, visualize=True):
+        """deadline에 호출 - 상태를 진행하고, 보낼 적중이 있으면 (종류, 좌표) 반환
 
-    def find_hit_point(self):
-        if len(self.tracking_buffer) < 2:
-            self.clear_buffer()
+        종류는 HIT, 스트리밍 모드에서는 HIT_PROVISIONAL / HIT_FINAL.
+        잠정 적중이 나간 뒤 확정 판정에서 적중이 사라지면 (HIT_FINAL, None).
+        """
+        if now is None:
+            now = self.clock()
+        if self.deadline_ns is None or now < self.deadline_ns:
             return None
 
-        y_coords = [data[1] for data in self.tracking_buffer]
-
-        # 오탐 정지 물체 필터링
-        y_min, y_max = min(y_coords), max(y_coords)
-        total_height = y_max - y_min
-
-        if total_height < 25:
-            self.clear_buffer()
+        self.find_sec = None
+        if self.state == COOLDOWN:
+            self._set_state(READY, None)
             return None
 
-        # 적중하면 변곡점이 나온다.
-        for i in range(len(y_coords) - 1):
-            if y_coords[i + 1] < y_coords[i]:
-                x, y = self.tracking_buffer[i][0], self.tracking_buffer[i][1]
-                raw_hit = [float(x), float(y)]
-
-                if self.target is not None:
-                    inside = cv2.pointPolygonTest(self.target, raw_hit, False) >= 0
-
-                    if inside:
-                        return raw_hit
-
-                    for data in self.tracking_buffer:
-                        px, py = float(data[0]), float(data[1])
-                        if cv2.pointPolygonTest(self.target, [px, py], False) >= 0:
-
-                            return [px, py]
-
-                        closest_point = self._closest_point_on_polygon(
-                            [x, y], self.target
-                        )
-
-                        if closest_point:
-                            closest_x, closest_y = closest_point
+        if self.state == IMPACT:
+            # 버퍼는 유지한 채 지금까지의 궤적으로 잠정 판정
+            self._provisional_done = True
+            self.provisional = self.find_hit_point()
+            self._set_state(TRACKING, self._idle_deadline_ns)
+            if self.provisional is None:
+                return None
+            return HIT_PROVISIONAL, self.provisional
 
-                            M = cv2.moments(self.target)
-                            if M["m00"] != 0:
-                                cx = M["m10"] / M["m00"]
-                                cy = M["m01"] / M["m00"]
-
-                                dx = cx - closest_x
-                                dy = cy - closest_y
-                                length = np.sqrt(dx**2 + dy**2)
-
-                                if length > 0:
-                                    dx, dy = dx / length, dy / length
-                                    closest_x += dx * 35
-                                    closest_y += dy * 35
-
-                            return [closest_x, closest_y]
-                        else:
-                            return [x, y]
-                else:
-                    return [x, y]
+        if self.state != TRACKING:
+            return None
 
-        # 변곡점 없는 경우 적중 X or 적중했지만 변곡점 감지 안되는 경우가 있다
-        x, y = self.tracking_buffer[-1][0], self.tracking_buffer[-1][1]
-        raw_hit = [float(x), float(y)]
+        self._set_state(IDLE_PENDING, None)
+        hit = self.find_hit_point()
+        if hit is not None:
+            self.last_trajectory = self.tracking_buffer.view().copy()
+            if visualize:
+                try:
+                    # 스냅샷만 넘기고 렌더링/저장은 백그라운드에서 처리
+                    self.visualize_buffer(hit)
+                except Exception as e:
+                    logger.error(
+                        f"버퍼 시각화 실패 - 카메라: {self.cam_id}, 오류: {e}"
+                    )
+        provisional = self.provisional
+        self.clear_buffer()
+
+        if hit is not None:
+            self.cooldown_until_ns = now + self.cooldown_ns
+            self._set_state(COOLDOWN, self.cooldown_until_ns)
+        else:
+            self._set_state(READY, None)
 
-        if self.target is None:
-            return raw_hit
+        if provisional is not None:
+            return HIT_FINAL, hit
+        if hit is None:
+            return None
+        return (HIT_FINAL if self.streaming else HIT), hit
 
-        inside = cv2.pointPolygonTest(self.target, raw_hit, False) >= 0
+    def discard(self):
+        """판정 없이 궤적을 버린다 (오래 방치된 궤적 정리용)"""
+        self.clear_buffer()
+        if self.state in ACTIVE:
+            if self.cooldown_until_ns > self.clock():
+                self._set_state(COOLDOWN, self.cooldown_until_ns)
+            else:
+                self._set_state(READY, None)
 
-        if inside:
-            return raw_hit
+    def clear_buffer(self):
+        self.tracking_buffer.clear()
+        self.trajectory.reset()
+        self.stationary = 0
+        self.provisional = None
+        self._provisional_done = False
+
+    def _set_state(self, state, deadline_ns):
+        old = self.state
+        if old == state and self.deadline_ns == deadline_ns:
+            return
+        self.state = state
+        self.deadline_ns = deadline_ns
+        if old != state:
+            self.snapshot.set_state(state)
+        for listener in self.listeners:
+            try:
+                listener(self, old, state)
+            except Exception as e:
+                logger.error(f"상태 전이 알림 실패 - 카메라: {self.cam_id}, 오류: {e}")
 
-        for data in self.tracking_buffer:
-            px, py = float(data[0]), float(data[1])
-            if cv2.pointPolygonTest(self.target, [px, py], False) >= 0:
-                return [px, py]
-        return raw_hit
+    def find_hit_point(self):
+        """추정기로 적중점을 구한다 (신뢰도 등은 last_estimate에 남는다)"""
+        started = time.perf_counter()
+        self.last_estimate = self.estimator.estimate(
+            self.tracking_buffer.view(), self.geometry, self.stationary
+        )
+        self.find_sec = time.perf_counter() - started
+        if self.last_estimate is None:
+            return None
+        return self.last_estimate.tip
@@ -0,0 +1,60 @@
+import time, orjson
+from collections import deque
+
+
+class StateSnapshot:
+    """늦게 접속한 WebSocket 클라이언트에 보낼 카메라 상태 스냅샷
+
+    타깃 폴리곤과 적중 좌표는 프레임 크기 기준 정규화 좌표(0~1)로 보관해
+    클라이언트가 자신의 렌더 크기로 직접 변환한다. 상태 전이는 샷마다 여러 번
+    일어나므로 상태를 뺀 나머지만 직렬화해 캐시하고(타깃/적중이 바뀔 때만 재생성)
+    상태는 보낼 때 끝에 이어 붙인다.
+    """
+
+    def __init__(self, max_hits=10):
+        self.frame_size = None
+        self.polygon = None  # 정규화 좌표
+        self.target_version = None
+        self.hits = deque(maxlen=max_hits)
+        self.state = None
+        self._static = None  # state를 제외한 직렬화 캐시
+
+    def set_target(self, target, target_version, frame_size):
+        self.frame_size = frame_size
+        self.target_version = target_version
+        if target is None or frame_size is None:
+            self.polygon = None
+        else:
+            w, h = frame_size
+            self.polygon = [[float(x) / w, float(y) / h] for x, y in target]
+        self._static = None
+
+    def add_hit(self, tip, confidence=None, timestamp=None):
+        if self.frame_size is None:
+            return
+        w, h = self.frame_size
+        self.hits.append(
+            {
+                "tip": [tip[0] / w, tip[1] / h],
+                "confidence": confidence,
+                "time": time.time() if timestamp is None else timestamp,
+            }
+        )
+        self._static = None
+
+    def set_state(self, state):
+        self.state = state
+
+    def payload(self):
+        """직렬화된 snapshot 메시지 (타깃/적중 부분은 캐시 재사용)"""
+        if self._static is None:
+            self._static = orjson.dumps(
+                {
+                    "type": "snapshot",
+                    "frame_size": self.frame_size,
+                    "target_version": self.target_version,
+                    "polygon": self.polygon,
+                    "hits": list(self.hits),
+                }
+            ).decode()
+        return f'{self._static[:-1]},"state":{orjson.dumps(self.state).decode()}}}'
@@ -0,0 +1,71 @@
+import math
+
+from .estimators import MIN_TRAVEL_PX
+
+# 타임스탬프가 없거나 역행할 때 쓰는 샘플 간격 (30fps 가정)
+DEFAULT_DT = 1 / 30
+
+
+class TrajectoryState:
+    """스트리밍 모드용 증분 궤적 상태
+
+    add_event마다 O(1)로 갱신하며 버퍼 전체를 다시 보지 않는다.
+    세로 이동량이 MIN_TRAVEL_PX 이상 쌓인 뒤 y가 줄어들거나(변곡),
+    속도가 최고 속도의 collapse_ratio 아래로 떨어지면 충돌로 본다.
+    """
+
+    __slots__ = (
+        "collapse_ratio",
+        "count",
+        "min_y",
+        "max_y",
+        "last_x",
+        "last_y",
+        "last_t",
+        "vx",
+        "vy",
+        "peak_speed",
+        "inflection",
+        "collapsed",
+    )
+
+    def __init__(self, collapse_ratio=0.3):
+        self.collapse_ratio = collapse_ratio
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.min_y = math.inf
+        self.max_y = -math.inf
+        self.last_x = self.last_y = self.last_t = None
+        self.vx = self.vy = 0.0
+        self.peak_speed = 0.0
+        self.inflection = False
+        self.collapsed = False
+
+    @property
+    def impact(self):
+        return self.inflection or self.collapsed
+
+    def update(self, x, y, t):
+        """샘플을 반영하고 충돌 여부를 반환"""
+        if self.count:
+            dt = t - self.last_t if t and t > self.last_t else DEFAULT_DT
+            self.vx = (x - self.last_x) / dt
+            self.vy = (y - self.last_y) / dt
+            speed = math.hypot(self.vx, self.vy)
+
+            traveled = max(self.max_y, y) - min(self.min_y, y) >= MIN_TRAVEL_PX
+            if traveled and not self.impact:
+                if y < self.last_y:
+                    self.inflection = True
+                elif speed < self.peak_speed * self.collapse_ratio:
+                    self.collapsed = True
+            if not self.impact:
+                self.peak_speed = max(self.peak_speed, speed)
+
+        self.count += 1
+        self.min_y = min(self.min_y, y)
+        self.max_y = max(self.max_y, y)
+        self.last_x, self.last_y, self.last_t = x, y, t
+        return self.impact
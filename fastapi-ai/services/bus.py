@@ -0,0 +1,135 @@
+import zmq, zmq.asyncio, asyncio, fcntl, os, zlib, orjson, logging
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv("SMARTBOW_WORKERS", "1"))
+BUS_DIR = os.getenv("SMARTBOW_BUS_DIR", "/tmp")
+
+
+class WorkerBus:
+    """워커 프로세스 간 이벤트 버스 (uvicorn --workers N)
+
+    각 워커는 잠금 파일로 고유 인덱스를 얻고, crc32(cam_id) % N 으로
+    자기가 담당할 카메라를 정한다. 적중 등 이벤트는 로컬 핸들러에 바로
+    전달하고, 로컬 ipc PUB/SUB로 다른 워커에도 전달한다.
+    워커가 1개면 소켓 없이 로컬 전달만 한다.
+    """
+
+    def __init__(self, workers=WORKERS, bus_dir=BUS_DIR):
+        self.workers = max(1, workers)
+        self.bus_dir = bus_dir
+        self.index = 0
+        self.handlers = {}  # topic -> async (cam_id, payload)
+
+        self._lock_file = None
+        self._pub = None
+        self._sub = None
+        self._task = None
+
+    def owns(self, cam_id: str) -> bool:
+        """이 워커가 cam_id의 적중 판정 파이프라인을 담당하는지"""
+        if self.workers == 1:
+            return True
+        return zlib.crc32(cam_id.encode()) % self.workers == self.index
+
+    def on(self, topic: str, handler):
+        self.handlers[topic] = handler
+
+    def start(self):
+        if self.workers == 1:
+            return
+
+        self.index = self._claim_index()
+
+        ctx = zmq.asyncio.Context.instance()
+        self._pub = ctx.socket(zmq.PUB)
+        self._pub.setsockopt(zmq.LINGER, 0)
+        self._pub.bind(self._endpoint(self.index))
+
+        self._sub = ctx.socket(zmq.SUB)
+        self._sub.setsockopt(zmq.LINGER, 0)
+        for i in range(self.workers):
+            if i != self.index:
+                self._sub.connect(self._endpoint(i))
+        self._sub.setsockopt_string(zmq.SUBSCRIBE, "")
+
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"워커 버스 시작 - 인덱스: {self.index}/{self.workers}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for socket in (self._pub, self._sub):
+            if socket is not None:
+                socket.close()
+        self._pub = self._sub = None
+
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def publish(self, topic: str, cam_id: str, payload: dict):
+        """로컬 핸들러 호출 후 다른 워커로 전달"""
+        if self._pub is not None:
+            await self._pub.send_multipart(
+                [topic.encode(), cam_id.encode(), orjson.dumps(payload)]
+            )
+        await self._dispatch(topic, cam_id, payload)
+
+    def send(self, topic: str, cam_id: str, payload: dict):
+        """다른 워커에만 전달 (로컬 핸들러 호출 없음, PUB이라 기다리지 않는다)"""
+        if self._pub is not None:
+            self._pub.send_multipart(
+                [topic.encode(), cam_id.encode(), orjson.dumps(payload)]
+            )
+
+    async def _dispatch(self, topic, cam_id, payload):
+        handler = self.handlers.get(topic)
+        if handler is None:
+            return
+        try:
+            await handler(cam_id, payload)
+        except Exception as e:
+            logger.error(
+                f"버스 이벤트 처리 실패 - 토픽: {topic}, 카메라: {cam_id}, 오류: {e}",
+                exc_info=True,
+            )
+
+    async def _run(self):
+        try:
+            while True:
+                topic, cam_id, data = await self._sub.recv_multipart()
+                await self._dispatch(
+                    topic.decode(), cam_id.decode(), orjson.loads(data)
+                )
+        except asyncio.CancelledError:
+            logger.info("워커 버스 수신 종료")
+            raise
+
+    def _endpoint(self, index):
+        return f"ipc://{os.path.join(self.bus_dir, f'smartbow-bus-{index}.ipc')}"
+
+    def _claim_index(self):
+        # 프로세스가 죽으면 잠금이 풀려 재시작된 워커가 같은 인덱스를 이어받는다
+        for i in range(self.workers):
+            path = os.path.join(self.bus_dir, f"smartbow-worker-{i}.lock")
+            f = open(path, "w")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                continue
+            self._lock_file = f
+            return i
+        raise RuntimeError(
+            f"사용 가능한 워커 인덱스 없음 (SMARTBOW_WORKERS={self.workers})"
+        )
+
+
+worker_bus = WorkerBus()
@@ -0,0 +1,136 @@
+import threading, logging
+
+from services.arrow.clock import NS
+from services.arrow.service import ArrowService, ACTIVE
+from services.arrow.scheduler import hit_scheduler
+from services.person.service import PersonService
+from services.bus import worker_bus
+from services.metrics import STATE_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+
+class Camera:
+    __slots__ = ("cam_id", "arrow", "person", "owned")
+
+    def __init__(self, cam_id, arrow, person, owned):
+        self.cam_id = cam_id
+        self.arrow = arrow
+        self.person = person
+        self.owned = owned  # 이 워커가 적중 판정을 담당하는지
+
+
+class CameraRegistry:
+    """카메라별 서비스 레지스트리
+
+    카메라는 시작 시 설정에서만 등록하고, 모르는 cam_id는 만들지 않고 None을 돌려준다.
+    쓰기는 잠금 안에서 새 dict를 만들어 교체(copy-on-write)하므로
+    ZMQ 스레드/메인 루프 어디서든 잠금 없이 읽을 수 있다.
+    궤적이 쌓인 카메라 집합도 같은 방식으로 따로 유지한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cameras = {}
+        self._pending = frozenset()
+
+    def register(self, cam_id: str, **arrow_kwargs):
+        """카메라 등록 (이미 등록된 카메라면 기존 항목 반환)"""
+        with self._lock:
+            camera = self._cameras.get(cam_id)
+            if camera is not None:
+                return camera
+
+            owned = worker_bus.owns(cam_id)
+            arrow = ArrowService(cam_id=cam_id, **arrow_kwargs)
+            arrow.listeners.append(self._on_transition)
+            if owned:
+                # 담당 워커만 추론 이벤트를 받아 적중을 판정하고, 나머지는
+                # 워커 버스로 받은 타깃/프레임 크기만 유지한다
+                arrow.listeners.append(hit_scheduler.on_transition)
+            arrow.listeners.append(_count_transition)
+            camera = Camera(cam_id, arrow, PersonService(), owned)
+            cameras = dict(self._cameras)
+            cameras[cam_id] = camera
+            self._cameras = cameras
+            return camera
+
+    def unregister(self, cam_id: str):
+        with self._lock:
+            if cam_id not in self._cameras:
+                return
+            cameras = dict(self._cameras)
+            del cameras[cam_id]
+            self._cameras = cameras
+            self._pending = self._pending - {cam_id}
+
+    def get(self, cam_id: str):
+        return self._cameras.get(cam_id)
+
+    def arrow(self, cam_id: str):
+        camera = self._cameras.get(cam_id)
+        return camera.arrow if camera is not None else None
+
+    def person(self, cam_id: str):
+        camera = self._cameras.get(cam_id)
+        return camera.person if camera is not None else None
+
+    def __contains__(self, cam_id):
+        return cam_id in self._cameras
+
+    def items(self):
+        """등록 시점 스냅샷 - 순회 중 등록/해제가 있어도 안전"""
+        return self._cameras.items()
+
+    def pending(self):
+        """궤적이 쌓여 적중 판정을 기다리는 카메라만 순회"""
+        cameras = self._cameras
+        for cam_id in self._pending:
+            camera = cameras.get(cam_id)
+            if camera is not None:
+                yield camera
+
+    def sweep(self, stale_sec=30.0, now=None):
+        """마지막 이벤트 후 stale_sec 넘게 판정되지 않은 궤적을 비운다
+
+        판정이 누락된 카메라의 버퍼가 다음 발사와 섞이지 않도록 주기적으로 호출한다.
+        """
+        evicted = []
+        for camera in self.pending():
+            last = camera.arrow.last_event_ns
+            current = camera.arrow.clock() if now is None else now
+            if last is not None and current - last > stale_sec * NS:
+                camera.arrow.discard()
+                evicted.append(camera.cam_id)
+        if evicted:
+            logger.info(f"오래된 궤적 정리 - 카메라: {', '.join(evicted)}")
+        return evicted
+
+    def clear_all(self):
+        with self._lock:
+            self._cameras = {}
+            self._pending = frozenset()
+
+    def _on_transition(self, service, old, new):
+        # 궤적이 쌓인 상태(ACTIVE) 진입/이탈만 궤적 대기 집합에 반영
+        if new in ACTIVE:
+            self._set_pending(service.cam_id, True)
+        elif old in ACTIVE:
+            self._set_pending(service.cam_id, False)
+
+    def _set_pending(self, cam_id, pending):
+        with self._lock:
+            if cam_id not in self._cameras or (cam_id in self._pending) == pending:
+                return
+            if pending:
+                self._pending = self._pending | {cam_id}
+            else:
+                self._pending = self._pending - {cam_id}
+
+
+def _count_transition(service, old, new):
+    if old != new:
+        STATE_TRANSITIONS.labels(service.cam_id, old, new).inc()
+
+
+camera_registry = CameraRegistry()
@@ -0,0 +1,226 @@
+"""추론 이벤트 와이어 포맷 (v1)
+
+고정 길이 리틀엔디언 헤더 + (타깃 변경/재전송 메시지에만) 폴리곤 좌표.
+
+    version u8 | type u8 | flags u8 | pad
+    timestamp f64 | tip x,y f32 | bbox x1,y1,x2,y2 i32 | conf f32
+    frame_w,frame_h u16 | target_version u32 | n_points u16 | pad u16
+    [n_points * (x, y) i32]
+
+생산자는 타깃 폴리곤이 바뀔 때마다 target_version을 올리고 그 메시지에
+좌표를 싣는다. PUB/SUB는 메시지를 잃을 수 있고 늦게 붙은 구독자는 변경
+메시지를 못 받으므로, 같은 버전의 좌표도 주기적으로 다시 싣는다
+(EventEncoder). 좌표 없는 메시지의 target_version은 "현재 버전"만 알리며,
+0이면 타깃 없음이다. 첫 바이트가 '{' 이면 기존 JSON 이벤트로 처리한다.
+"""
+
+import math, os, struct
+import numpy as np, orjson
+
+WIRE_VERSION = 1
+
+HEADER = struct.Struct("<BBBxd2f4ifHHIH2x")
+
+TYPE_NONE, TYPE_ARROW, TYPE_PERSON = 0, 1, 2
+_TYPE_NAMES = {TYPE_NONE: None, TYPE_ARROW: "arrow", TYPE_PERSON: "person"}
+_TYPE_CODES = {name: code for code, name in _TYPE_NAMES.items()}
+
+FLAG_TIP = 0x01
+FLAG_BBOX = 0x02
+FLAG_FRAME_SIZE = 0x04
+
+JSON_TARGET_VERSION = -1  # JSON 이벤트는 버전이 없어 폴리곤 내용으로 비교
+
+# 같은 버전 폴리곤 재전송 주기 (메시지 수, 초 - 먼저 도달하는 쪽)
+TARGET_RESEND_EVERY = int(os.getenv("SMARTBOW_TARGET_RESEND_EVERY", "30"))
+TARGET_RESEND_SEC = float(os.getenv("SMARTBOW_TARGET_RESEND_SEC", "1.0"))
+
+
+class InferenceEvent:
+    """소켓별로 재사용하는 디코딩 결과 레코드"""
+
+    __slots__ = (
+        "type",
+        "timestamp",
+        "tip",
+        "bbox",
+        "conf",
+        "frame_size",
+        "target_version",
+        "target",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.type = None
+        self.timestamp = 0.0
+        self.tip = None
+        self.bbox = None
+        self.conf = 0.0
+        self.frame_size = None
+        self.target_version = 0
+        self.target = None
+
+    def load_dict(self, event):
+        """기존 JSON dict 이벤트를 레코드로 옮긴다"""
+        self.type = event.get("type")
+        self.timestamp = event.get("timestamp", 0.0)
+        self.tip = event.get("tip")
+        self.bbox = event.get("bbox")
+        self.conf = event.get("conf", 0.0)
+        frame_size = event.get("frame_size")
+        self.frame_size = tuple(frame_size) if frame_size is not None else None
+        target = event.get("target")
+        if target is not None:
+            self.target = np.array(target, dtype=np.int32)
+            self.target_version = JSON_TARGET_VERSION
+        else:
+            self.target = None
+        return self
+
+
+def decode_event(data, record):
+    """바이트 메시지를 record에 디코딩 (JSON/바이너리 자동 판별)"""
+    if data[:1] == b"{":
+        return record.load_dict(orjson.loads(data))
+
+    (
+        version,
+        type_code,
+        flags,
+        timestamp,
+        tip_x,
+        tip_y,
+        x1,
+        y1,
+        x2,
+        y2,
+        conf,
+        frame_w,
+        frame_h,
+        target_version,
+        n_points,
+    ) = HEADER.unpack_from(data)
+
+    if version != WIRE_VERSION:
+        raise ValueError(f"unsupported event version: {version}")
+
+    record.type = _TYPE_NAMES.get(type_code)
+    record.timestamp = timestamp
+    record.tip = (tip_x, tip_y) if flags & FLAG_TIP else None
+    record.bbox = (x1, y1, x2, y2) if flags & FLAG_BBOX else None
+    record.conf = conf
+    record.frame_size = (frame_w, frame_h) if flags & FLAG_FRAME_SIZE else None
+    record.target_version = target_version
+    if n_points:
+        # 메시지 버퍼를 그대로 보는 뷰 - 보관하려면 복사해야 한다
+        record.target = np.frombuffer(
+            data, dtype="<i4", count=n_points * 2, offset=HEADER.size
+        ).reshape(-1, 2)
+    else:
+        record.target = None
+    return record
+
+
+def encode_event(
+    type,
+    timestamp,
+    tip=None,
+    bbox=None,
+    conf=0.0,
+    frame_size=None,
+    target_version=0,
+    target=None,
+):
+    """생산자용 인코더 - target은 좌표를 실을 메시지에만 넘긴다 (EventEncoder 참고)"""
+    flags = 0
+    if tip is not None:
+        flags |= FLAG_TIP
+    if bbox is not None:
+        flags |= FLAG_BBOX
+    if frame_size is not None:
+        flags |= FLAG_FRAME_SIZE
+
+    points = b""
+    n_points = 0
+    if target is not None:
+        target = np.ascontiguousarray(target, dtype="<i4").reshape(-1, 2)
+        n_points = len(target)
+        points = target.tobytes()
+
+    tip_x, tip_y = tip if tip is not None else (0.0, 0.0)
+    x1, y1, x2, y2 = bbox if bbox is not None else (0, 0, 0, 0)
+    frame_w, frame_h = frame_size if frame_size is not None else (0, 0)
+
+    header = HEADER.pack(
+        WIRE_VERSION,
+        _TYPE_CODES.get(type, TYPE_NONE),
+        flags,
+        timestamp,
+        tip_x,
+        tip_y,
+        int(x1),
+        int(y1),
+        int(x2),
+        int(y2),
+        conf,
+        frame_w,
+        frame_h,
+        target_version,
+        n_points,
+    )
+    return header + points
+
+
+class EventEncoder:
+    """생산자용 상태 인코더 - 타깃 버전 관리와 폴리곤 주기적 재전송
+
+    set_target으로 폴리곤을 넘기면 내용이 바뀐 경우에만 버전을 올린다.
+    좌표는 버전이 바뀐 첫 메시지와, 이후 resend_every 메시지 또는
+    resend_sec 초(이벤트 timestamp 기준)마다 다시 싣는다.
+    """
+
+    def __init__(self, resend_every=TARGET_RESEND_EVERY, resend_sec=TARGET_RESEND_SEC):
+        self.resend_every = resend_every
+        self.resend_sec = resend_sec
+        self.target = None
+        self.target_version = 0
+        self._since_sent = 0
+        self._sent_at = -math.inf
+
+    def set_target(self, target):
+        if target is None:
+            changed = self.target is not None
+            self.target = None
+        else:
+            target = np.ascontiguousarray(target, dtype="<i4").reshape(-1, 2)
+            changed = self.target is None or not np.array_equal(self.target, target)
+            self.target = target
+        if changed:
+            self.target_version += 1
+            self._sent_at = -math.inf  # 다음 메시지에 바로 싣는다
+        return changed
+
+    def encode(self, type, timestamp, tip=None, bbox=None, conf=0.0, frame_size=None):
+        target = None
+        if self.target is not None:
+            self._since_sent += 1
+            if (
+                self._since_sent >= self.resend_every
+                or timestamp - self._sent_at >= self.resend_sec
+            ):
+                target = self.target
+                self._since_sent = 0
+                self._sent_at = timestamp
+        return encode_event(
+            type,
+            timestamp,
+            tip=tip,
+            bbox=bbox,
+            conf=conf,
+            frame_size=frame_size,
+            target_version=self.target_version if self.target is not None else 0,
+            target=target,
+        )
@@ -0,0 +1,332 @@
+import os, sqlite3, threading, time, uuid, logging, orjson
+from collections import deque
+from config import BASE_DIR
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hits (
+    id INTEGER PRIMARY KEY,
+    cam_id TEXT NOT NULL,
+    time REAL NOT NULL,
+    event_time REAL,
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    nx REAL,
+    ny REAL,
+    frame_w INTEGER,
+    frame_h INTEGER,
+    target_version INTEGER,
+    trajectory BLOB,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS hits_cam_time ON hits (cam_id, time);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    cam_id TEXT NOT NULL,
+    name TEXT,
+    started_at REAL NOT NULL,
+    ended_at REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_cam_started ON sessions (cam_id, started_at);
+"""
+
+INSERT_HIT = (
+    "INSERT INTO hits (cam_id, time, event_time, x, y, nx, ny, frame_w, frame_h,"
+    " target_version, trajectory, confidence)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+HIT_COLUMNS = (
+    "id, cam_id, time, event_time, x, y, nx, ny, frame_w, frame_h,"
+    " target_version, trajectory, confidence"
+)
+SESSION_COLUMNS = "id, cam_id, name, started_at, ended_at"
+
+
+def hit_row(
+    cam_id, hit, rows, frame_size, target_version, confidence=None, now=None
+):
+    """적중 좌표 + 궤적 스냅샷을 INSERT_HIT 파라미터 튜플로 변환
+
+    rows: TrackingBuffer.view() 복사본 (x, y, t, x1, y1, x2, y2, conf)
+    """
+    x, y = hit
+    nx = ny = frame_w = frame_h = None
+    if frame_size is not None:
+        frame_w, frame_h = frame_size
+        nx, ny = x / frame_w, y / frame_h
+
+    trajectory = None
+    event_time = None
+    if rows is not None and len(rows):
+        # [x, y, t, conf] 목록 - REST 응답에 그대로 실을 수 있도록 JSON으로 보관
+        trajectory = orjson.dumps(
+            [
+                [float(r["x"]), float(r["y"]), float(r["t"]), float(r["conf"])]
+                for r in rows
+            ]
+        )
+        event_time = float(rows[-1]["t"]) or None
+
+    return (
+        cam_id,
+        time.time() if now is None else now,
+        event_time,
+        x,
+        y,
+        nx,
+        ny,
+        frame_w,
+        frame_h,
+        target_version,
+        trajectory,
+        confidence,
+    )
+
+
+def _hit_dict(row):
+    (id_, cam_id, t, event_time, x, y, nx, ny, fw, fh, version, trajectory, conf) = row
+    return {
+        "id": id_,
+        "cam_id": cam_id,
+        "time": t,
+        "event_time": event_time,
+        "tip": [x, y],
+        "normalized": [nx, ny] if nx is not None else None,
+        "frame_size": [fw, fh] if fw is not None else None,
+        "target_version": version,
+        "trajectory": orjson.loads(trajectory) if trajectory else [],
+        "confidence": conf,
+    }
+
+
+def _session_dict(row):
+    id_, cam_id, name, started_at, ended_at = row
+    return {
+        "id": id_,
+        "cam_id": cam_id,
+        "name": name,
+        "started_at": started_at,
+        "ended_at": ended_at,
+    }
+
+
+class HitStore:
+    """적중 기록 저장소 (SQLite WAL)
+
+    적중 판정 경로에서는 submit으로 큐에 넣기만 하고, 전용 스레드가
+    모인 적중을 트랜잭션 하나로 묶어 기록한다. 조회는 호출 스레드별
+    연결로 수행하므로 쓰기와 서로 막지 않는다 (WAL).
+    세션은 카메라별 시간 구간이며, (cam_id, time) 인덱스로 조회한다.
+    """
+
+    def __init__(self, path, batch_size=64, flush_sec=0.5, max_pending=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_sec = flush_sec
+        self.max_pending = max_pending
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._local = threading.local()
+        self._ready = False
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._connect()  # 스키마를 시작 시점에 만들어 설정 오류를 바로 드러낸다
+        self._thread = threading.Thread(
+            target=self._worker, name="hit-store", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """남은 적중을 기록하고 쓰기 스레드 종료"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, row):
+        """hit_row() 결과를 쓰기 큐에 추가 (메인 루프에서 호출, 블로킹 없음)"""
+        if not self._running:
+            self.start()
+
+        with self._cond:
+            if len(self._queue) >= self.max_pending:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(row)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    # ---- 조회 ----
+
+    def hits(self, cam_id, limit=50, cursor=None, since=None, until=None):
+        """카메라 적중을 최신순으로 (hits, 다음 페이지 cursor) 반환
+
+        cursor는 마지막 항목의 "time:id" - OFFSET 없이 인덱스에서 바로 이어 읽는다.
+        """
+        sql = f"SELECT {HIT_COLUMNS} FROM hits WHERE cam_id = ?"
+        params = [cam_id]
+        if since is not None:
+            sql += " AND time >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND time < ?"
+            params.append(until)
+        if cursor:
+            before_time, before_id = _parse_cursor(cursor)
+            sql += " AND (time, id) < (?, ?)"
+            params += [before_time, before_id]
+        sql += " ORDER BY time DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        rows = self._connect().execute(sql, params).fetchall()
+        hits = [_hit_dict(row) for row in rows]
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = f"{rows[-1][2]!r}:{rows[-1][0]}"
+        return hits, next_cursor
+
+    def count(self, cam_id, since=None, until=None):
+        sql = "SELECT COUNT(*) FROM hits WHERE cam_id = ?"
+        params = [cam_id]
+        if since is not None:
+            sql += " AND time >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND time < ?"
+            params.append(until)
+        return self._connect().execute(sql, params).fetchone()[0]
+
+    def start_session(self, cam_id, name=None):
+        """카메라의 열린 세션을 닫고 새 세션 시작"""
+        now = time.time()
+        session_id = uuid.uuid4().hex
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE sessions SET ended_at = ?"
+                " WHERE cam_id = ? AND ended_at IS NULL",
+                (now, cam_id),
+            )
+            conn.execute(
+                "INSERT INTO sessions (id, cam_id, name, started_at)"
+                " VALUES (?, ?, ?, ?)",
+                (session_id, cam_id, name, now),
+            )
+        return self.session(session_id)
+
+    def end_session(self, session_id):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE sessions SET ended_at = ? WHERE id = ? AND ended_at IS NULL",
+                (time.time(), session_id),
+            )
+        return self.session(session_id)
+
+    def session(self, session_id):
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT {SESSION_COLUMNS} FROM sessions WHERE id = ?", (session_id,)
+            )
+            .fetchone()
+        )
+        return _session_dict(row) if row else None
+
+    def sessions(self, cam_id, limit=50):
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT {SESSION_COLUMNS} FROM sessions WHERE cam_id = ?"
+                " ORDER BY started_at DESC LIMIT ?",
+                (cam_id, limit),
+            )
+            .fetchall()
+        )
+        return [_session_dict(row) for row in rows]
+
+    # ---- 내부 ----
+
+    def _connect(self):
+        # sqlite3 연결은 스레드 간 공유하지 않는다
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._ready:
+                # 여러 워커가 동시에 시작해도 IF NOT EXISTS + busy timeout으로 안전
+                conn.executescript(SCHEMA)
+                self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def _worker(self):
+        conn = self._connect()
+        while True:
+            with self._cond:
+                if self._running and len(self._queue) < self.batch_size:
+                    # 배치가 찰 때까지 최대 flush_sec 기다린다
+                    self._cond.wait(self.flush_sec)
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(len(self._queue), self.batch_size))
+                ]
+                running = self._running
+
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(INSERT_HIT, batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    logger.error(f"적중 기록 실패 - {len(batch)}건, 오류: {e}")
+
+            if not running and not self._queue:
+                conn.close()
+                self._local.conn = None
+                return
+
+
+def _parse_cursor(cursor):
+    try:
+        before_time, _, before_id = cursor.partition(":")
+        return float(before_time), int(before_id)
+    except ValueError:
+        raise ValueError(f"잘못된 cursor: {cursor}")
+
+
+hit_store = HitStore(
+    os.getenv("SMARTBOW_HIT_DB", os.path.join(BASE_DIR, "hits.sqlite3")),
+    batch_size=int(os.getenv("SMARTBOW_HIT_BATCH", "64")),
+    flush_sec=float(os.getenv("SMARTBOW_HIT_FLUSH_SEC", "0.5")),
+)
+
+metrics.collect(
+    "smartbow_hit_store_total",
+    "Persisted hits by result",
+    lambda: [
+        (("written",), hit_store.written),
+        (("dropped",), hit_store.dropped),
+        (("failed",), hit_store.failed),
+    ],
+    ("result",),
+    kind="counter",
+)
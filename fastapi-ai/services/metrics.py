@@ -0,0 +1,266 @@
+import bisect, time
+
+# 초 단위 지연 버킷 (0.1ms ~ 5s)
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            # setdefault로 동시에 처음 만들어져도 하나만 남는다
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in list(self._children.items()):
+            self._render_child(lines, values, child)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def _render_child(self, lines, values, child):
+        lines.append(
+            f"{self.name}{_format_labels(self.labelnames, values)} {child.value}"
+        )
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_child(self, lines, values, child):
+        # 관측 시에는 구간별로만 세고, 누적 합은 수집 시점에 계산한다
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), list(child.counts)):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            labels = _format_labels(self.labelnames, values, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {child.sum}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+
+
+class Collected(_Metric):
+    """수집 시점에 콜백으로 값을 읽는 지표 (연결 수, 기존 통계 객체 등)
+
+    fn은 [(라벨 값 튜플, 값), ...]을 반환한다.
+    """
+
+    def __init__(self, name, help, labelnames=(), fn=None, kind="gauge"):
+        self.kind = kind
+        self.fn = fn
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, value in self.fn():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, values)} {value}"
+            )
+
+
+class MetricsRegistry:
+    """프로세스 내 지표 수집기
+
+    갱신은 잠금 없이 슬롯 객체의 정수/실수만 더하므로 상시 켜 두어도 부담이 없다.
+    관측은 대부분 메인 이벤트 루프에서 일어나고, 다른 스레드에서 동시에
+    갱신되면 드물게 증분이 누락될 수 있다 (지표 용도로 허용).
+    uvicorn --workers N이면 워커별 값이다.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def collect(self, name, help, fn, labelnames=(), kind="gauge"):
+        return self._register(Collected(name, help, labelnames, fn, kind))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            metric.render(lines)
+        lines.append("")
+        return "\n".join(lines)
+
+
+metrics = MetricsRegistry()
+
+EVENT_AGE = metrics.histogram(
+    "smartbow_event_age_seconds",
+    "Producer timestamp to add_event completion",
+    ("cam_id",),
+)
+EVENT_HANDLE = metrics.histogram(
+    "smartbow_event_handle_seconds",
+    "ZMQ receive to add_event completion (decode + callback)",
+    ("cam_id",),
+)
+EVENT_LAG = metrics.histogram(
+    "smartbow_event_lag_seconds",
+    "Queueing delay above the estimated producer clock offset",
+    ("cam_id",),
+)
+STATE_TRANSITIONS = metrics.counter(
+    "smartbow_state_transitions_total",
+    "Hit state machine transitions",
+    ("cam_id", "from", "to"),
+)
+HIT_FIND = metrics.histogram(
+    "smartbow_find_hit_seconds",
+    "Hit estimator duration (find_hit_point only)",
+    ("cam_id",),
+)
+HIT_DELAY = metrics.histogram(
+    "smartbow_hit_delay_seconds",
+    "State deadline to hit broadcast completion",
+    ("cam_id",),
+)
+HITS = metrics.counter("smartbow_hits_total", "Detected hits", ("cam_id",))
+BROADCAST = metrics.histogram(
+    "smartbow_broadcast_seconds", "WebSocket hit fan-out duration", ("cam_id",)
+)
+WS_EVICTIONS = metrics.counter(
+    "smartbow_ws_evictions_total", "Slow WebSocket clients evicted", ("cam_id",)
+)
+FRAME_DECODE = metrics.histogram(
+    "smartbow_frame_decode_seconds", "Camera JPEG decode duration", ("cam_id",)
+)
+FRAME_READY = metrics.histogram(
+    "smartbow_frame_ready_seconds",
+    "Frame receive to decoded frame handoff on the event loop (queue + decode)",
+    ("cam_id",),
+)
+FRAMES_RECEIVED = metrics.counter(
+    "smartbow_frames_received_total", "Decoded camera frames", ("cam_id",)
+)
+FRAMES_PUBLISHED = metrics.counter(
+    "smartbow_frames_published_total", "Frames rendered for viewers", ("cam_id",)
+)
+TRACK_RECV = metrics.histogram(
+    "smartbow_track_recv_seconds", "Video track recv wait duration", ("cam_id",)
+)
+TRACK_DROPS = metrics.counter(
+    "smartbow_track_dropped_frames_total",
+    "Frames a viewer skipped or flushed from its queue",
+    ("cam_id",),
+)
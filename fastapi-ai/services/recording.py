@@ -0,0 +1,78 @@
+"""ZMQ 원본 스트림 녹화 파일 포맷
+
+파일 헤더(MAGIC + 버전) 뒤에 레코드를 이어 붙이는 append-only 포맷.
+각 레코드는 고정 헤더(종류, cam_id 길이, 수신 시각, 페이로드 길이) +
+cam_id + 원본 페이로드(추론 이벤트 바이트 / 프레임 msgpack)로 이루어진다.
+기록 중 프로세스가 죽어 마지막 레코드가 잘려도 앞부분은 그대로 읽힌다.
+"""
+
+import os, struct, time
+
+MAGIC = b"SBRC"
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct("<4sB3x")
+RECORD_HEADER = struct.Struct("<BxHdI")
+
+KIND_EVENT = 1  # 추론 이벤트 (services.events 포맷 그대로)
+KIND_FRAME = 2  # 카메라 프레임 msgpack (jpeg 포함)
+
+
+class RecordWriter:
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION))
+        else:
+            _check_header(path)
+
+    def write(self, kind, cam_id, payload, recv_time=None):
+        cam = cam_id.encode()
+        if recv_time is None:
+            recv_time = time.time()
+        self._file.write(RECORD_HEADER.pack(kind, len(cam), recv_time, len(payload)))
+        self._file.write(cam)
+        self._file.write(payload)
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(path):
+    with open(path, "rb") as f:
+        magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"녹화 파일이 아님: {path}")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 녹화 버전: {version}")
+
+
+def read_records(path):
+    """(kind, recv_time, cam_id, payload) 순서대로 반환, 잘린 꼬리는 무시"""
+    _check_header(path)
+    with open(path, "rb") as f:
+        f.seek(FILE_HEADER.size)
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            kind, cam_len, recv_time, size = RECORD_HEADER.unpack(header)
+            cam = f.read(cam_len)
+            payload = f.read(size)
+            if len(cam) < cam_len or len(payload) < size:
+                return
+            yield kind, recv_time, cam.decode(), payload
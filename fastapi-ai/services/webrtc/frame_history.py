@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class FrameHistory:
+    """카메라별 최근 프레임 링 (타임스탬프 색인)
+
+    프레임 구독자가 뷰어와 무관하게 한 번만 채우며, 저장된 프레임은
+    읽기 전용으로 취급한다 (복사 없이 참조만 보관).
+    축소 디코딩된 프레임은 원본 대비 배율(scale)을 함께 보관하고, 조회는
+    (frame, scale)을 반환한다 - 원본 좌표 x는 프레임에서 x * scale이다.
+    """
+
+    def __init__(self, capacity=8, max_skew=0.5):
+        self.capacity = capacity
+        self.max_skew = max_skew
+        self._timestamps = np.full(capacity, -np.inf)
+        self._frames = [None] * capacity
+        self._scales = [1.0] * capacity
+        self._next = 0
+        self._latest = None
+
+    def push(self, timestamp, frame, scale=1.0):
+        self._timestamps[self._next] = timestamp
+        self._frames[self._next] = frame
+        self._scales[self._next] = scale
+        self._latest = self._next
+        self._next = (self._next + 1) % self.capacity
+
+    def latest(self):
+        if self._latest is None:
+            return None, 1.0
+        return self._frames[self._latest], self._scales[self._latest]
+
+    def at(self, timestamp):
+        """timestamp에 가장 가까운 프레임, max_skew 이상 벗어나면 (None, 1.0)"""
+        if self._latest is None:
+            return None, 1.0
+        idx = int(np.abs(self._timestamps - timestamp).argmin())
+        if abs(self._timestamps[idx] - timestamp) > self.max_skew:
+            return None, 1.0
+        return self._frames[idx], self._scales[idx]
+
+    def clear(self):
+        self._timestamps.fill(-np.inf)
+        self._frames = [None] * self.capacity
+        self._latest = None
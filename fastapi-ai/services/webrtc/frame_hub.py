@@ -0,0 +1,222 @@
+import asyncio, cv2, numpy as np, os, time, logging
+from fractions import Fraction
+from av import VideoFrame
+
+from .frame_history import FrameHistory
+from .tiers import TIERS
+from .zoom import ZoomPipeline, even
+from services.metrics import FRAMES_PUBLISHED
+
+logger = logging.getLogger(__name__)
+
+VIDEO_CLOCK_RATE = 90000
+VIDEO_TIME_BASE = Fraction(1, VIDEO_CLOCK_RATE)
+
+# JPEG DCT 축소 디코딩 배율 (IMREAD_REDUCED_COLOR_8/4/2, 원본)
+DECODE_SCALES = (0.125, 0.25, 0.5, 1.0)
+# 디코딩 배율 하한 - history/적중 디버그 이미지도 이 해상도로 남는다.
+# 기본 1.0(항상 원본)이고, 낮추면 뷰어 티어에 맞춘 축소 디코딩을 켠다 (opt-in)
+MIN_DECODE_SCALE = float(os.getenv("SMARTBOW_MIN_DECODE_SCALE", "1.0"))
+
+
+class TierOutput:
+    """티어별 최신 공유 프레임과 대기자
+
+    픽셀(yuv420p)만 공유하고 VideoFrame은 소비자마다 새로 감싼다.
+    aiortc 인코더는 입력 프레임의 pict_type을 덮어쓰므로 같은 VideoFrame을
+    넘기면 한 뷰어의 키프레임 요청이 다른 뷰어로 새거나 사라진다.
+    """
+
+    __slots__ = ("tier", "frame", "pts", "seq", "source", "waiter", "last_publish")
+
+    def __init__(self, tier):
+        self.tier = tier
+        self.frame = None  # yuv420p 평면 (읽기 전용)
+        self.pts = 0
+        self.seq = 0
+        self.source = 0  # frame을 만든 소스 프레임 번호 (CameraFrameHub.pushed)
+        self.waiter = None
+        self.last_publish = 0.0
+
+    def publish(self, frame, pts, source):
+        frame.flags.writeable = False
+        self.frame = frame
+        self.pts = pts
+        self.source = source
+        self.seq += 1
+        waiter = self.waiter
+        self.waiter = None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def video_frame(self):
+        """공유 평면을 감싼 소비자 전용 VideoFrame (픽셀 복사 없음)"""
+        frame = VideoFrame.from_numpy_buffer(self.frame, format="yuv420p")
+        frame.pts = self.pts
+        frame.time_base = VIDEO_TIME_BASE
+        return frame
+
+
+class CameraFrameHub:
+    """카메라별 프레임 팬아웃
+
+    소스 프레임당 한 번만 줌/오버레이를 수행하고, 뷰어가 있는 티어마다
+    한 번씩 축소/yuv420p 변환해 읽기 전용 공유 프레임으로 배포한다.
+    뷰어가 없어도 디코딩된 프레임은 history에 쌓인다.
+
+    프레임은 원본 대비 배율(scale)과 함께 들어온다 (축소 디코딩). 티어 크기와
+    source_size는 항상 원본 해상도 기준이라 배율이 바뀌어도 출력 크기는 같다.
+    """
+
+    def __init__(
+        self, cam_id, arrow_service, person_service, fps_limit=20, history_size=8
+    ):
+        self.cam_id = cam_id
+        self.arrow_service = arrow_service
+        self.person_service = person_service
+        self.fps_limit = fps_limit
+        self.tracks = set()
+        self.encoders = {}  # 공유 인코더 모드: tier name -> SharedEncoder
+        self.history = FrameHistory(history_size)
+        self.zoom = ZoomPipeline()
+
+        self.outputs = {}  # tier name -> TierOutput
+        self.source_size = None  # 렌더링된 (줌 적용 후) 프레임의 원본 기준 크기
+        self.pushed = 0  # 받은 소스 프레임 수
+        self._start_time = None
+        self._last_push = None
+        self.fps = 0.0  # 수신 프레임레이트 (EMA)
+        self._published = FRAMES_PUBLISHED.labels(cam_id)
+
+    def decode_scale(self):
+        """뷰어 티어가 필요로 하는 가장 작은 축소 디코딩 배율"""
+        if MIN_DECODE_SCALE >= 1.0:
+            return 1.0
+        need = max((track.tier.scale for track in self.tracks), default=0.0)
+        if need and self.zoom.mode != "native" and self.person_service.is_zooming():
+            # crop을 키워 내보내므로 그만큼 원본 해상도가 더 필요하다
+            need *= self.zoom.zoom_scale
+        need = max(need, MIN_DECODE_SCALE)
+        return next((s for s in DECODE_SCALES if s >= need), 1.0)
+
+    def push(self, image, timestamp, scale=1.0):
+        """프레임 구독자가 소스 프레임마다 한 번 호출 (scale: 축소 디코딩 배율)"""
+        now = time.monotonic()
+        if self._last_push is not None and now > self._last_push:
+            self.fps += (1.0 / (now - self._last_push) - self.fps) * 0.1
+        self._last_push = now
+
+        self.history.push(timestamp, image, scale)
+        self.pushed += 1
+        if self.source_size is None:
+            # 첫 발행 전에도 티어 선택이 렌더 크기를 비교할 수 있도록
+            self.source_size = _full_size(image, scale)
+        if self.tracks:
+            self.publish(image, scale)
+
+    def publish(self, image, scale=1.0):
+        """디코딩된 BGR 프레임을 받아 뷰어가 있는 티어별 공유 VideoFrame으로 발행"""
+        # pts/발행 간격은 벽시계가 아닌 monotonic 기준 (NTP 보정에 역행하지 않게)
+        now = time.monotonic()
+        due = []
+        for tier in {track.tier for track in self.tracks}:
+            output = self._output(tier)
+            if now - output.last_publish >= 1.0 / min(tier.fps, self.fps_limit):
+                output.last_publish = now
+                due.append(output)
+        if due:
+            self._publish_outputs(image, due, now, scale)
+
+    def _publish_outputs(self, image, outputs, now, scale=1.0):
+        frame = self._render(image, scale)
+        height, width = frame.shape[:2]
+        self.source_size = full_w, full_h = _full_size(frame, scale)
+
+        if self._start_time is None:
+            self._start_time = now
+        pts = int((now - self._start_time) * VIDEO_CLOCK_RATE)
+
+        for output in outputs:
+            tier_scale = output.tier.scale
+            if tier_scale == scale:
+                scaled = frame
+            else:
+                size = (even(full_w * tier_scale), even(full_h * tier_scale))
+                # 더 높은 티어 뷰어가 막 붙어 다음 디코딩 전이면 잠시 키워서 보낸다
+                interpolation = (
+                    cv2.INTER_AREA if size[0] <= width else cv2.INTER_LINEAR
+                )
+                scaled = cv2.resize(frame, size, interpolation=interpolation)
+
+            av_frame = VideoFrame.from_ndarray(scaled, format="bgr24")
+            # 인코더마다 반복되던 색공간 변환을 티어당 한 번만 수행
+            planes = av_frame.reformat(format="yuv420p").to_ndarray()
+
+            output.publish(planes, pts, self.pushed)
+            self._published.inc()
+
+    async def next_frame(self, last_seq, tier=TIERS[0]):
+        """tier에서 last_seq 이후 발행된 최신 프레임을 기다려 (frame, seq) 반환"""
+        output = self._output(tier)
+        if last_seq == 0 and output.source < self.pushed:
+            # 새 뷰어/티어 전환: 다음 소스 프레임을 기다리지 않고 캐시된 최신 프레임을 바로 발행
+            image, scale = self.history.latest()
+            if image is not None:
+                output.last_publish = time.monotonic()
+                self._publish_outputs(image, (output,), output.last_publish, scale)
+        while output.seq <= last_seq or output.frame is None:
+            if output.waiter is None:
+                output.waiter = asyncio.get_running_loop().create_future()
+            await asyncio.shield(output.waiter)
+        return output.video_frame(), output.seq
+
+    def get_encoder(self, tier=TIERS[0]):
+        """공유 인코더 모드에서 티어별 인코더를 가져오거나 생성"""
+        from .shared_encoder import SharedEncoder
+
+        if tier.name not in self.encoders:
+            self.encoders[tier.name] = SharedEncoder(self, tier)
+        return self.encoders[tier.name]
+
+    def _output(self, tier):
+        output = self.outputs.get(tier.name)
+        if output is None:
+            output = self.outputs[tier.name] = TierOutput(tier)
+        return output
+
+    def reset(self):
+        """구독 해제 시 오래된 프레임이 새 뷰어에게 나가지 않도록 비운다"""
+        self.history.clear()
+        for output in self.outputs.values():
+            output.frame = None
+
+    def close(self):
+        for encoder in self.encoders.values():
+            encoder.stop()
+        self.encoders.clear()
+        self.tracks.clear()
+
+    def _render(self, image, scale=1.0):
+        frame, transform = self.zoom.apply(
+            image, self.person_service.get_zoom_area(), scale
+        )
+
+        if self.arrow_service.last_bbox:
+            # 원본(history 공유)에 그리지 않도록 필요할 때만 복사
+            if np.may_share_memory(frame, image):
+                frame = frame.copy()
+            # bbox는 원본 좌표이므로 디코딩 배율을 먼저 적용
+            x1, y1, x2, y2 = (int(v * scale) for v in self.arrow_service.last_bbox)
+            if transform is not None:
+                ox, oy, sx, sy = transform
+                x1, x2 = int((x1 - ox) * sx), int((x2 - ox) * sx)
+                y1, y2 = int((y1 - oy) * sy), int((y2 - oy) * sy)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+        return frame
+
+
+def _full_size(frame, scale):
+    """축소 디코딩된 프레임의 원본 해상도 기준 (width, height)"""
+    height, width = frame.shape[:2]
+    return round(width / scale), round(height / scale)
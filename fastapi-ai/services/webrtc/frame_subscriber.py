@@ -1,49 +1,330 @@
-import zmq.asyncio, cv2, numpy as np, asyncio, msgpack, logging
+import zmq, zmq.asyncio, cv2, numpy as np, asyncio, msgpack, os, time, logging
+from concurrent.futures import ThreadPoolExecutor
+from services.metrics import metrics, FRAME_DECODE, FRAME_READY, FRAMES_RECEIVED
+from .shm_ring import ShmFrameRing
 
 logger = logging.getLogger(__name__)
 
+# JPEG 디코딩 스레드 수 / 카메라별 동시 디코딩 한도
+DECODE_WORKERS = int(os.getenv("SMARTBOW_DECODE_WORKERS", min(4, os.cpu_count() or 1)))
+DECODE_INFLIGHT = int(os.getenv("SMARTBOW_DECODE_INFLIGHT", "1"))
 
-async def camera_frame_sub(tracks, ports):
+# 축소 디코딩 배율 -> imdecode 플래그 (JPEG DCT 단계에서 줄여 디코딩 비용도 준다)
+DECODE_FLAGS = {
+    1.0: cv2.IMREAD_COLOR,
+    0.5: cv2.IMREAD_REDUCED_COLOR_2,
+    0.25: cv2.IMREAD_REDUCED_COLOR_4,
+    0.125: cv2.IMREAD_REDUCED_COLOR_8,
+}
 
-    ctx = zmq.asyncio.Context()
-    sub = ctx.socket(zmq.SUB)
 
-    sub.setsockopt(zmq.LINGER, 0)
-    sub.setsockopt(zmq.RCVHWM, 2)
-    sub.setsockopt(zmq.CONFLATE, 1)
+class FrameSubscriber:
+    """카메라 프레임 수신기
 
-    for port in ports:
-        sub.connect(f"tcp://localhost:{port}")
-        logger.info(f"ZMQ 구독 연결: {port}")
-    sub.setsockopt_string(zmq.SUBSCRIBE, "")
+    공유 ZMQ 컨텍스트의 SUB 소켓 하나를 모든 카메라 포트에 연결/해제하며
+    다중화하고, 메시지의 cam_id로 허브를 찾아 전달한다. 소켓 하나에서는
+    CONFLATE를 쓸 수 없으므로 준비된 메시지를 한 번에 비운 뒤 카메라별
+    최신 프레임만 디코딩한다 (밀린 프레임은 디코딩하지 않고 버린다).
 
-    try:
-        while True:
-            data = await sub.recv()
-            msg = msgpack.unpackb(data, raw=False)
+    메시지에 shm 필드가 있으면 같은 호스트 생산자의 공유 메모리 링
+    (shm_ring)에서 슬롯을 복사 없이 뷰로 가져오고, 없으면 JPEG를 디코딩한다.
+
+    msgpack 해석과 JPEG 디코딩은 제한된 스레드 풀에서 돌고, 이벤트 루프는
+    완성된 프레임 참조만 허브에 넘긴다. 카메라별 진행 중 디코딩이
+    max_inflight개면 새 프레임은 대기 슬롯 하나에 덮어써 최신 것만 남긴다.
+    디코딩 배율은 맡길 때마다 허브의 뷰어 티어로 정한다 (decode_scale).
+    """
+
+    def __init__(
+        self,
+        batch_size=32,
+        rcvhwm=2,
+        workers=DECODE_WORKERS,
+        max_inflight=DECODE_INFLIGHT,
+    ):
+        self.ctx = zmq.asyncio.Context.instance()
+        self.batch_size = batch_size
+        self.rcvhwm = rcvhwm  # 연결(포트)별 수신 대기열 한도
+        self.workers = workers
+        self.max_inflight = max_inflight
+        self.socket = None
+        self.hubs = {}  # cam_id -> CameraFrameHub
+        self.endpoints = {}  # cam_id -> endpoint
+        self.skipped = 0
+        self.overruns = 0  # 읽기 전에 생산자가 덮어쓴 공유 메모리 프레임
+        self.rings = {}  # cam_id -> ShmFrameRing
+        self._retired = []  # 뷰가 남아 아직 닫지 못한 링
+        self._task = None
+        self._pool = None
+        self._tasks = set()  # 진행 중 디코딩 작업
+        self._inflight = {}  # cam_id -> 진행 중 디코딩 수
+        self._pending = {}  # cam_id -> 디코딩 대기 중 최신 (msg, 수신 시각)
+        self._submitted = {}  # cam_id -> 마지막으로 맡긴 디코딩 번호
+        self._delivered = {}  # cam_id -> 마지막으로 전달한 디코딩 번호
+        self.scales = {}  # cam_id -> 마지막 디코딩 배율
+        self._known = set()  # 한 번이라도 구독한 cam_id
+        self._unknown = set()
+
+    def start(self):
+        if self.socket is not None:
+            return
+        self.socket = self.ctx.socket(zmq.SUB)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.RCVHWM, self.rcvhwm)
+        self.socket.setsockopt_string(zmq.SUBSCRIBE, "")
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="frame-decode")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._tasks):
+            task.cancel()
+        self._pending.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+        self.hubs.clear()
+        self.endpoints.clear()
+        self._retired.extend(self.rings.values())
+        self.rings.clear()
+        self._close_retired()
+
+    def connect(self, hub, port):
+        if hub.cam_id in self.endpoints:
+            return
+        endpoint = f"tcp://localhost:{port}"
+        self.socket.connect(endpoint)
+        self.hubs[hub.cam_id] = hub
+        self.endpoints[hub.cam_id] = endpoint
+        self._known.add(hub.cam_id)
+        logger.info(f"ZMQ 구독 연결: {hub.cam_id} ({port})")
+
+    def disconnect(self, cam_id):
+        endpoint = self.endpoints.pop(cam_id, None)
+        self.hubs.pop(cam_id, None)
+        self._pending.pop(cam_id, None)
+        if endpoint is None:
+            return
+        try:
+            self.socket.disconnect(endpoint)
+        except zmq.ZMQError as e:
+            logger.warning(f"ZMQ 구독 해제 실패: {cam_id} - {e}")
+        logger.info(f"ZMQ 구독 해제: {cam_id}")
+
+    def is_connected(self, cam_id):
+        return cam_id in self.endpoints
+
+    async def _run(self):
+        socket = self.socket
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await socket.poll(flags=zmq.POLLIN)
+                received = time.perf_counter()
+
+                batch = []
+                for _ in range(self.batch_size):
+                    try:
+                        batch.append(await socket.recv(zmq.NOBLOCK))
+                    except zmq.Again:
+                        break
+
+                # msgpack 해석(JPEG 바이트 복사 포함)도 루프 밖에서 한다
+                latest, skipped, errors = await loop.run_in_executor(
+                    self._pool, _parse_batch, batch
+                )
+                self.skipped += skipped
+                for e in errors:
+                    logger.warning(f"프레임 메시지 해석 실패: {e}")
+
+                for cam_id, msg in latest.items():
+                    self._push(cam_id, msg, received)
+
+        except asyncio.CancelledError:
+            logger.info("ZMQ 구독 작업 취소됨")
+            raise
+        except Exception as e:
+            logger.error(f"ZMQ 구독 오류: {e}", exc_info=True)
+        finally:
+            logger.info("ZMQ 구독 정리 완료")
+
+    def _push(self, cam_id, msg, received):
+        hub = self.hubs.get(cam_id)
+        if hub is None:
+            # 해제 직전에 받은 프레임은 조용히 버리고, 설정과 다른 cam_id만 알린다
+            if cam_id not in self._known and cam_id not in self._unknown:
+                self._unknown.add(cam_id)
+                logger.warning(f"구독하지 않은 카메라 프레임 무시: {cam_id}")
+            return
+
+        if "shm" in msg:
+            # 공유 메모리 뷰는 디코딩할 것이 없으므로 바로 전달
+            frame = self._shm_frame(cam_id, hub, msg)
+            if frame is not None:
+                self._deliver(cam_id, msg, frame, received, 1.0)
+        else:
+            self._schedule(cam_id, msg, received)
+
+    def _schedule(self, cam_id, msg, received):
+        """디코딩을 맡기거나, 한도에 걸리면 대기 슬롯의 이전 프레임을 밀어낸다"""
+        if self._inflight.get(cam_id, 0) >= self.max_inflight:
+            if cam_id in self._pending:
+                self.skipped += 1
+            self._pending[cam_id] = (msg, received)
+            return
+
+        hub = self.hubs.get(cam_id)
+        if hub is None:
+            return
+        self._inflight[cam_id] = self._inflight.get(cam_id, 0) + 1
+        seq = self._submitted[cam_id] = self._submitted.get(cam_id, 0) + 1
+        scale = self.scales[cam_id] = hub.decode_scale()
+        task = asyncio.create_task(
+            self._decode_and_push(cam_id, msg, received, seq, scale)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
 
+    async def _decode_and_push(self, cam_id, msg, received, seq, scale):
+        loop = asyncio.get_running_loop()
+        try:
+            frame = await loop.run_in_executor(
+                self._pool, _decode, cam_id, msg, DECODE_FLAGS[scale]
+            )
+            if frame is None:
+                logger.warning(f"프레임 디코딩 실패 - 카메라: {cam_id}")
+            elif seq < self._delivered.get(cam_id, 0):
+                # 동시 디코딩 중 더 새 프레임이 먼저 끝난 경우
+                self.skipped += 1
+            elif cam_id in self.hubs:
+                self._delivered[cam_id] = seq
+                self._deliver(cam_id, msg, frame, received, scale)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"프레임 디코딩 오류 - 카메라: {cam_id}, 오류: {e}")
+        finally:
+            self._inflight[cam_id] -= 1
+            pending = self._pending.pop(cam_id, None)
+            if pending is not None and self._pool is not None:
+                self._schedule(cam_id, *pending)
+
+    def _deliver(self, cam_id, msg, frame, received, scale):
+        """완성된 프레임을 허브에 넘긴다 (루프에서는 참조 전달만)"""
+        FRAMES_RECEIVED.labels(cam_id).inc()
+        FRAME_READY.labels(cam_id).observe(time.perf_counter() - received)
+
+        # 생산자 타임스탬프가 없으면 수신 시각으로 대신한다
+        timestamp = msg.get("timestamp") or time.time()
+
+        try:
+            self.hubs[cam_id].push(frame, timestamp, scale)
+        except Exception as e:
+            logger.error(f"프레임 발행 실패: {e}", exc_info=True)
+
+    def _shm_frame(self, cam_id, hub, msg):
+        ring = self.rings.get(cam_id)
+        if ring is None or (ring.name, ring.epoch) != (msg["shm"], msg.get("epoch")):
+            # 첫 프레임이거나 생산자가 재시작해 세그먼트를 다시 만든 경우
+            ring = self._attach(cam_id, hub, msg["shm"])
+            if ring is None:
+                return None
+
+        frame = ring.view(msg.get("slot", -1), msg.get("seq"))
+        if frame is None:
+            self.overruns += 1
+        elif self._retired:
+            # 이전 세그먼트 뷰가 history에서 밀려나면 매핑을 푼다
+            self._close_retired()
+        return frame
+
+    def _attach(self, cam_id, hub, name):
+        old = self.rings.pop(cam_id, None)
+        if old is not None:
+            self._retired.append(old)
+        self._close_retired()
+        try:
+            ring = ShmFrameRing.attach(name)
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning(f"공유 메모리 프레임 링 연결 실패: {cam_id} - {e}")
+            return None
+
+        self.rings[cam_id] = ring
+        if ring.slots <= hub.history.capacity:
+            logger.warning(
+                f"프레임 링 슬롯({ring.slots})이 history({hub.history.capacity})"
+                f"보다 적어 보관 중인 프레임이 덮어써질 수 있음: {cam_id}"
+            )
+        logger.info(
+            f"공유 메모리 프레임 링 연결: {cam_id} ({name}, "
+            f"{ring.width}x{ring.height}, {ring.slots} slots)"
+        )
+        return ring
+
+    def _close_retired(self):
+        self._retired = [ring for ring in self._retired if not ring.close()]
+
+
+def _parse_batch(batch):
+    """워커 스레드: 메시지를 해석해 카메라별 최신 메시지만 남긴다
+
+    (cam_id -> msg, 밀려서 버린 수, 해석 오류 목록)을 반환한다.
+    """
+    latest = {}
+    skipped = 0
+    errors = []
+    for data in batch:
+        try:
+            msg = msgpack.unpackb(data, raw=False)
             cam_id = msg["cam_id"]
-            jpg = msg["jpeg"]
-            np_arr = np.frombuffer(jpg, dtype=np.uint8)
-            frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-
-            for track in list(tracks):
-                try:
-                    await asyncio.wait_for(track.push(frame), timeout=0.1)
-                except asyncio.TimeoutError:
-                    pass
-                except Exception as e:
-                    logger.error(f"트랙 push 실패: {e}", exc_info=True)
-
-    except asyncio.CancelledError:
-        logger.info("ZMQ 구독 작업 취소됨")
-        raise
-    except Exception as e:
-        logger.error(f"ZMQ 구독 오류: {e}", exc_info=True)
-        import traceback
-
-        traceback.print_exc()
-    finally:
-        sub.close()
-        ctx.term()
-        logger.info("ZMQ 구독 정리 완료")
+        except Exception as e:
+            errors.append(e)
+            continue
+        if cam_id in latest:
+            skipped += 1
+        latest[cam_id] = msg
+    return latest, skipped, errors
+
+
+def _decode(cam_id, msg, flags=cv2.IMREAD_COLOR):
+    """워커 스레드: JPEG 디코딩 (OpenCV가 디코딩 중 GIL을 놓는다)"""
+    np_arr = np.frombuffer(msg["jpeg"], dtype=np.uint8)
+    with FRAME_DECODE.labels(cam_id).time():
+        return cv2.imdecode(np_arr, flags)
+
+
+frame_subscriber = FrameSubscriber()
+
+metrics.collect(
+    "smartbow_frames_skipped_total",
+    "Frames dropped because a newer frame of the same camera superseded them",
+    lambda: [((), frame_subscriber.skipped)],
+    kind="counter",
+)
+metrics.collect(
+    "smartbow_frames_shm_overrun_total",
+    "Shared-memory frames overwritten by the producer before they were read",
+    lambda: [((), frame_subscriber.overruns)],
+    kind="counter",
+)
+metrics.collect(
+    "smartbow_frame_decode_scale",
+    "JPEG decode scale of the latest frame (1, 0.5, 0.25, 0.125)",
+    lambda: [((cam_id,), s) for cam_id, s in list(frame_subscriber.scales.items())],
+    ("cam_id",),
+)
+metrics.collect(
+    "smartbow_frame_decode_inflight",
+    "Camera JPEG decodes currently running in the thread pool",
+    lambda: [((cam_id,), n) for cam_id, n in list(frame_subscriber._inflight.items())],
+    ("cam_id",),
+)
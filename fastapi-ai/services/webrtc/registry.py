@@ -0,0 +1,89 @@
+import asyncio, os, logging
+
+from services.cameras import camera_registry
+from services.bus import worker_bus
+from .frame_hub import CameraFrameHub
+from .frame_subscriber import frame_subscriber
+
+logger = logging.getLogger(__name__)
+
+# 마지막 뷰어가 나간 뒤 구독을 유지하는 시간 (새로고침/재접속 흡수)
+LINGER_SEC = float(os.getenv("SMARTBOW_FRAME_LINGER_SEC", "30"))
+
+
+class FrameHubRegistry:
+    """카메라별 프레임 허브와 구독 관리
+
+    담당 카메라는 뷰어와 무관하게 상시 구독하고(적중 판정용 history),
+    다른 워커 담당 카메라는 뷰어가 있는 동안과 그 뒤 LINGER_SEC 동안만 구독한다.
+    구독은 모두 frame_subscriber의 소켓 하나에 연결/해제된다.
+    """
+
+    def __init__(self, linger_sec=LINGER_SEC):
+        self.linger_sec = linger_sec
+        self.hubs = {}
+        self.ports = {}
+        self.teardowns = {}  # cam_id -> 예약된 구독 해제 (TimerHandle)
+
+    def start(self, camera_ports):
+        frame_subscriber.start()
+        for cam_id, port in camera_ports.items():
+            camera = camera_registry.register(cam_id)
+            hub = CameraFrameHub(cam_id, camera.arrow, camera.person)
+            camera.arrow.frame_history = hub.history
+
+            self.hubs[cam_id] = hub
+            self.ports[cam_id] = port
+            if camera.owned:
+                self.acquire(cam_id)
+
+    def acquire(self, cam_id: str):
+        """프레임 구독이 없으면 연결하고, 예약된 해제가 있으면 취소"""
+        teardown = self.teardowns.pop(cam_id, None)
+        if teardown is not None:
+            teardown.cancel()
+            logger.info(f"프레임 구독 해제 취소 - 카메라: {cam_id}")
+        if frame_subscriber.is_connected(cam_id):
+            return
+        frame_subscriber.connect(self.hubs[cam_id], self.ports[cam_id])
+        logger.info(f"프레임 구독 시작 - 카메라: {cam_id}")
+
+    def release(self, cam_id: str):
+        """담당 카메라가 아니고 뷰어도 없으면 linger 후 구독 해제를 예약"""
+        hub = self.hubs.get(cam_id)
+        if hub is None or hub.tracks or worker_bus.owns(cam_id):
+            return
+        if cam_id in self.teardowns or not frame_subscriber.is_connected(cam_id):
+            return
+        loop = asyncio.get_running_loop()
+        self.teardowns[cam_id] = loop.call_later(
+            self.linger_sec, self._teardown, cam_id
+        )
+
+    def _teardown(self, cam_id: str):
+        self.teardowns.pop(cam_id, None)
+        hub = self.hubs.get(cam_id)
+        if hub is None or hub.tracks:
+            return
+        frame_subscriber.disconnect(cam_id)
+        hub.reset()
+        logger.info(f"프레임 구독 중지 - 카메라: {cam_id}")
+
+    def get(self, cam_id: str):
+        return self.hubs.get(cam_id)
+
+    def items(self):
+        return self.hubs.items()
+
+    async def stop(self):
+        for teardown in self.teardowns.values():
+            teardown.cancel()
+        self.teardowns.clear()
+        await frame_subscriber.stop()
+
+        for hub in self.hubs.values():
+            hub.close()
+        self.hubs.clear()
+
+
+frame_hub_registry = FrameHubRegistry()
@@ -0,0 +1,205 @@
+import asyncio, av, logging, os, time
+from aiortc import MediaStreamTrack
+
+from .frame_hub import VIDEO_TIME_BASE
+from .tiers import TIERS, TierSelector
+from services.metrics import TRACK_DROPS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GOP_SEC = 2.0
+# 피어 PLI/FIR로 키프레임을 강제하는 최소 간격 (여러 피어의 요청을 합친다)
+KEYFRAME_MIN_INTERVAL = float(os.getenv("SMARTBOW_KEYFRAME_MIN_INTERVAL", "0.5"))
+
+
+class SharedEncoder:
+    """카메라+티어당 하나의 H.264 인코더
+
+    허브의 티어별 공유 프레임을 한 번만 인코딩하고, 같은 av.Packet을
+    그 티어의 모든 피어 트랙에 전달한다. 피어는 RTP 패킷화만 수행한다.
+    """
+
+    def __init__(self, hub, tier=TIERS[0], gop_sec=DEFAULT_GOP_SEC):
+        self.hub = hub
+        self.tier = tier
+        self.gop_sec = gop_sec
+        self.tracks = set()
+        self._force_keyframe = False
+        self._last_keyframe = -KEYFRAME_MIN_INTERVAL
+        self._task = None
+
+    def attach(self, track):
+        self.tracks.add(track)
+        self.request_keyframe()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def detach(self, track):
+        self.tracks.discard(track)
+        if not self.tracks:
+            self.stop()
+
+    def stop(self):
+        # 코덱은 _run의 지역 상태라 실행 중인 인코딩과 경쟁하지 않는다 -
+        # 취소된 뒤 끝나는 인코딩 결과는 버려지고 코덱도 함께 사라진다
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def fps(self):
+        return min(self.tier.fps, self.hub.fps_limit)
+
+    def request_keyframe(self):
+        self._force_keyframe = True
+
+    def on_picture_loss(self):
+        """피어의 PLI/FIR - 방금 강제한 키프레임이 있으면 그것으로 갈음한다"""
+        if time.monotonic() - self._last_keyframe >= KEYFRAME_MIN_INTERVAL:
+            self._force_keyframe = True
+
+    def encode(self, codec, frame, force_keyframe=False):
+        """VideoFrame 하나를 인코딩해 (코덱, av.Packet 리스트) 반환
+
+        워커 스레드에서 실행되므로 인코더 상태는 건드리지 않고 넘겨받은
+        코덱만 쓴다. 크기가 바뀌었거나 코덱이 없으면 새로 만들어 돌려준다.
+        """
+        if codec is not None and (
+            frame.width != codec.width or frame.height != codec.height
+        ):
+            codec = None
+
+        if codec is None:
+            codec = av.CodecContext.create("libx264", "w")
+            codec.width = frame.width
+            codec.height = frame.height
+            codec.bit_rate = self.tier.bitrate
+            codec.pix_fmt = "yuv420p"
+            codec.framerate = self.fps
+            codec.time_base = VIDEO_TIME_BASE
+            codec.options = {
+                "level": "31",
+                "tune": "zerolatency",
+                "g": str(max(1, int(self.fps * self.gop_sec))),
+            }
+            codec.profile = "Baseline"
+            force_keyframe = True
+
+        # next_frame은 소비자마다 VideoFrame을 새로 만들어 pict_type 설정이 안전하다
+        if force_keyframe:
+            frame.pict_type = av.video.frame.PictureType.I
+        else:
+            frame.pict_type = av.video.frame.PictureType.NONE
+
+        packets = codec.encode(frame)
+        for packet in packets:
+            if packet.pts is None:
+                packet.pts = frame.pts
+            packet.time_base = VIDEO_TIME_BASE
+        return codec, packets
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_seq = 0
+        codec = None
+        try:
+            while self.tracks:
+                frame, last_seq = await self.hub.next_frame(last_seq, self.tier)
+
+                force_keyframe = self._force_keyframe
+                self._force_keyframe = False
+                if force_keyframe:
+                    self._last_keyframe = time.monotonic()
+                try:
+                    codec, packets = await loop.run_in_executor(
+                        None, self.encode, codec, frame, force_keyframe
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"공유 인코딩 실패 - 카메라: {self.hub.cam_id}, 오류: {e}",
+                        exc_info=True,
+                    )
+                    codec = None
+                    continue
+
+                for packet in packets:
+                    for track in list(self.tracks):
+                        track.feed(packet)
+        except asyncio.CancelledError:
+            logger.info(f"공유 인코더 종료 - 카메라: {self.hub.cam_id}")
+            raise
+
+
+class EncodedVideoTrack(MediaStreamTrack):
+    """공유 인코더의 패킷을 그대로 내보내는 피어별 트랙
+
+    티어가 바뀌면 해당 티어의 공유 인코더로 옮겨 붙고 키프레임부터 다시 받는다.
+    """
+
+    kind = "video"
+
+    def __init__(self, hub, selector=None, max_queue=30):
+        super().__init__()
+        self.hub = hub
+        self.selector = selector or TierSelector()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.waiting_keyframe = True
+        self._joined = False
+        self.encoder = hub.get_encoder(self.selector.select(hub.source_size))
+        self.encoder.attach(self)
+
+    @property
+    def tier(self):
+        return self.encoder.tier
+
+    def feed(self, packet):
+        # 참여 직후/패킷 유실 후에는 키프레임부터 받아야 디코딩 가능
+        if self.waiting_keyframe:
+            if not packet.is_keyframe:
+                return
+            self.waiting_keyframe = False
+
+        if self.queue.full():
+            # 뒤처진 피어: 큐를 비우고 다음 키프레임부터 재개
+            TRACK_DROPS.labels(self.encoder.hub.cam_id).inc(self.queue.qsize() + 1)
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.waiting_keyframe = True
+            self.encoder.request_keyframe()
+            return
+
+        self.queue.put_nowait(packet)
+
+    async def recv(self):
+        if not self._joined:
+            # 송신 시작 시점에 키프레임을 요청해 첫 화면을 바로 띄운다
+            self._joined = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.waiting_keyframe = True
+            self.encoder.request_keyframe()
+
+        tier = self.selector.select(self.hub.source_size)
+        if tier is not self.encoder.tier:
+            self._switch(tier)
+        return await self.queue.get()
+
+    def request_keyframe(self):
+        """수신 측 PLI/FIR (aiortc 인코더를 거치지 않으므로 직접 전달)"""
+        self.encoder.on_picture_loss()
+
+    def _switch(self, tier):
+        logger.info(
+            f"티어 변경 - 카메라: {self.hub.cam_id}, "
+            f"{self.encoder.tier.name} → {tier.name} (REMB: {self.selector.estimate})"
+        )
+        self.encoder.detach(self)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.waiting_keyframe = True
+        self.encoder = self.hub.get_encoder(tier)
+        self.encoder.attach(self)
+
+    def stop(self):
+        super().stop()
+        self.encoder.detach(self)
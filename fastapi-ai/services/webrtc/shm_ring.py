@@ -0,0 +1,176 @@
+"""카메라 프레임 공유 메모리 링
+
+같은 호스트의 추론 프로세스(생산자)가 원본 BGR 프레임을 카메라별 공유
+메모리 링에 쓰고, ZMQ로는 작은 알림(slot, seq)만 보낸다. 수신 측은 JPEG
+인코딩/TCP 복사/디코딩 없이 슬롯을 NumPy 뷰로 바로 참조한다.
+
+세그먼트 구조 (리틀 엔디언):
+    헤더  HEADER (magic, version, channels, slots, width, height, slot_bytes, epoch)
+    슬롯  SLOT_HEADER (seq, timestamp, width, height) + 픽셀 (slot_bytes)
+
+슬롯은 seqlock처럼 쓴다 - 생산자는 쓰기 전에 seq를 홀수로, 다 쓴 뒤 짝수로
+올리고 알림에 짝수 seq를 싣는다. 수신 측은 슬롯 seq가 알림과 같을 때만 뷰를
+만들고, 다르면 이미 덮어쓴 것이므로 버린다. 뷰는 생산자가 링을 한 바퀴 돌아
+같은 슬롯을 다시 쓰기 전까지만 유효하므로 slots는 수신 측 history 크기보다
+커야 한다. 생산자가 재시작해 세그먼트를 다시 만들면 epoch가 바뀐다.
+
+원격 생산자는 기존 msgpack JPEG 메시지를 그대로 보내면 된다.
+"""
+
+import os, struct, numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+MAGIC = b"SBFR"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIIIIQ")
+SLOT_HEADER = struct.Struct("<QdII")
+ALIGN = 64
+
+# 생산자 기본 슬롯 수 (수신 측 FrameHistory 8장 + 처리 중 여유)
+DEFAULT_SLOTS = int(os.getenv("SMARTBOW_SHM_SLOTS", "12"))
+
+
+def segment_name(cam_id):
+    return f"smartbow_frames_{cam_id}"
+
+
+def _aligned(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+class ShmFrameRing:
+    """공유 메모리 프레임 링 (생산자는 create, 수신 측은 attach)"""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        magic, version, channels, slots, width, height, slot_bytes, epoch = (
+            HEADER.unpack_from(shm.buf, 0)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"프레임 링이 아님: {shm.name}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 프레임 링 버전: {version}")
+        self.channels = channels
+        self.slots = slots
+        self.width = width
+        self.height = height
+        self.slot_bytes = slot_bytes
+        self.epoch = epoch
+        self._stride = _aligned(SLOT_HEADER.size) + _aligned(slot_bytes)
+        self._base = _aligned(HEADER.size)
+        self._next = 0
+        self._seq = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def create(cls, name, width, height, channels=3, slots=DEFAULT_SLOTS):
+        slot_bytes = width * height * channels
+        stride = _aligned(SLOT_HEADER.size) + _aligned(slot_bytes)
+        size = _aligned(HEADER.size) + stride * slots
+        try:
+            # 이전 생산자가 남긴 세그먼트는 크기가 다를 수 있으므로 새로 만든다
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        epoch = int.from_bytes(os.urandom(8), "little")
+        HEADER.pack_into(
+            shm.buf,
+            0,
+            MAGIC,
+            FORMAT_VERSION,
+            channels,
+            slots,
+            width,
+            height,
+            slot_bytes,
+            epoch,
+        )
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: 수신 측 종료 시 resource_tracker가 생산자의
+            # 세그먼트를 지우지 않도록 추적에서 뺀다
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    def _slot_offset(self, slot):
+        return self._base + self._stride * slot
+
+    def write(self, frame, timestamp):
+        """프레임을 다음 슬롯에 복사하고 알림용 (slot, seq) 반환 (생산자)"""
+        height, width = frame.shape[:2]
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise ValueError(f"링 슬롯에 맞지 않는 프레임: {frame.shape}")
+
+        slot = self._next
+        self._next = (slot + 1) % self.slots
+        self._seq += 2
+        offset = self._slot_offset(slot)
+        SLOT_HEADER.pack_into(self.shm.buf, offset, self._seq - 1, 0.0, 0, 0)
+
+        data = offset + _aligned(SLOT_HEADER.size)
+        target = np.frombuffer(self.shm.buf, np.uint8, frame.size, data)
+        target.reshape(frame.shape)[...] = frame
+        del target
+
+        SLOT_HEADER.pack_into(self.shm.buf, offset, self._seq, timestamp, width, height)
+        return slot, self._seq
+
+    def notification(self, cam_id, slot, seq, timestamp):
+        """ZMQ로 보낼 알림 메시지 (msgpack 직렬화 전 dict)"""
+        return {
+            "cam_id": cam_id,
+            "timestamp": timestamp,
+            "shm": self.name,
+            "epoch": self.epoch,
+            "slot": slot,
+            "seq": seq,
+        }
+
+    def view(self, slot, seq):
+        """슬롯 프레임의 읽기 전용 NumPy 뷰 (복사 없음), 덮어써졌으면 None"""
+        if not 0 <= slot < self.slots:
+            return None
+        offset = self._slot_offset(slot)
+        current, _, width, height = SLOT_HEADER.unpack_from(self.shm.buf, offset)
+        if current != seq:
+            return None
+        # frombuffer는 buf를 export로 잡고 있어 뷰가 살아 있는 동안 close가 실패한다
+        # (np.ndarray(buffer=...)는 잡지 않아 해제된 메모리를 가리킬 수 있음)
+        data = np.frombuffer(
+            self.shm.buf,
+            np.uint8,
+            height * width * self.channels,
+            offset + _aligned(SLOT_HEADER.size),
+        )
+        frame = data.reshape(height, width, self.channels)
+        frame.flags.writeable = False
+        return frame
+
+    def close(self):
+        """매핑 해제, 생산자는 세그먼트도 지운다
+
+        뷰가 남아 있으면 매핑은 유지되고(BufferError) 마지막 뷰와 함께 풀린다.
+        """
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        try:
+            self.shm.close()
+        except BufferError:
+            return False
+        return True
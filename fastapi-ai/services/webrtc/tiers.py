@@ -0,0 +1,121 @@
+import os, time
+
+
+class Tier:
+    """출력 품질 단계 - 같은 티어의 뷰어는 프레임(공유 인코더 모드면 패킷)을 공유한다"""
+
+    __slots__ = ("name", "scale", "fps", "bitrate")
+
+    def __init__(self, name, scale, fps, bitrate):
+        self.name = name
+        self.scale = scale  # 렌더링된 소스 프레임 대비 배율
+        self.fps = fps
+        self.bitrate = bitrate  # 이 티어를 유지하는 데 필요한 대역폭 (bps)
+
+    def __repr__(self):
+        return f"Tier({self.name}, x{self.scale}, {self.fps}fps, {self.bitrate}bps)"
+
+
+# 품질 높은 순
+TIERS = (
+    Tier("high", 1.0, 20, 2_000_000),
+    Tier("medium", 0.5, 15, 800_000),
+    Tier("low", 0.25, 10, 300_000),
+)
+
+ADAPTIVE = os.getenv("SMARTBOW_ADAPTIVE_TIERS", "1") == "1"
+
+# 시작 직후 REMB는 낮게 출발해 올라가므로 이 동안은 판단하지 않는다
+STARTUP_GRACE_SEC = 3.0
+# 티어를 바꾼 뒤 송신률/REMB가 새 티어에 맞춰질 때까지 기다리는 시간
+SETTLE_SEC = 2.0
+# REMB가 실제 송신률보다 이만큼 낮으면 혼잡으로 보고 한 단계 내린다
+DOWNGRADE_RATIO = 0.85
+# REMB는 수신률의 약 1.5배까지만 오르므로, 여유 비율이 유지되면 한 단계 올려 본다
+UPGRADE_RATIO = 1.3
+UPGRADE_HOLD_SEC = 5.0
+MAX_UPGRADE_HOLD_SEC = 60.0
+
+
+class TierSelector:
+    """뷰어별 티어 선택
+
+    렌더 크기(오퍼의 video_size)로 가장 높은 티어의 상한을 정하고,
+    REMB 대역폭 추정치를 실제 송신률과 비교해 혼잡하면 즉시 한 단계 내린다.
+    여유가 UPGRADE_HOLD_SEC 동안 유지되면 한 단계 올려 보고, 올린 직후
+    다시 혼잡해지면 다음 시도까지의 대기 시간을 두 배로 늘린다.
+    """
+
+    def __init__(self, render_size=None, tiers=TIERS, clock=time.monotonic):
+        self.render_size = render_size
+        self.tiers = tiers
+        self.clock = clock
+        self.index = 0 if ADAPTIVE else None
+        self.estimate = None  # 최근 REMB (bps)
+        self.send_rate = None  # 같은 시점의 실제 송신률 (bps)
+        self.upgrade_hold = UPGRADE_HOLD_SEC
+
+        self._fresh = False
+        self._settle_until = clock() + STARTUP_GRACE_SEC
+        self._upgraded_at = None
+        self._headroom_since = None
+
+    @property
+    def tier(self):
+        return self.tiers[self.index or 0]
+
+    def update_bitrate(self, estimate, send_rate=None):
+        self.estimate = estimate
+        self.send_rate = send_rate
+        self._fresh = True
+
+    def select(self, source_size=None):
+        """현재 소스 크기와 최근 REMB로 티어를 갱신해 반환"""
+        if self.index is None:
+            return self.tiers[0]
+
+        now = self.clock()
+        cap = self._size_index(source_size)
+        if self.index < cap:
+            self._change(cap, now)
+            return self.tier
+
+        if not self._fresh or now < self._settle_until or not self.send_rate:
+            return self.tier
+        self._fresh = False
+
+        if self.estimate < self.send_rate * DOWNGRADE_RATIO:
+            if self.index < len(self.tiers) - 1:
+                if self._upgraded_at is not None and (
+                    now - self._upgraded_at < self.upgrade_hold
+                ):
+                    # 올려 본 티어를 감당하지 못함
+                    self.upgrade_hold = min(self.upgrade_hold * 2, MAX_UPGRADE_HOLD_SEC)
+                self._change(self.index + 1, now)
+            self._upgraded_at = None
+        elif self.estimate >= self.send_rate * UPGRADE_RATIO and self.index > cap:
+            if self._headroom_since is None:
+                self._headroom_since = now
+            elif now - self._headroom_since >= self.upgrade_hold:
+                self._change(self.index - 1, now)
+                self._upgraded_at = now
+        else:
+            self._headroom_since = None
+        return self.tier
+
+    def _change(self, index, now):
+        self.index = index
+        self._headroom_since = None
+        self._settle_until = now + SETTLE_SEC
+
+    def _size_index(self, source_size):
+        # 표시 크기보다 작아지지 않는 가장 낮은 티어
+        if self.render_size is None or source_size is None:
+            return 0
+        render_w, render_h = self.render_size
+        source_w, source_h = source_size
+        index = 0
+        for i, tier in enumerate(self.tiers):
+            if source_w * tier.scale >= render_w and source_h * tier.scale >= render_h:
+                index = i
+        return index
@@ -1,69 +1,39 @@
-import asyncio, cv2, time
 from aiortc import VideoStreamTrack
-from av import VideoFrame
+from services.metrics import TRACK_RECV, TRACK_DROPS
+from .tiers import TierSelector
+import time, logging
+
+logger = logging.getLogger(__name__)
 
 
 class CameraVideoTrack(VideoStreamTrack):
-    def __init__(self, arrow_service, person_service):
+    def __init__(self, hub, selector=None):
         super().__init__()
-        self.queue = asyncio.Queue(maxsize=2)
-        self.arrow_service = arrow_service
-        self.person_service = person_service
-        self.last_frame_time = 0
-        self.fps_limit = 20
-
-    async def push(self, frame):
-        if self.queue.full():
-            try:
-                self.queue.get_nowait()
-            except:
-                pass
-        await self.queue.put(frame)
+        self.hub = hub
+        self.selector = selector or TierSelector()
+        self.tier = self.selector.select(hub.source_size)
+        self.last_seq = 0
+        self._recv_hist = TRACK_RECV.labels(hub.cam_id)
+        self._drops = TRACK_DROPS.labels(hub.cam_id)
 
     async def recv(self):
-        frame = await self.queue.get()
-
-        now = time.time()
-        elapsed = now - self.last_frame_time
-        target_delay = 1.0 / self.fps_limit
-
-        if elapsed < target_delay:
-            await asyncio.sleep(target_delay - elapsed)
-
-        self.last_frame_time = time.time()
-
-        frame = frame.copy()
-        self.arrow_service.last_frame = (
-            frame.copy()
-        )  # 화살 위치 디버그용 추후 서비스 안정화되면 제거
-
-        zoom_bbox = self.person_service.get_zoom_area()
-        if zoom_bbox:
-            x1, y1, x2, y2 = map(int, zoom_bbox)
-
-            h, w = frame.shape[:2]
-
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-
-            zoom_scale = 2.0
-
-            crop_w = int(w / zoom_scale)
-            crop_h = int(h / zoom_scale)
-
-            crop_x1 = max(0, center_x - crop_w // 2)
-            crop_y1 = max(0, center_y - crop_h // 2)
-            crop_x2 = min(w, crop_x1 + crop_w)
-            crop_y2 = min(h, crop_y1 + crop_h)
-
-            cropped = frame[crop_y1:crop_y2, crop_x1:crop_x2]
-
-            frame = cv2.resize(cropped, (w, h), interpolation=cv2.INTER_LANCZOS4)
-
-        if self.arrow_service.last_bbox:
-            x1, y1, x2, y2 = map(int, self.arrow_service.last_bbox)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-        av_frame = VideoFrame.from_ndarray(frame, format="bgr24")
-        av_frame.pts, av_frame.time_base = await self.next_timestamp()
-        return av_frame
+        tier = self.selector.select(self.hub.source_size)
+        if tier is not self.tier:
+            logger.info(
+                f"티어 변경 - 카메라: {self.hub.cam_id}, "
+                f"{self.tier.name} → {tier.name} (REMB: {self.selector.estimate})"
+            )
+            # 티어마다 발행 순번이 따로 매겨진다
+            self.tier = tier
+            self.last_seq = 0
+
+        started = time.perf_counter()
+        # 티어별 공유 픽셀을 감싼 뷰어 전용 VideoFrame (픽셀 복사/변환 없음)
+        frame, seq = await self.hub.next_frame(self.last_seq, tier)
+        self._recv_hist.observe(time.perf_counter() - started)
+
+        # 인코딩이 발행 속도를 못 따라가 건너뛴 프레임
+        if self.last_seq and seq > self.last_seq + 1:
+            self._drops.inc(seq - self.last_seq - 1)
+        self.last_seq = seq
+        return frame
@@ -0,0 +1,95 @@
+import cv2, os
+
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "area": cv2.INTER_AREA,
+    "cubic": cv2.INTER_CUBIC,
+    "lanczos": cv2.INTER_LANCZOS4,
+}
+
+# full: 원본 해상도로 업스케일 / reduced: output_scale 배율로 출력
+# native: crop 그대로 전송 (업스케일은 클라이언트 <video>가 담당)
+ZOOM_MODES = ("full", "reduced", "native")
+
+ZOOM_MODE = os.getenv("SMARTBOW_ZOOM_MODE", "full")
+# 기본은 기존 화질(Lanczos), "linear" 등은 속도가 필요할 때 opt-in
+ZOOM_INTERPOLATION = os.getenv("SMARTBOW_ZOOM_INTERPOLATION", "lanczos")
+ZOOM_OUTPUT_SCALE = float(os.getenv("SMARTBOW_ZOOM_OUTPUT_SCALE", "0.5"))
+ZOOM_SMOOTHING = float(os.getenv("SMARTBOW_ZOOM_SMOOTHING", "0.3"))
+
+
+def even(value):
+    return max(2, int(value) & ~1)
+
+
+class ZoomPipeline:
+    """사람 줌 파이프라인
+
+    소스 프레임당 한 번 crop 창을 계산하고(EMA로 흔들림 완화),
+    모드에 따라 원본/축소 해상도로 리사이즈하거나 crop을 그대로 내보낸다.
+    """
+
+    def __init__(
+        self,
+        zoom_scale=2.0,
+        mode=ZOOM_MODE,
+        interpolation=ZOOM_INTERPOLATION,
+        output_scale=ZOOM_OUTPUT_SCALE,
+        smoothing=ZOOM_SMOOTHING,
+    ):
+        if mode not in ZOOM_MODES:
+            raise ValueError(f"unknown zoom mode: {mode}")
+        self.zoom_scale = zoom_scale
+        self.mode = mode
+        self.interpolation = INTERPOLATIONS[interpolation]
+        self.output_scale = output_scale
+        self.smoothing = smoothing
+        self._center = None
+
+    def reset(self):
+        self._center = None
+
+    def apply(self, image, zoom_bbox, scale=1.0):
+        """(출력 프레임, 변환) 반환 - 변환은 입력 좌표를 출력 좌표로 옮기는 (x0, y0, sx, sy)
+
+        zoom_bbox는 원본 좌표이고, image가 축소 디코딩된 프레임이면 scale이
+        그 배율이다. crop 중심 EMA는 원본 좌표로 유지해 배율이 바뀌어도 튀지 않는다.
+        """
+        if not zoom_bbox:
+            self.reset()
+            return image, None
+
+        h, w = image.shape[:2]
+        x1, y1, x2, y2 = map(int, zoom_bbox)
+        target = ((x1 + x2) / 2, (y1 + y2) / 2)
+
+        if self._center is None:
+            self._center = target
+        else:
+            cx, cy = self._center
+            self._center = (
+                cx + (target[0] - cx) * self.smoothing,
+                cy + (target[1] - cy) * self.smoothing,
+            )
+
+        crop_w = even(min(w, w / self.zoom_scale))
+        crop_h = even(min(h, h / self.zoom_scale))
+        center_x, center_y = self._center[0] * scale, self._center[1] * scale
+
+        # 가장자리에서도 crop 크기가 줄지 않도록 창을 안쪽으로 민다
+        crop_x1 = min(max(0, int(center_x - crop_w / 2)), w - crop_w)
+        crop_y1 = min(max(0, int(center_y - crop_h / 2)), h - crop_h)
+
+        cropped = image[crop_y1 : crop_y1 + crop_h, crop_x1 : crop_x1 + crop_w]
+
+        if self.mode == "native":
+            return cropped, (crop_x1, crop_y1, 1.0, 1.0)
+
+        if self.mode == "full":
+            out_w, out_h = w, h
+        else:
+            out_w, out_h = even(w * self.output_scale), even(h * self.output_scale)
+
+        frame = cv2.resize(cropped, (out_w, out_h), interpolation=self.interpolation)
+        return frame, (crop_x1, crop_y1, out_w / crop_w, out_h / crop_h)
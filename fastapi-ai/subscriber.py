@@ -1,22 +1,127 @@
-import zmq, threading
+import zmq, zmq.asyncio, asyncio, time, logging
 
+from services.events import InferenceEvent, decode_event
+from services.metrics import EVENT_AGE, EVENT_HANDLE
 
-def start_subscriber_thread(port, cam_id, callback):
+logger = logging.getLogger("smartbow.subscriber")
 
-    def run():
-        ctx = zmq.Context()
-        socket = ctx.socket(zmq.SUB)
+
+class PortStats:
+    __slots__ = (
+        "received",
+        "batches",
+        "max_batch",
+        "backlogged",
+        "decode_errors",
+        "callback_errors",
+    )
+
+    def __init__(self):
+        self.received = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.backlogged = 0  # 배치 한도까지 꽉 채워 읽은 횟수 (생산 속도 > 소비 속도)
+        self.decode_errors = 0
+        self.callback_errors = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class InferenceSubscriber:
+    """추론 이벤트 수신기
+
+    모든 ARROW/PERSON 추론 포트를 공유 컨텍스트의 단일 asyncio poller로
+    다중화하고, 준비된 소켓은 NOBLOCK 루프로 배치 단위로 비운다.
+    이벤트는 소켓별로 미리 할당한 InferenceEvent 레코드에 디코딩된다.
+    콜백은 앱 이벤트 루프에서 호출되므로 별도 락이 필요 없다.
+    """
+
+    def __init__(self, batch_size=64, rcvhwm=1000):
+        self.ctx = zmq.asyncio.Context.instance()
+        self.poller = zmq.asyncio.Poller()
+        self.batch_size = batch_size
+        self.rcvhwm = rcvhwm
+        self.sockets = {}  # socket -> (port, cam_id, callback, record)
+        self.stats = {}  # port -> PortStats
+        self._task = None
+
+    def add(self, port, cam_id, callback):
+        socket = self.ctx.socket(zmq.SUB)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.setsockopt(zmq.RCVHWM, self.rcvhwm)
         socket.connect(f"tcp://127.0.0.1:{port}")
-        socket.subscribe("")
-        print(f"[SUB] Connected → cam={cam_id}, port={port}")
+        socket.setsockopt_string(zmq.SUBSCRIBE, "")
+
+        self.sockets[socket] = (port, cam_id, callback, InferenceEvent())
+        self.stats[port] = PortStats()
+        self.poller.register(socket, zmq.POLLIN)
+        logger.info(f"[SUB] 연결 → 카메라: {cam_id}, 포트: {port}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for socket in list(self.sockets):
+            self.poller.unregister(socket)
+            socket.close()
+        self.sockets.clear()
+
+    async def _run(self):
+        try:
+            while True:
+                events = await self.poller.poll()
+                for socket, _ in events:
+                    await self._drain(socket)
+                # 백로그가 있어도 다른 코루틴(WS, WebRTC)이 돌 수 있게 양보
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            logger.info("[SUB] 추론 이벤트 수신 종료")
+            raise
+
+    async def _drain(self, socket):
+        port, cam_id, callback, record = self.sockets[socket]
+        stats = self.stats[port]
+        handle_hist = EVENT_HANDLE.labels(cam_id)
+        age_hist = EVENT_AGE.labels(cam_id)
+
+        count = 0
+        while count < self.batch_size:
+            try:
+                frames = await socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            count += 1
+            received_at = time.perf_counter()
+
+            try:
+                event = decode_event(frames[-1], record)
+            except Exception as e:
+                stats.decode_errors += 1
+                logger.debug(f"[SUB] 디코딩 실패({cam_id}): {e}")
+                continue
 
-        while True:
             try:
-                event = socket.recv_json()
                 callback(cam_id, event)
             except Exception as e:
-                print(f"[SUB] Error({cam_id}):", e)
+                stats.callback_errors += 1
+                logger.error(f"[SUB] 처리 오류({cam_id}): {e}", exc_info=True)
+                continue
+
+            handle_hist.observe(time.perf_counter() - received_at)
+            if event.timestamp:
+                age_hist.observe(max(0.0, time.time() - event.timestamp))
 
-    thread = threading.Thread(target=run, daemon=True)
-    thread.start()
-    return thread
+        stats.received += count
+        stats.batches += 1
+        stats.max_batch = max(stats.max_batch, count)
+        if count == self.batch_size:
+            stats.backlogged += 1
@@ -0,0 +1,141 @@
+import numpy as np
+
+from services.arrow.clock import NS
+from services.arrow.estimators import TrajectoryFitEstimator
+from services.arrow.service import (
+    ArrowService,
+    HIT,
+    HIT_PROVISIONAL,
+    IMPACT,
+    TRACKING,
+)
+from services.events import InferenceEvent
+
+T0 = 1000.0
+FLIGHT = [(300, 100), (302, 140), (304, 180), (306, 220), (307, 240)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = int(T0 * NS)
+
+    def __call__(self):
+        return self.now
+
+
+def _service(streaming=False):
+    clock = FakeClock()
+    service = ArrowService(
+        cam_id="cam",
+        clock=clock,
+        estimator=TrajectoryFitEstimator(),
+        streaming=streaming,
+    )
+    return service, clock
+
+
+def _feed(service, clock, tips, start=0):
+    for i, (x, y) in enumerate(tips, start):
+        t = T0 + i / 30
+        clock.now = int(t * NS)
+        event = InferenceEvent().load_dict(
+            {
+                "type": "arrow",
+                "timestamp": t,
+                "tip": (x, y),
+                "bbox": (x - 10, y - 10, x + 10, y + 10),
+                "conf": 0.9,
+            }
+        )
+        service.add_event(event)
+
+
+def test_identical_tips_arm_settle_deadline():
+    service, clock = _service()
+    _feed(service, clock, FLIGHT)
+    assert service.deadline_ns == service.last_event_ns + service.idle_ns
+
+    # 꽂힌 화살은 같은 좌표로 계속 검출되고, 모두 중복 제거된다
+    _feed(service, clock, [FLIGHT[-1]] * 3, start=len(FLIGHT))
+    assert len(service.tracking_buffer) == len(FLIGHT)
+    assert service.state == TRACKING
+    assert service.deadline_ns == service.last_event_ns + service.settle_ns
+
+    result = service.advance(service.deadline_ns, visualize=False)
+    assert result is not None
+    hit_type, tip = result
+    assert hit_type == HIT
+    assert abs(tip[0] - 307) < 3 and abs(tip[1] - 240) < 3
+
+
+def test_small_jitter_stop_arms_settle_deadline():
+    service, clock = _service()
+    _feed(service, clock, FLIGHT)
+    jitter = [(308, 238), (305, 242), (309, 241), (306, 237)]
+    _feed(service, clock, jitter, start=len(FLIGHT))
+    assert service.deadline_ns == service.last_event_ns + service.settle_ns
+
+
+def test_stationary_detections_do_not_extend_idle():
+    service, clock = _service()
+    _feed(service, clock, FLIGHT)
+    deadline = service.deadline_ns
+    # 계속 검출돼도 데드라인은 앞당겨질 뿐 늦춰지지 않는다
+    _feed(service, clock, [FLIGHT[-1]] * 60, start=len(FLIGHT))
+    assert service.deadline_ns <= deadline
+
+
+def test_moving_arrow_keeps_idle_deadline():
+    service, clock = _service()
+    _feed(service, clock, FLIGHT[:3])
+    _feed(service, clock, [FLIGHT[2]], start=3)  # 한 번만 제자리
+    assert service.deadline_ns == service.last_event_ns + service.idle_ns
+
+
+def test_identical_tips_trigger_streaming_impact():
+    service, clock = _service(streaming=True)
+    _feed(service, clock, FLIGHT)
+    assert service.state == TRACKING
+
+    # 중복 제거된 검출도 증분 궤적에 들어가 속도 붕괴로 충돌을 잡는다
+    _feed(service, clock, [FLIGHT[-1]], start=len(FLIGHT))
+    assert service.state == IMPACT
+
+    result = service.advance(service.deadline_ns, visualize=False)
+    assert result is not None
+    assert result[0] == HIT_PROVISIONAL
+
+
+def test_add_event_reports_accepted_samples():
+    service, clock = _service()
+    _feed(service, clock, FLIGHT)
+    event = InferenceEvent().load_dict(
+        {"type": "arrow", "timestamp": T0 + 1, "tip": FLIGHT[-1], "bbox": (0, 0, 1, 1)}
+    )
+    assert service.add_event(event) is False  # 중복 제거
+    event.tip = (400, 400)
+    assert service.add_event(event) is True
+    assert service.add_event(InferenceEvent()) is False
+
+
+def _rows(tips):
+    rows = np.zeros(len(tips), dtype=[("x", "f8"), ("y", "f8"), ("t", "f8")])
+    for i, (x, y) in enumerate(tips):
+        rows[i] = (x, y, T0 + i / 30)
+    return rows
+
+
+def test_slow_tail_is_not_impact():
+    estimator = TrajectoryFitEstimator()
+    # 끝의 느린 검출 두 개만으로는 충돌로 보지 않는다
+    assert not estimator.stopped(_rows(FLIGHT + [(308, 250), (309, 258)]))
+    # 속도가 붕괴한 뒤 min_stuck개 이상 머물러야 충돌
+    rested = FLIGHT + [(308, 246), (306, 238), (309, 244)]
+    assert estimator.stopped(_rows(rested))
+
+
+def test_steady_slow_flight_is_not_impact():
+    estimator = TrajectoryFitEstimator()
+    # 처음부터 느린 비행은 stuck_px 안에 있어도 속도 붕괴가 아니다
+    slow = [(300, 100 + 8 * i) for i in range(8)]
+    assert not estimator.stopped(_rows(slow))
@@ -0,0 +1,79 @@
+import numpy as np, pytest
+
+from services.arrow.buffer import TrackingBuffer
+
+
+def _append(buffer, i):
+    buffer.append(i, i * 10, 100.0 + i, i, i, i + 20, i + 20, 0.5, crop=f"crop{i}")
+
+
+def test_capacity_must_hold_two_samples():
+    with pytest.raises(ValueError):
+        TrackingBuffer(capacity=1)
+
+
+def test_empty_buffer():
+    buffer = TrackingBuffer(capacity=4)
+
+    assert len(buffer) == 0
+    assert not buffer
+    assert buffer.last() is None
+    assert len(buffer.view()) == 0
+    assert buffer.crops() == []
+    assert buffer.tips().shape == (0, 2)
+
+
+def test_partial_fill_is_a_view_in_time_order():
+    buffer = TrackingBuffer(capacity=4)
+    for i in range(3):
+        _append(buffer, i)
+
+    view = buffer.view()
+    assert len(buffer) == 3
+    # 랩어라운드가 없으면 내부 배열을 복사하지 않는다
+    assert np.shares_memory(view, buffer._data)
+    assert view["t"].tolist() == [100.0, 101.0, 102.0]
+    assert buffer.last()["x"] == 2
+    assert buffer.crops() == ["crop0", "crop1", "crop2"]
+
+
+def test_overwrites_oldest_when_full():
+    buffer = TrackingBuffer(capacity=4)
+    for i in range(6):
+        _append(buffer, i)
+
+    assert len(buffer) == 4
+    assert buffer.view()["x"].tolist() == [2, 3, 4, 5]
+    assert buffer.crops() == ["crop2", "crop3", "crop4", "crop5"]
+    assert buffer.last()["t"] == 105.0
+
+
+@pytest.mark.parametrize("count", range(4, 13))
+def test_wraparound_reads_in_time_order(count):
+    capacity = 4
+    buffer = TrackingBuffer(capacity=capacity)
+    for i in range(count):
+        _append(buffer, i)
+
+    expected = list(range(count - capacity, count))
+    view = buffer.view()
+    assert view["x"].tolist() == expected
+    assert view["t"].tolist() == [100.0 + i for i in expected]
+    assert np.all(np.diff(view["t"]) > 0)
+    assert buffer.tips().tolist() == [[i, i * 10] for i in expected]
+    assert buffer.crops() == [f"crop{i}" for i in expected]
+    assert buffer.last()["x"] == count - 1
+
+
+def test_clear_resets_head_and_crops():
+    buffer = TrackingBuffer(capacity=4)
+    for i in range(6):
+        _append(buffer, i)
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer._crops == [None] * 4
+
+    _append(buffer, 7)
+    assert buffer.view()["x"].tolist() == [7]
+    assert buffer.crops() == ["crop7"]
@@ -0,0 +1,60 @@
+from services.arrow.service import ArrowService
+from services.events import EventEncoder, InferenceEvent, decode_event
+
+TARGET = [[812, 204], [1105, 210], [1112, 640], [805, 633]]
+
+
+def _encode(encoder, i):
+    y = 300 + 10 * i
+    return encoder.encode(
+        "arrow", 1000.0 + i / 30, tip=(950.0, y), bbox=(940, y - 10, 960, y + 10)
+    )
+
+
+def _carried(encoder, count):
+    record = InferenceEvent()
+    return [
+        i
+        for i in range(count)
+        if decode_event(_encode(encoder, i), record).target is not None
+    ]
+
+
+def test_target_resent_periodically():
+    encoder = EventEncoder(resend_every=10, resend_sec=60.0)
+    encoder.set_target(TARGET)
+    assert _carried(encoder, 25) == [0, 10, 20]
+
+
+def test_target_resent_by_time():
+    encoder = EventEncoder(resend_every=1000, resend_sec=0.5)
+    encoder.set_target(TARGET)
+    assert _carried(encoder, 40) == [0, 15, 30]
+
+
+def test_unchanged_target_keeps_version():
+    encoder = EventEncoder()
+    assert encoder.set_target(TARGET)
+    assert not encoder.set_target([list(p) for p in TARGET])
+    assert encoder.target_version == 1
+    assert encoder.set_target(TARGET[:3])
+    assert encoder.target_version == 2
+
+
+def test_late_subscriber_recovers_target_from_resend():
+    encoder = EventEncoder(resend_every=5, resend_sec=60.0)
+    encoder.set_target(TARGET)
+    _encode(encoder, 0)  # 구독 전에 나간 변경 메시지
+
+    service = ArrowService(cam_id="cam", streaming=False)
+    record = InferenceEvent()
+    for i in range(1, 5):
+        service.add_event(decode_event(_encode(encoder, i), record))
+    # 버전은 알지만 좌표가 아직 없다 - 재전송까지 타깃 없음
+    assert service.target is None
+    assert service._missing_target_version == 1
+
+    service.add_event(decode_event(_encode(encoder, 5), record))
+    assert service.target_version == 1
+    assert service.target.tolist() == TARGET
+    assert service._missing_target_version is None
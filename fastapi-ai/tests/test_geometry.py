@@ -0,0 +1,148 @@
+import cv2, numpy as np, pytest
+
+from services.arrow.geometry import TargetGeometry
+from services.arrow.service import ArrowService
+
+POLYGONS = {
+    "rect": [(100, 100), (400, 100), (400, 300), (100, 300)],
+    # 원근 때문에 기울어진 타깃
+    "skewed": [(120, 90), (410, 130), (380, 320), (90, 280)],
+    "concave": [(100, 100), (300, 100), (200, 200), (300, 300), (100, 300)],
+    # 꼭짓점이 겹친 (길이 0인 변) 폴리곤
+    "duplicate": [(100, 100), (400, 100), (400, 100), (400, 300), (100, 300)],
+}
+
+
+def _baseline_contains(polygon, point):
+    return cv2.pointPolygonTest(polygon, [float(point[0]), float(point[1])], False) >= 0
+
+
+def _baseline_closest(point, polygon):
+    """벡터화 이전 find_hit_point의 변 단위 루프"""
+    px, py = point
+    min_dist = float("inf")
+    closest_point = None
+
+    for i in range(len(polygon)):
+        p1 = polygon[i]
+        p2 = polygon[(i + 1) % len(polygon)]
+        x1, y1 = float(p1[0]), float(p1[1])
+        x2, y2 = float(p2[0]), float(p2[1])
+        dx = x2 - x1
+        dy = y2 - y1
+        if dx == 0 and dy == 0:
+            continue
+        t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)))
+        closest_x = x1 + t * dx
+        closest_y = y1 + t * dy
+        dist = np.sqrt((px - closest_x) ** 2 + (py - closest_y) ** 2)
+        if dist < min_dist:
+            min_dist = dist
+            closest_point = (closest_x, closest_y)
+
+    return closest_point, min_dist
+
+
+def _baseline_pull(point, polygon, distance):
+    """벡터화 이전의 무게중심 방향 보정 (방향 벡터 정규화 포함)"""
+    closest_x, closest_y = point
+    M = cv2.moments(polygon)
+    if M["m00"] != 0:
+        cx = M["m10"] / M["m00"]
+        cy = M["m01"] / M["m00"]
+        dx = cx - closest_x
+        dy = cy - closest_y
+        length = np.sqrt(dx**2 + dy**2)
+        if length > 0:
+            dx, dy = dx / length, dy / length
+            closest_x += dx * distance
+            closest_y += dy * distance
+    return closest_x, closest_y
+
+
+def _points(polygon):
+    rng = np.random.default_rng(7)
+    random = rng.uniform(50, 450, size=(300, 2))
+    # 정수 격자는 꼭짓점과 축 정렬 변 위의 점을 포함한다
+    xs, ys = np.meshgrid(np.arange(50, 451, 25), np.arange(50, 351, 25))
+    lattice = np.stack([xs.ravel(), ys.ravel()], axis=1).astype(np.float64)
+    vertices = np.asarray(polygon, dtype=np.float64)
+    midpoints = (vertices + np.roll(vertices, -1, axis=0)) / 2
+    return np.concatenate([random, lattice, vertices, midpoints])
+
+
+@pytest.mark.parametrize("name", POLYGONS)
+def test_contains_matches_point_polygon_test(name):
+    polygon = np.array(POLYGONS[name], dtype=np.int32)
+    geometry = TargetGeometry(polygon)
+    points = _points(polygon)
+
+    expected = [_baseline_contains(polygon, p) for p in points]
+    assert geometry.contains(points).tolist() == expected
+
+
+@pytest.mark.parametrize("name", POLYGONS)
+def test_closest_points_match_edge_loop(name):
+    polygon = np.array(POLYGONS[name], dtype=np.int32)
+    geometry = TargetGeometry(polygon)
+    points = _points(polygon)
+
+    closest, dist = geometry.closest_points(points)
+    for point, got, got_dist in zip(points, closest, dist):
+        expected, expected_dist = _baseline_closest(point, polygon)
+        assert got_dist == pytest.approx(expected_dist, abs=1e-9)
+        assert got == pytest.approx(expected, abs=1e-9)
+
+
+@pytest.mark.parametrize("name", POLYGONS)
+def test_pull_toward_centroid_matches_moments(name):
+    polygon = np.array(POLYGONS[name], dtype=np.int32)
+    geometry = TargetGeometry(polygon)
+    closest, _ = geometry.closest_points(_points(polygon))
+
+    for point in closest:
+        expected = _baseline_pull(point, polygon, 35)
+        assert geometry.pull_toward_centroid(point, 35) == pytest.approx(
+            expected, abs=1e-9
+        )
+
+
+def test_single_point_input():
+    polygon = np.array(POLYGONS["rect"], dtype=np.int32)
+    geometry = TargetGeometry(polygon)
+
+    assert geometry.contains((250, 200)).tolist() == [True]
+    closest, dist = geometry.closest_points((250, 50))
+    assert closest.tolist() == [[250.0, 100.0]]
+    assert dist.tolist() == [50.0]
+
+
+def _normalized_to_render(points, frame_size, video_size):
+    """프론트엔드 utils/coords.ts normalizedToRender와 같은 letterbox 변환"""
+    frame_w, frame_h = frame_size
+    render_w, render_h = video_size
+    scale = min(render_w / frame_w, render_h / frame_h)
+    pad_x = (render_w - frame_w * scale) / 2
+    pad_y = (render_h - frame_h * scale) / 2
+    return [
+        [nx * frame_w * scale + pad_x, ny * frame_h * scale + pad_y]
+        for nx, ny in points
+    ]
+
+
+@pytest.mark.parametrize("video_size", [(640, 360), (360, 640), (1280, 720)])
+def test_snapshot_normalization_matches_polygon_to_render(video_size):
+    service = ArrowService(cam_id="cam")
+    service.set_target(POLYGONS["skewed"], 1, (640, 480))
+
+    snapshot = service.snapshot
+    rendered = _normalized_to_render(snapshot.polygon, snapshot.frame_size, video_size)
+    expected = service.polygon_to_render(video_size)
+    assert np.allclose(rendered, expected, atol=1e-9)
+
+    tip = (250.0, 200.0)
+    snapshot.add_hit(tip)
+    (rendered_tip,) = _normalized_to_render(
+        [snapshot.hits[-1]["tip"]], snapshot.frame_size, video_size
+    )
+    assert rendered_tip == pytest.approx(service.to_render_coords(*tip, video_size))
@@ -0,0 +1,79 @@
+import pytest
+
+from services.hit_store import HitStore, hit_row
+
+CAM = "cam"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HitStore(str(tmp_path / "hits.sqlite3"), batch_size=64, flush_sec=60.0)
+    yield store
+    store.stop()
+
+
+def _fill(store, times, cam_id=CAM):
+    for i, t in enumerate(times):
+        store.submit(hit_row(cam_id, (float(i), 0.0), None, (100, 100), 1, now=t))
+    store.stop()
+
+
+def _pages(store, limit, **kwargs):
+    pages, cursor = [], None
+    while True:
+        hits, cursor = store.hits(CAM, limit=limit, cursor=cursor, **kwargs)
+        pages.append([h["id"] for h in hits])
+        if cursor is None:
+            return pages
+
+
+def test_stop_flushes_pending_hits(store):
+    # flush_sec가 길어도 종료 시 큐에 남은 적중을 모두 기록한다
+    _fill(store, [1000.0 + i for i in range(150)])
+
+    assert store.written == 150
+    assert store.count(CAM) == 150
+    assert store.dropped == 0 and store.failed == 0
+
+
+@pytest.mark.parametrize("limit", [1, 4, 5, 6, 20])
+def test_cursor_pages_cover_every_hit_once(store, limit):
+    _fill(store, [1000.0 + i for i in range(20)])
+
+    pages = _pages(store, limit)
+    ids = [i for page in pages for i in page]
+    assert ids == list(range(20, 0, -1))  # 최신순, 중복/누락 없음
+    assert all(len(page) == limit for page in pages[:-1])
+    # 마지막 페이지가 정확히 limit개면 다음 cursor로 빈 페이지가 한 번 더 온다
+    assert len(pages) == 20 // limit + 1
+
+
+def test_cursor_breaks_time_ties_by_id(store):
+    # 같은 시각의 적중이 페이지 경계에 걸쳐도 id로 이어 읽는다
+    _fill(store, [1000.0, 1001.0, 1001.0, 1001.0, 1001.0, 1002.0])
+
+    assert _pages(store, 2) == [[6, 5], [4, 3], [2, 1], []]
+
+
+def test_cursor_with_time_range(store):
+    _fill(store, [1000.0 + i for i in range(10)])
+
+    pages = _pages(store, 3, since=1002.0, until=1008.0)
+    assert pages == [[8, 7, 6], [5, 4, 3], []]
+
+
+def test_hits_are_filtered_by_camera(store):
+    for i in range(3):
+        store.submit(hit_row("other", (0.0, 0.0), None, None, None, now=1000.0 + i))
+    _fill(store, [1000.0])
+
+    hits, cursor = store.hits(CAM, limit=10)
+    assert [h["cam_id"] for h in hits] == [CAM]
+    assert cursor is None
+    assert store.count("other") == 3
+
+
+def test_invalid_cursor(store):
+    store.start()
+    with pytest.raises(ValueError):
+        store.hits(CAM, cursor="not-a-cursor")
@@ -0,0 +1,125 @@
+import asyncio, threading, time
+
+from services.arrow.scheduler import HitScheduler
+
+MS = 1_000_000
+
+
+def _run(scenario, wait_ms=150):
+    """새 스케줄러를 띄워 scenario(scheduler, now)를 실행하고 호출 순서를 반환"""
+
+    async def main():
+        fired = []
+
+        async def handler(cam_id):
+            fired.append(cam_id)
+
+        scheduler = HitScheduler()
+        scheduler.start(handler)
+        try:
+            await scenario(scheduler, time.monotonic_ns())
+            await asyncio.sleep(wait_ms / 1000)
+        finally:
+            await scheduler.stop()
+        return fired, scheduler
+
+    return asyncio.run(main())
+
+
+def test_fires_in_deadline_order():
+    async def scenario(scheduler, now):
+        scheduler.arm("a", now + 60 * MS)
+        scheduler.arm("b", now + 20 * MS)
+        scheduler.arm("c", now + 40 * MS)
+
+    fired, _ = _run(scenario)
+    assert fired == ["b", "c", "a"]
+
+
+def test_earlier_deadline_wakes_sleeping_loop():
+    async def scenario(scheduler, now):
+        scheduler.arm("late", now + 500 * MS)
+        await asyncio.sleep(0.01)  # 루프가 late 데드라인까지 잠든 상태
+        scheduler.arm("early", time.monotonic_ns() + 20 * MS)
+
+    fired, _ = _run(scenario, wait_ms=100)
+    assert fired == ["early"]
+
+
+def test_reschedule_replaces_previous_deadline():
+    async def scenario(scheduler, now):
+        scheduler.arm("a", now + 20 * MS)
+        scheduler.arm("b", now + 50 * MS)
+        # a를 뒤로 미루면 이전 항목은 힙에 남아도 무시된다
+        scheduler.arm("a", now + 80 * MS)
+
+    fired, _ = _run(scenario)
+    assert fired == ["b", "a"]
+
+
+def test_reschedule_earlier():
+    async def scenario(scheduler, now):
+        scheduler.arm("a", now + 80 * MS)
+        scheduler.arm("b", now + 50 * MS)
+        scheduler.arm("a", now + 20 * MS)
+
+    fired, _ = _run(scenario)
+    assert fired == ["a", "b"]
+
+
+def test_same_deadline_is_not_pushed_twice():
+    async def scenario(scheduler, now):
+        deadline = now + 500 * MS
+        scheduler.arm("a", deadline)
+        scheduler.arm("a", deadline)
+        assert len(scheduler._heap) == 1
+
+    _run(scenario, wait_ms=0)
+
+
+def test_cancel():
+    async def scenario(scheduler, now):
+        scheduler.arm("a", now + 20 * MS)
+        scheduler.arm("b", now + 30 * MS)
+        scheduler.arm("a", None)
+
+    fired, scheduler = _run(scenario)
+    assert fired == ["b"]
+    assert scheduler._deadlines == {}
+
+
+def test_arm_from_another_thread():
+    async def scenario(scheduler, now):
+        thread = threading.Thread(target=scheduler.arm, args=("a", now + 20 * MS))
+        thread.start()
+        thread.join()
+
+    fired, _ = _run(scenario)
+    assert fired == ["a"]
+
+
+def test_handler_error_does_not_stop_scheduler():
+    async def main():
+        fired = []
+
+        async def handler(cam_id):
+            fired.append(cam_id)
+            if cam_id == "a":
+                raise RuntimeError("boom")
+
+        scheduler = HitScheduler()
+        scheduler.start(handler)
+        now = time.monotonic_ns()
+        scheduler.arm("a", now + 10 * MS)
+        scheduler.arm("b", now + 30 * MS)
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+        return fired
+
+    assert asyncio.run(main()) == ["a", "b"]
+
+
+def test_arm_before_start_is_ignored():
+    scheduler = HitScheduler()
+    scheduler.arm("a", time.monotonic_ns())
+    assert scheduler._heap == []
@@ -0,0 +1,174 @@
+import sys, uuid, numpy as np, pytest
+from multiprocessing import resource_tracker, shared_memory
+
+from services.webrtc.frame_subscriber import FrameSubscriber
+from services.webrtc.shm_ring import SLOT_HEADER, ShmFrameRing
+
+W, H = 8, 4
+
+
+class FakeHistory:
+    capacity = 2
+
+
+class FakeHub:
+    history = FakeHistory()
+
+
+def _frame(value):
+    return np.full((H, W, 3), value, np.uint8)
+
+
+@pytest.fixture(autouse=True)
+def same_process_attach(monkeypatch):
+    """테스트는 생산자와 수신 측이 한 프로세스라 resource_tracker 등록을 공유한다
+
+    Python < 3.13의 attach는 등록을 빼므로, 생산자의 unlink가 다시 빼려다
+    resource_tracker가 KeyError를 찍지 않도록 등록을 되돌려 둔다.
+    """
+    if sys.version_info >= (3, 13):
+        return
+    attach = ShmFrameRing.attach.__func__
+
+    def attach_in_process(cls, name):
+        try:
+            return attach(cls, name)
+        finally:
+            resource_tracker.register(f"/{name}", "shared_memory")
+
+    monkeypatch.setattr(ShmFrameRing, "attach", classmethod(attach_in_process))
+
+
+@pytest.fixture
+def name():
+    return f"smartbow_test_{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def producer(name):
+    ring = ShmFrameRing.create(name, W, H, slots=3)
+    yield ring
+    ring.close()
+
+
+@pytest.fixture
+def reader(producer):
+    ring = ShmFrameRing.attach(producer.name)
+    yield ring
+    ring.close()
+
+
+def _mark_writing(ring, slot, seq):
+    """생산자가 슬롯을 쓰는 도중인 상태 (홀수 seq)"""
+    SLOT_HEADER.pack_into(ring.shm.buf, ring._slot_offset(slot), seq - 1, 0.0, 0, 0)
+
+
+def test_view_is_zero_copy_and_read_only(producer, reader):
+    slot, seq = producer.write(_frame(7), 1.0)
+
+    frame = reader.view(slot, seq)
+    assert frame.shape == (H, W, 3)
+    assert not frame.flags.owndata and not frame.flags.writeable
+    assert (frame == 7).all()
+    del frame
+
+
+def test_torn_read_is_rejected_then_retried(producer, reader):
+    slot, seq = producer.write(_frame(1), 1.0)
+
+    # 쓰기 중(홀수 seq)인 슬롯은 알림 seq와 달라 뷰를 만들지 않는다
+    _mark_writing(producer, slot, seq)
+    assert reader.view(slot, seq) is None
+
+    # 쓰기가 끝나 같은 seq가 다시 기록되면 재시도가 성공한다
+    offset = producer._slot_offset(slot)
+    SLOT_HEADER.pack_into(producer.shm.buf, offset, seq, 1.0, W, H)
+    frame = reader.view(slot, seq)
+    assert frame is not None and (frame == 1).all()
+    del frame
+
+
+def test_overwritten_slot_is_rejected(producer, reader):
+    slot, seq = producer.write(_frame(1), 1.0)
+    for value in range(2, 2 + producer.slots):
+        latest = producer.write(_frame(value), float(value))
+
+    # 한 바퀴 돌아 같은 슬롯을 다시 썼으므로 이전 알림은 무효
+    assert latest[0] == slot
+    assert reader.view(slot, seq) is None
+    frame = reader.view(*latest)
+    assert (frame == 1 + producer.slots).all()
+    del frame
+
+
+def test_invalid_slot(producer, reader):
+    producer.write(_frame(1), 1.0)
+    assert reader.view(-1, 2) is None
+    assert reader.view(producer.slots, 2) is None
+
+
+def test_attach_rejects_foreign_segment(name):
+    shm = shared_memory.SharedMemory(name=name, create=True, size=4096)
+    try:
+        with pytest.raises(ValueError):
+            ShmFrameRing.attach(name)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_subscriber_counts_torn_reads_as_overruns(producer):
+    subscriber = FrameSubscriber()
+    hub = FakeHub()
+    slot, seq = producer.write(_frame(3), 1.0)
+    msg = producer.notification("cam", slot, seq, 1.0)
+
+    _mark_writing(producer, slot, seq)
+    assert subscriber._shm_frame("cam", hub, msg) is None
+    assert subscriber.overruns == 1
+
+    slot, seq = producer.write(_frame(4), 2.0)
+    frame = subscriber._shm_frame(
+        "cam", hub, producer.notification("cam", slot, seq, 2.0)
+    )
+    assert (frame == 4).all()
+    assert subscriber.overruns == 1
+    del frame
+    subscriber._retired.extend(subscriber.rings.values())
+    subscriber._close_retired()
+
+
+def test_reader_reattaches_after_producer_restart(name):
+    subscriber = FrameSubscriber()
+    hub = FakeHub()
+
+    first = ShmFrameRing.create(name, W, H, slots=3)
+    slot, seq = first.write(_frame(1), 1.0)
+    msg = first.notification("cam", slot, seq, 1.0)
+    old = subscriber._shm_frame("cam", hub, msg)
+    old_ring = subscriber.rings["cam"]
+    assert old_ring.epoch == first.epoch
+
+    # 생산자 재시작: 같은 이름으로 세그먼트를 새로 만들면 epoch가 바뀐다
+    first.close()
+    second = ShmFrameRing.create(name, W, H, slots=3)
+    try:
+        assert second.epoch != first.epoch
+        slot, seq = second.write(_frame(2), 2.0)
+        msg = second.notification("cam", slot, seq, 2.0)
+        frame = subscriber._shm_frame("cam", hub, msg)
+
+        assert subscriber.rings["cam"].epoch == second.epoch
+        assert (frame == 2).all()
+        # 이전 매핑은 남은 뷰(old)가 사라질 때까지 보관된다
+        assert subscriber._retired == [old_ring]
+        assert (old == 1).all()
+
+        del old
+        subscriber._shm_frame("cam", hub, msg)
+        assert subscriber._retired == []
+        del frame
+        subscriber._retired.extend(subscriber.rings.values())
+        subscriber._close_retired()
+    finally:
+        second.close()
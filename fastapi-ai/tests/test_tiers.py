@@ -0,0 +1,91 @@
+import pytest
+
+from services.webrtc import tiers
+from services.webrtc.tiers import TIERS, TierSelector
+
+SOURCE = (1920, 1080)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def adaptive(monkeypatch):
+    monkeypatch.setattr(tiers, "ADAPTIVE", True)
+
+
+def _selector(render_size=None):
+    clock = FakeClock()
+    selector = TierSelector(render_size=render_size, clock=clock)
+    clock.now += tiers.STARTUP_GRACE_SEC
+    return selector, clock
+
+
+def _report(selector, clock, estimate, send_rate, advance=0.5):
+    clock.now += advance
+    selector.update_bitrate(estimate, send_rate)
+    return selector.select(SOURCE)
+
+
+def test_ignores_remb_during_startup_grace():
+    clock = FakeClock()
+    selector = TierSelector(clock=clock)
+    selector.update_bitrate(100_000, 2_000_000)
+    assert selector.select(SOURCE) is TIERS[0]
+
+
+def test_congestion_steps_down_one_tier_per_settle():
+    selector, clock = _selector()
+    assert _report(selector, clock, 1_000_000, 2_000_000) is TIERS[1]
+    # 바꾼 직후에는 송신률이 따라올 때까지 판단하지 않는다
+    assert _report(selector, clock, 100_000, 800_000) is TIERS[1]
+    clock.now += tiers.SETTLE_SEC
+    assert _report(selector, clock, 100_000, 800_000) is TIERS[2]
+    clock.now += tiers.SETTLE_SEC
+    # 가장 낮은 티어 아래로는 내리지 않는다
+    assert _report(selector, clock, 10_000, 300_000) is TIERS[2]
+
+
+def test_estimate_near_send_rate_keeps_tier():
+    selector, clock = _selector()
+    assert _report(selector, clock, 1_800_000, 2_000_000) is TIERS[0]
+
+
+def test_headroom_upgrades_after_hold():
+    selector, clock = _selector()
+    _report(selector, clock, 1_000_000, 2_000_000)
+    clock.now += tiers.SETTLE_SEC
+    assert _report(selector, clock, 2_000_000, 800_000) is TIERS[1]
+    hold = tiers.UPGRADE_HOLD_SEC
+    assert _report(selector, clock, 2_000_000, 800_000, hold) is TIERS[0]
+
+
+def test_failed_upgrade_doubles_hold():
+    selector, clock = _selector()
+    _report(selector, clock, 1_000_000, 2_000_000)
+    clock.now += tiers.SETTLE_SEC
+    _report(selector, clock, 2_000_000, 800_000)
+    _report(selector, clock, 2_000_000, 800_000, tiers.UPGRADE_HOLD_SEC)
+    clock.now += tiers.SETTLE_SEC
+    # 올려 본 티어에서 곧바로 혼잡 - 다음 시도까지 두 배로 기다린다
+    assert _report(selector, clock, 1_000_000, 2_000_000) is TIERS[1]
+    assert selector.upgrade_hold == tiers.UPGRADE_HOLD_SEC * 2
+
+
+def test_render_size_caps_highest_tier():
+    selector, clock = _selector(render_size=(480, 270))
+    assert selector.select(SOURCE) is TIERS[2]
+    # 혼잡이 없어도 표시 크기보다 큰 티어로는 올리지 않는다
+    clock.now += tiers.SETTLE_SEC
+    for _ in range(5):
+        assert _report(selector, clock, 5_000_000, 300_000, 10.0) is TIERS[2]
+
+
+def test_render_size_larger_than_low_tier():
+    selector, _ = _selector(render_size=(960, 540))
+    assert selector.select(SOURCE) is TIERS[1]
@@ -0,0 +1,136 @@
+import asyncio, orjson, pytest
+
+import routers.ws as ws_router
+from routers.ws import ClientConnection, MAX_PENDING, broadcast, connected_clients
+from services.arrow.service import ArrowService, HIT
+from services.metrics import WS_EVICTIONS
+
+CAM = "ws-test"
+
+
+class FakeWebSocket:
+    """send_text를 gate로 막을 수 있는 WebSocket 대역"""
+
+    def __init__(self, blocked=False, fail=False):
+        self.sent = []
+        self.closed = None
+        self.fail = fail
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        if self.fail:
+            raise ConnectionError("gone")
+        self.sent.append(orjson.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+@pytest.fixture(autouse=True)
+def arrow(monkeypatch):
+    service = ArrowService(cam_id=CAM)
+    service.set_target([(0, 0), (100, 0), (100, 100), (0, 100)], 1, (100, 100))
+    monkeypatch.setattr(ws_router.camera_registry, "arrow", lambda cam_id: service)
+    yield service
+    connected_clients.pop(CAM, None)
+
+
+def _connect(ws):
+    conn = ClientConnection(ws, CAM)
+    conn.video_size = (200, 200)
+    connected_clients.setdefault(CAM, {})[ws] = conn
+    return conn
+
+
+def _hit(x=50.0):
+    return {"type": HIT, "tip": [x, 50.0], "confidence": 0.9}
+
+
+def _evictions():
+    return WS_EVICTIONS.labels(CAM).value
+
+
+def test_healthy_client_receives_hits_in_order():
+    async def main():
+        ws = FakeWebSocket()
+        _connect(ws)
+        for x in (10.0, 20.0, 30.0):
+            await broadcast(CAM, _hit(x))
+        await asyncio.sleep(0)
+        return ws
+
+    ws = asyncio.run(main())
+    assert [m["tip"] for m in ws.sent] == [[20.0, 100.0], [40.0, 100.0], [60.0, 100.0]]
+    assert ws in connected_clients[CAM]
+
+
+def test_evicts_client_when_queue_is_full():
+    async def main():
+        before = _evictions()
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        slow_conn = _connect(slow)
+        _connect(fast)
+
+        # 첫 메시지는 writer가 꺼내 전송 중에 멈추고, 나머지가 큐를 채운다
+        for i in range(MAX_PENDING + 1):
+            await broadcast(CAM, _hit())
+            await asyncio.sleep(0)
+            assert slow in connected_clients[CAM], i
+
+        await broadcast(CAM, _hit())
+        await asyncio.sleep(0)
+        return before, slow, slow_conn, fast
+
+    before, slow, slow_conn, fast = asyncio.run(main())
+    assert slow not in connected_clients[CAM]
+    assert slow.closed == 1013
+    assert slow_conn.task.cancelled()
+    assert _evictions() == before + 1
+    # 느린 클라이언트 때문에 다른 클라이언트가 밀리지 않는다
+    assert fast in connected_clients[CAM]
+    assert len(fast.sent) == MAX_PENDING + 2
+
+
+def test_evicts_client_stuck_in_send(monkeypatch):
+    monkeypatch.setattr(ws_router, "MAX_SEND_SEC", 0.05)
+
+    async def main():
+        before = _evictions()
+        ws = FakeWebSocket(blocked=True)
+        _connect(ws)
+
+        await broadcast(CAM, _hit())
+        await asyncio.sleep(0.01)
+        # 큐는 비어 있지만 아직 전송 지연 기준 전
+        await broadcast(CAM, _hit())
+        assert ws in connected_clients[CAM]
+
+        await asyncio.sleep(0.1)
+        await broadcast(CAM, _hit())
+        await asyncio.sleep(0)
+        return before, ws
+
+    before, ws = asyncio.run(main())
+    assert ws not in connected_clients[CAM]
+    assert ws.closed == 1013
+    assert _evictions() == before + 1
+
+
+def test_send_failure_removes_client_without_eviction_count():
+    async def main():
+        before = _evictions()
+        ws = FakeWebSocket(fail=True)
+        conn = _connect(ws)
+        await broadcast(CAM, _hit())
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return before, ws, conn
+
+    before, ws, conn = asyncio.run(main())
+    assert ws not in connected_clients[CAM]
+    assert conn.task.done()
+    assert ws.closed is None
+    assert _evictions() == before
@@ -5,9 +5,19 @@ interface Props {
   polygon: number[][];
   renderRect: { w: number; h: number };
   isVisible?: boolean;
+  provisional?: boolean;
+  // 접속 전 적중 기록 (스냅샷, 렌더 좌표)
+  recentHits?: [number, number][];
 }
 
-export default function TargetOverlayView({ hit, polygon, renderRect, isVisible = true }: Props) {
+export default function TargetOverlayView({
+  hit,
+  polygon,
+  renderRect,
+  isVisible = true,
+  provisional = false,
+  recentHits = [],
+}: Props) {
   if (!polygon || polygon.length < 4) return null;
 
   const lerp = (p1: number[], p2: number[], t: number) => [
@@ -52,6 +62,14 @@ export default function TargetOverlayView({ hit, polygon, renderRect, isVisible
       ]
     : null;
 
+  // 현재 히트와 같은 좌표는 아래 마커가 그리므로 제외
+  const scaledRecentHits = recentHits
+    .filter(([x, y]) => !hit || x !== hit[0] || y !== hit[1])
+    .map(([x, y]) => [
+      screenCenterX + (x - centerX) * scale,
+      screenCenterY + (y - centerY) * scale,
+    ]);
+
   return (
     <svg
       width={renderRect.w}
@@ -209,8 +227,40 @@ export default function TargetOverlayView({ hit, polygon, renderRect, isVisible
         );
       })()}
 
+      {/* 이전 적중 기록 - 흐린 점으로 표시 */}
+      {scaledRecentHits.map(([x, y], i) => (
+        <circle
+          key={`recent-${i}`}
+          cx={x}
+          cy={y}
+          r={4}
+          fill='rgba(255,215,0,0.35)'
+          stroke='rgba(255,170,0,0.5)'
+          strokeWidth={1}
+        />
+      ))}
+
+      {/* 잠정 히트 마커 - 확정 전까지 점선 링만 표시 */}
+      {scaledHit && provisional && (
+        <g>
+          <motion.circle
+            cx={scaledHit[0]}
+            cy={scaledHit[1]}
+            r={14}
+            fill='none'
+            stroke='rgba(255,255,255,0.7)'
+            strokeWidth={2}
+            strokeDasharray='4 4'
+            initial={{ opacity: 0 }}
+            animate={isVisible ? { opacity: [0.4, 0.9, 0.4] } : { opacity: 0.6 }}
+            transition={{ duration: 0.8, repeat: Infinity }}
+          />
+          <circle cx={scaledHit[0]} cy={scaledHit[1]} r={3} fill='rgba(255,255,255,0.8)' />
+        </g>
+      )}
+
       {/* 히트 마커 */}
-      {scaledHit && (
+      {scaledHit && !provisional && (
         <g>
           {/* 외곽 펄스 링 1 */}
           <motion.circle
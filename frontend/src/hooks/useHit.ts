@@ -3,19 +3,35 @@ import type { WsMessage } from '../types/wsTypes';
 
 type Hit = [number, number];
 
+// 적중 오버레이 표시 시간
+export const HIT_DISPLAY_MS = 6000;
+
+export type HitState = {
+  tip: Hit;
+  // 스트리밍 모드의 잠정 적중 (hit_final로 확정/보정/철회된다)
+  provisional: boolean;
+};
+
 export function useHit(message: WsMessage | null) {
-  const [hit, setHit] = useState<Hit | null>(null);
+  const [hit, setHit] = useState<HitState | null>(null);
 
   useEffect(() => {
     if (!message) return;
-    if (message.type === 'hit') {
-      setHit(message.tip);
+    switch (message.type) {
+      case 'hit_provisional':
+        setHit({ tip: message.tip, provisional: true });
+        break;
+      case 'hit':
+      case 'hit_final':
+        // tip이 null이면 잠정 적중 철회
+        setHit(message.tip ? { tip: message.tip, provisional: false } : null);
+        break;
     }
   }, [message]);
 
   useEffect(() => {
     if (!hit) return;
-    const timer = setTimeout(() => setHit(null), 6000);
+    const timer = setTimeout(() => setHit(null), HIT_DISPLAY_MS);
     return () => clearTimeout(timer);
   }, [hit]);
 
@@ -133,9 +133,24 @@ export function useWebRTC({
 
       await pc.setLocalDescription(offer);
 
+      // 렌더 크기에 맞는 해상도 티어를 서버가 고를 수 있도록 함께 보낸다
+      const video = videoRef.current;
+      const ratio = window.devicePixelRatio || 1;
+      const videoSize =
+        video && video.clientWidth > 0
+          ? {
+              width: Math.round(video.clientWidth * ratio),
+              height: Math.round(video.clientHeight * ratio),
+            }
+          : undefined;
+
       const resp = await api.post(
         `webrtc/offer/${camId}`,
-        pc.localDescription,
+        {
+          sdp: pc.localDescription?.sdp,
+          type: pc.localDescription?.type,
+          video_size: videoSize,
+        },
         {
           timeout: 10000,
         }
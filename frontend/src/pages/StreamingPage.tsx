@@ -1,13 +1,15 @@
 import { useParams } from 'react-router-dom';
-import { useEffect, useRef, useState } from 'react';
+import { useEffect, useMemo, useRef, useState } from 'react';
 import { AnimatePresence, motion } from 'framer-motion';
 import CamWebRTC from '../components/CamWebRTC';
 import { useWebSocket } from '../hooks/useWebSocket';
 import { useVideoSize } from '../hooks/useVideoSize';
-import { useHit } from '../hooks/useHit';
+import { useHit, HIT_DISPLAY_MS } from '../hooks/useHit';
 import TargetOverlayView from '../components/TargetOverlayView';
 import useVisibility from '../hooks/useVisibility';
 import { getWebSocketStatus, isSystemOnline } from '../utils/webrtc';
+import { normalizedToRender } from '../utils/coords';
+import type { SnapshotMessage } from '../types/wsTypes';
 import StreamingHeader from '../components/StreamingHeader';
 import StreamingFooter from '../components/StreamingFooter';
 
@@ -16,6 +18,9 @@ export default function StreamingPage() {
 
   const videoRef = useRef<HTMLVideoElement>(null);
   const [polygon, setPolygon] = useState<number[][] | null>(null);
+  const [snapshot, setSnapshot] = useState<SnapshotMessage | null>(null);
+  // 접속 직전에 난 적중이면 스냅샷의 마지막 적중을 잠시 띄운다
+  const [snapshotHitFresh, setSnapshotHitFresh] = useState(false);
 
   const {
     send,
@@ -54,9 +59,45 @@ export default function StreamingPage() {
     if (!message) return;
     if (message.type === 'polygon') {
       setPolygon(message.points);
+    } else if (message.type === 'snapshot') {
+      setSnapshot(message);
+      const last = message.hits[message.hits.length - 1];
+      setSnapshotHitFresh(
+        !!last && Date.now() - last.time * 1000 < HIT_DISPLAY_MS
+      );
     }
   }, [message]);
 
+  useEffect(() => {
+    if (!snapshotHitFresh) return;
+    const timer = setTimeout(() => setSnapshotHitFresh(false), HIT_DISPLAY_MS);
+    return () => clearTimeout(timer);
+  }, [snapshotHitFresh]);
+
+  // 스냅샷 적중 기록(정규화 좌표)을 현재 렌더 크기로 변환
+  const snapshotHits = useMemo(() => {
+    if (!snapshot?.frame_size || !renderRect) return [];
+    return normalizedToRender(
+      snapshot.hits.map((h) => h.tip),
+      snapshot.frame_size,
+      renderRect
+    ) as [number, number][];
+  }, [snapshot, renderRect]);
+
+  const overlayHit =
+    hit ??
+    (snapshotHitFresh && snapshotHits.length
+      ? { tip: snapshotHits[snapshotHits.length - 1], provisional: false }
+      : null);
+
+  // 스냅샷의 정규화 폴리곤으로 video_size 응답을 기다리지 않고 바로 그린다
+  useEffect(() => {
+    if (!snapshot?.polygon || !snapshot.frame_size || !renderRect) return;
+    setPolygon(
+      normalizedToRender(snapshot.polygon, snapshot.frame_size, renderRect)
+    );
+  }, [snapshot, renderRect]);
+
   if (!camId) {
     return (
       <div className='flex items-center justify-center h-screen bg-black'>
@@ -147,7 +188,7 @@ export default function StreamingPage() {
                   onConnectionStateChange={setTargetCamState}
                 />
 
-                {hit && polygon && renderRect && (
+                {overlayHit && polygon && renderRect && (
                   <AnimatePresence>
                     <motion.div
                       key='overlay-bg'
@@ -167,7 +208,9 @@ export default function StreamingPage() {
                       transition={{ duration: 0.35, ease: 'easeOut' }}
                     >
                       <TargetOverlayView
-                        hit={hit}
+                        hit={overlayHit.tip}
+                        provisional={overlayHit.provisional}
+                        recentHits={snapshotHits}
                         polygon={polygon}
                         renderRect={renderRect}
                         isVisible={isVisible}
@@ -6,9 +6,39 @@ type PolygonMessage = {
 export type HitMessage = {
   type: 'hit';
   tip: [number, number];
+  confidence?: number;
 };
 
-export type WsMessage = PolygonMessage | HitMessage;
+// 스트리밍 모드(SMARTBOW_STREAMING_HITS=1): 충돌 즉시 잠정 적중, idle 후 확정
+export type HitProvisionalMessage = {
+  type: 'hit_provisional';
+  tip: [number, number];
+  confidence?: number;
+};
+
+// tip이 null이면 잠정 적중 철회
+export type HitFinalMessage = {
+  type: 'hit_final';
+  tip: [number, number] | null;
+  confidence?: number;
+};
+
+// 접속 직후 한 번 오는 상태 스냅샷 (좌표는 프레임 크기 기준 0~1)
+export type SnapshotMessage = {
+  type: 'snapshot';
+  frame_size: [number, number] | null;
+  target_version: number | null;
+  polygon: number[][] | null;
+  hits: { tip: [number, number]; confidence: number | null; time: number }[];
+  state: 'ready' | 'tracking' | 'impact' | 'idle_pending' | 'cooldown';
+};
+
+export type WsMessage =
+  | PolygonMessage
+  | HitMessage
+  | HitProvisionalMessage
+  | HitFinalMessage
+  | SnapshotMessage;
 
 type VideoSizeMessage = {
   type: 'video_size';
@@ -0,0 +1,16 @@
+// 서버 to_render_coords와 동일한 letterbox(contain) 변환
+export function normalizedToRender(
+  points: number[][],
+  frameSize: [number, number],
+  rect: { w: number; h: number }
+): number[][] {
+  const [frameW, frameH] = frameSize;
+  const scale = Math.min(rect.w / frameW, rect.h / frameH);
+  const padX = (rect.w - frameW * scale) / 2;
+  const padY = (rect.h - frameH * scale) / 2;
+
+  return points.map(([nx, ny]) => [
+    nx * frameW * scale + padX,
+    ny * frameH * scale + padY,
+  ]);
+}